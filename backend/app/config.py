@@ -16,3 +16,135 @@ SNMP_DEFAULT_COMMUNITY = "public"
 
 # Polling interval in seconds
 POLL_INTERVAL = 1
+
+# Default SNMP poll interval per device (seconds); Device.poll_interval overrides it
+SNMP_POLL_INTERVAL = 5
+
+# Random spread applied to each device's poll start, as a fraction of its interval
+POLL_JITTER = 0.1
+
+# How often the poll scheduler reloads the device inventory (seconds)
+INVENTORY_REFRESH_INTERVAL = 60
+
+# SNMP request timeout (seconds) and retries per request
+SNMP_TIMEOUT = 2
+SNMP_RETRIES = 1
+
+# Socket buffer size for the shared SNMP UDP socket (bytes)
+SNMP_SOCKET_BUFFER = 4 * 1024 * 1024
+
+# GETBULK max-repetitions used for SNMPv2c table walks
+SNMP_MAX_REPETITIONS = 25
+
+# Polling concurrency limits (0 = unlimited); adjustable at runtime via /poller/limits
+POLL_MAX_CONCURRENT = 500
+POLL_MAX_PER_SITE = 50
+
+# Minimum gap between SNMP requests sent to the same device (seconds, 0 = no pacing)
+POLL_DEVICE_REQUEST_INTERVAL = 0.0
+
+# Circuit breaker for unreachable devices: after this many consecutive failures a
+# device is only probed (sysUpTime), with exponential backoff between probes (seconds)
+HEALTH_FAILURE_THRESHOLD = 3
+HEALTH_BACKOFF_BASE = 10
+HEALTH_BACKOFF_MAX = 600
+
+# Number of poller worker processes (1 = poll inside the API event loop, 0 = one per CPU core)
+POLLER_PROCESSES = int(os.getenv("POLLER_PROCESSES", "1"))
+
+# Poll inside the API process. Set ENABLE_INPROCESS_POLLER=0 when running the
+# standalone poller (python -m app.poller) next to `uvicorn --workers N`.
+ENABLE_INPROCESS_POLLER = os.getenv("ENABLE_INPROCESS_POLLER", "1") == "1"
+
+# Postgres LISTEN/NOTIFY channel carrying live poll updates from poller to API
+LIVE_CHANNEL_NAME = os.getenv("LIVE_CHANNEL_NAME", "nms_live")
+LIVE_CHANNEL_QUEUE = 10000  # events buffered by the publisher before dropping
+
+# UDP port SNMP agents listen on (override to poll the local simulator farm)
+SNMP_PORT = int(os.getenv("SNMP_PORT", "161"))
+
+# Bulk ingestion of interface samples: rows per multi-row INSERT statement, and the
+# batch size from which asyncpg COPY is used instead
+INGEST_INSERT_BATCH = 5000
+INGEST_COPY_THRESHOLD = 1000
+
+# Write-behind buffer between pollers and the DB: poll results queued before pollers
+# are made to wait, results per DB transaction, max seconds a result waits for its
+# batch, and retries of a failed batch before it is dropped
+WRITE_BEHIND_QUEUE = 5000
+WRITE_BEHIND_BATCH = 500
+WRITE_BEHIND_FLUSH_INTERVAL = 1.0
+WRITE_BEHIND_RETRIES = 3
+
+# interface_stats is partitioned by day: partitions are created this many days
+# ahead, whole partitions older than the retention are dropped, and maintenance
+# runs every PARTITION_MAINTENANCE_INTERVAL seconds
+STATS_RETENTION_DAYS = int(os.getenv("STATS_RETENTION_DAYS", "30"))
+STATS_PARTITION_DAYS_AHEAD = 7
+PARTITION_MAINTENANCE_INTERVAL = 3600
+
+# Time window returned by the stats endpoints when no start/end is given (hours)
+STATS_DEFAULT_WINDOW_HOURS = 24
+
+# Interface stats rollups (1m/5m/1h/1d min/avg/max/p95): days each resolution is kept,
+# and how long after a bucket ends samples may still arrive before it is closed (seconds)
+ROLLUP_RETENTION_DAYS = {"1m": 3, "5m": 35, "1h": 400, "1d": 1830}
+ROLLUP_GRACE = 30
+ROLLUP_FLUSH_INTERVAL = 10
+
+# Points the stats endpoints aim for when no `points` is given
+STATS_DEFAULT_POINTS = 300
+
+# In-memory ring buffer of the most recent samples per interface (API process):
+# samples kept per interface (180 x 5 s = 15 minutes, 24 bytes each), and the
+# window /stats/recent and the WebSocket backfill return by default (seconds)
+RECENT_SAMPLES_CAPACITY = int(os.getenv("RECENT_SAMPLES_CAPACITY", "180"))
+RECENT_DEFAULT_SECONDS = 300
+
+# Columnar archive of interface_stats (requires pyarrow). When set, each daily
+# partition is exported to Parquet under this directory (day=YYYY-MM-DD/device=N/)
+# before retention drops it, and the stats endpoints read older ranges from there.
+# Empty disables archiving: expired partitions are simply dropped.
+STATS_ARCHIVE_DIR = os.getenv("STATS_ARCHIVE_DIR", "")
+ARCHIVE_BATCH_ROWS = 100_000  # rows streamed from Postgres / written per Parquet row group
+
+# Keyset pagination of list endpoints: rows per page by default and at most
+# (the next page's cursor is returned in the X-Next-Cursor response header)
+PAGE_DEFAULT_LIMIT = 100
+PAGE_MAX_LIMIT = 1000
+# Points per page of the stats endpoints
+STATS_MAX_POINTS_PER_PAGE = 50_000
+
+# The /topology/graph snapshot is rebuilt when LLDP creates links or devices are
+# added/removed, and at the latest after this many seconds (changes made through
+# another API worker)
+TOPOLOGY_SNAPSHOT_MAX_AGE = 300
+
+# Devices of these types (case-insensitive) are the upstream side of the network
+# for /topology/impact when no roots are given
+TOPOLOGY_ROOT_DEVICE_TYPES = [t.strip().lower() for t in os.getenv("TOPOLOGY_ROOT_DEVICE_TYPES", "router,firewall").split(",") if t.strip()]
+
+# WebSocket live push (API process): device and interface changes carried by live
+# poll events are collected and pushed to the clients as one delta per interval (seconds)
+LIVE_PUSH_INTERVAL = 1.0
+
+# Messages queued per WebSocket client before it counts as a slow consumer, and
+# what happens then: "coalesce" drops its queued deltas and sends it a fresh
+# snapshot of its topics instead, "disconnect" closes its socket
+WS_CLIENT_QUEUE = 100
+WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "coalesce")
+
+# uvicorn workers serving the API (uvicorn --workers N; WEB_CONCURRENCY is what
+# uvicorn itself reads). Above 1 the workers elect one live producer with a Postgres
+# advisory lock: only it polls (with ENABLE_INPROCESS_POLLER) and turns poll events
+# into WebSocket deltas, which it publishes on LIVE_DELTA_CHANNEL_NAME for every
+# worker to relay to its own clients. A follower retries the election every
+# LIVE_ELECTION_INTERVAL seconds, so it takes over soon after the producer dies.
+API_WORKERS = int(os.getenv("API_WORKERS", os.getenv("WEB_CONCURRENCY", "1")))
+LIVE_DELTA_CHANNEL_NAME = os.getenv("LIVE_DELTA_CHANNEL_NAME", "nms_live_deltas")
+LIVE_ELECTION_INTERVAL = 5
+
+# Recent WebSocket deltas kept for clients that reconnect with their last sequence
+# number, bounded by the device and interface entries they hold in total. A client
+# whose last seq is older than the oldest kept delta gets a fresh snapshot instead.
+LIVE_REPLAY_ENTRIES = 200_000
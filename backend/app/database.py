@@ -1,5 +1,6 @@
 # backend/app/database.py
 
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from .config import DATABASE_URL
@@ -13,7 +14,83 @@ async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession
 # Base class for models
 Base = declarative_base()
 
+# Schema changes made after tables were first created. create_all() never alters
+# an existing table, so these run on every startup and must be idempotent.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE devices ADD COLUMN IF NOT EXISTS poll_interval INTEGER",
+    # Unique natural key on interfaces: merge duplicate named rows into the oldest one
+    # (repointing their samples, rollups, alerts and MAC changes) before adding it.
+    # A rollup bucket both rows already hold keeps the oldest row's copy.
+    """
+    DO $$
+    DECLARE
+        rollup TEXT;
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_interfaces_device_name') THEN
+            CREATE TEMP TABLE interface_dupes ON COMMIT DROP AS
+                SELECT id, min(id) OVER (PARTITION BY device_id, interface_name) AS keep_id
+                FROM interfaces WHERE interface_name IS NOT NULL;
+            FOREACH rollup IN ARRAY ARRAY['interface_stats_1m', 'interface_stats_5m', 'interface_stats_1h', 'interface_stats_1d'] LOOP
+                EXECUTE format(
+                    'DELETE FROM %1$I r USING interface_dupes d
+                     WHERE r.interface_id = d.id AND d.id <> d.keep_id AND EXISTS (
+                         SELECT 1 FROM %1$I o JOIN interface_dupes g ON g.id = o.interface_id
+                         WHERE g.keep_id = d.keep_id AND o.bucket = r.bucket AND o.interface_id < r.interface_id
+                     )', rollup);
+            END LOOP;
+            DELETE FROM interface_dupes WHERE id = keep_id;
+            UPDATE interface_stats s SET interface_id = d.keep_id FROM interface_dupes d WHERE s.interface_id = d.id;
+            UPDATE interface_stats_1m s SET interface_id = d.keep_id FROM interface_dupes d WHERE s.interface_id = d.id;
+            UPDATE interface_stats_5m s SET interface_id = d.keep_id FROM interface_dupes d WHERE s.interface_id = d.id;
+            UPDATE interface_stats_1h s SET interface_id = d.keep_id FROM interface_dupes d WHERE s.interface_id = d.id;
+            UPDATE interface_stats_1d s SET interface_id = d.keep_id FROM interface_dupes d WHERE s.interface_id = d.id;
+            UPDATE alerts a SET interface_id = d.keep_id FROM interface_dupes d WHERE a.interface_id = d.id;
+            UPDATE mac_change_logs m SET interface_id = d.keep_id FROM interface_dupes d WHERE m.interface_id = d.id;
+            DELETE FROM interfaces WHERE id IN (SELECT id FROM interface_dupes);
+            ALTER TABLE interfaces ADD CONSTRAINT uq_interfaces_device_name UNIQUE (device_id, interface_name);
+        END IF;
+    END $$
+    """,
+    # Unique link ends on topology_links: keep the most recently seen of duplicate rows
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_topology_links_endpoints') THEN
+            DELETE FROM topology_links WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, row_number() OVER (
+                        PARTITION BY src_device_id, src_interface, dst_device_id, dst_interface
+                        ORDER BY last_seen DESC NULLS LAST, id
+                    ) AS n FROM topology_links
+                ) ranked WHERE n > 1
+            );
+            ALTER TABLE topology_links ADD CONSTRAINT uq_topology_links_endpoints
+                UNIQUE (src_device_id, src_interface, dst_device_id, dst_interface);
+        END IF;
+    END $$
+    """,
+    # Indexes behind the filters of the paginated list endpoints
+    "CREATE INDEX IF NOT EXISTS ix_devices_site_id ON devices (site_id)",
+    "CREATE INDEX IF NOT EXISTS ix_alerts_timestamp ON alerts (timestamp)",
+    "CREATE INDEX IF NOT EXISTS ix_alerts_device_id_id ON alerts (device_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_alerts_severity_id ON alerts (severity, id)",
+    "CREATE INDEX IF NOT EXISTS ix_mac_change_logs_timestamp ON mac_change_logs (timestamp)",
+    "CREATE INDEX IF NOT EXISTS ix_mac_change_logs_device_id_id ON mac_change_logs (device_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_topology_links_dst_device_id ON topology_links (dst_device_id)",
+]
+
 # Function to create all tables
 async def init_db():
+    from .utils import partitions  # imports this module
+
     async with engine.begin() as conn:
+        await partitions.lock_schema(conn)
+        # a pre-partitioning interface_stats is renamed away before create_all builds the new one
+        legacy_stats = await partitions.retire_legacy_stats_table(conn)
         await conn.run_sync(Base.metadata.create_all)
+        for statement in SCHEMA_UPGRADES:
+            await conn.execute(text(statement))
+        for table in partitions.PARTITIONED_TABLES:
+            await partitions.ensure_partitions(conn, table)
+        if legacy_stats:
+            await partitions.import_legacy_stats(conn)
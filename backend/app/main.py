@@ -3,10 +3,21 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import routers
-from .routers import devices, interfaces, alerts, sites, topology, auth, stats, mac_change
+from .routers import devices, interfaces, alerts, sites, topology, auth, stats, mac_change, poller
 from .websocket import real_time
 from .database import init_db
+from .config import SNMP_POLL_INTERVAL, POLLER_PROCESSES, ENABLE_INPROCESS_POLLER, API_WORKERS
 from .utils import snmp_engine
+from .utils.snmp_transport import close_transport
+from .utils.poller_pool import PollerPool
+from .utils.live_channel import live_channel
+from .utils.write_behind import write_behind
+from .utils.partitions import run_partition_maintenance
+from .utils.recent_samples import recent_samples
+from .utils.pagination import NEXT_CURSOR_HEADER
+from .utils.topology_graph import topology_snapshot, topology_graph
+from .utils.live_state import live_state
+from .utils.live_fanout import live_fanout
 
 app = FastAPI(title="Advanced NMS Tool", version="1.0")
 
@@ -17,6 +28,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],  # keyset pagination of list endpoints
 )
 
 # Include routers
@@ -28,6 +40,7 @@ app.include_router(topology.router, prefix="/topology", tags=["Topology"])
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(stats.router, prefix="/stats", tags=["Stats"])
 app.include_router(mac_change.router, prefix="/mac-change", tags=["MAC Change Logs"])
+app.include_router(poller.router, prefix="/poller", tags=["Poller"])
 
 # Websocket router
 app.include_router(real_time.router, prefix="/ws", tags=["WebSocket"])
@@ -44,26 +57,94 @@ async def startup_event():
     # Get event loop
     loop = asyncio.get_event_loop()
 
-    # Start SNMP engine (with LLDP polling) in background
-    loop.create_task(run_snmp_loop())
-    print("SNMP Engine (with LLDP) started in background")
+    # Keep the last few minutes of every interface's traffic in memory for live views
+    live_channel.subscribe(recent_samples.on_event)
+    # Rebuild the /topology/graph snapshot and extend the path/impact graph when LLDP discovers new links
+    live_channel.subscribe(topology_snapshot.on_event)
+    live_channel.subscribe(topology_graph.on_event)
+    # Current device/interface state for WebSocket clients, pushed as deltas
+    live_channel.subscribe(live_state.on_event)
+
+    if API_WORKERS > 1:
+        # Several uvicorn workers: the one holding the producer lock polls and publishes
+        # WebSocket deltas; every worker relays them to its own clients. Live events are
+        # shared over Postgres NOTIFY in both directions (device changes made here,
+        # poll results of the producer).
+        live_channel.start_publisher()
+        loop.create_task(live_channel.listen())
+        loop.create_task(live_fanout.run(on_elected=start_producer_duties, on_demoted=stop_producer_duties))
+        print(f"Electing the live producer among {API_WORKERS} API workers")
+    else:
+        start_producer_duties()
 
-    # Start WebSocket push in background
-    loop.create_task(real_time.realtime_push(interval=1))
+        # Polling happens in another process: receive its live updates over Postgres NOTIFY
+        if not ENABLE_INPROCESS_POLLER or POLLER_PROCESSES != 1:
+            loop.create_task(live_channel.listen())
+            print("Listening for live poller updates")
+
+    # Start WebSocket push in background (state loaded once, then only live events)
+    loop.create_task(live_state.run())
     print("WebSocket real-time push started")
 
+# --------------------------------------------------------------------------
+# Producer duties: run by the only API worker, or by the elected one of several
+# --------------------------------------------------------------------------
+def start_producer_duties():
+    loop = asyncio.get_event_loop()
+    tasks = app.state.producer_tasks = []
+
+    # Start SNMP engine (with LLDP polling) in background
+    if not ENABLE_INPROCESS_POLLER:
+        print("In-process polling disabled - expecting the standalone poller (python -m app.poller)")
+    elif POLLER_PROCESSES == 1:
+        tasks.append(loop.create_task(run_snmp_loop()))
+        print("SNMP Engine (with LLDP) started in background")
+    else:
+        # sharded across worker processes, each with its own event loop and DB pool
+        app.state.poller_pool = PollerPool(POLLER_PROCESSES, interval=SNMP_POLL_INTERVAL)
+        app.state.poller_pool.start()
+        tasks.append(loop.create_task(app.state.poller_pool.supervise()))
+        print(f"SNMP Engine (with LLDP) started in {app.state.poller_pool.processes} worker processes")
+
+    # The process that runs the pollers also keeps interface_stats partitions rolling
+    if ENABLE_INPROCESS_POLLER:
+        tasks.append(loop.create_task(run_partition_maintenance()))
+
+async def stop_producer_duties():
+    # another worker may already hold the producer lock: stop polling here
+    for task in getattr(app.state, "producer_tasks", []):
+        task.cancel()
+    app.state.producer_tasks = []
+    pool = getattr(app.state, "poller_pool", None)
+    if pool is not None:
+        app.state.poller_pool = None
+        await pool.stop()
+
+# --------------------------------------------------------------------------
+# Shutdown Event
+# --------------------------------------------------------------------------
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Stop poller worker processes (if any), write out queued poll results and
+    # release the shared SNMP UDP socket
+    pool = getattr(app.state, "poller_pool", None)
+    if pool is not None:
+        await pool.stop()
+    await write_behind.stop()
+    close_transport()
+
 # --------------------------------------------------------------------------
 # Run SNMP + LLDP polling in a single loop safely
 # --------------------------------------------------------------------------
 async def run_snmp_loop():
     """Continuously poll all devices using SNMP (includes LLDP)."""
-    interval = 5  # seconds
     while True:
         try:
-            await snmp_engine.poll_all_devices(interval=interval)
+            # each device runs on its own deadline inside poll_all_devices; it only returns on error
+            await snmp_engine.poll_all_devices(interval=SNMP_POLL_INTERVAL)
         except Exception as e:
             print(f"[SNMP Engine Error] {e}")
-        await asyncio.sleep(interval)
+        await asyncio.sleep(5)  # back off before restarting the scheduler
 
 # Root endpoint
 @app.get("/")
@@ -72,3 +153,7 @@ async def root():
 
 # Run:
 # uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
+# with N workers, set API_WORKERS=N (or WEB_CONCURRENCY=N) so they elect a single live producer:
+# API_WORKERS=4 uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers 4
+# (the websockets implementation, --ws websockets, negotiates permessage-deflate with
+# browsers for /ws/ws; --ws-per-message-deflate false turns it off)
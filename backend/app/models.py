@@ -1,4 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, BigInteger, ForeignKey, TIMESTAMP, Text
+from sqlalchemy import (
+    Column, Integer, String, Boolean, BigInteger, ForeignKey, TIMESTAMP, Text, Index, Float, UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from .database import Base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -25,13 +28,14 @@ class Device(Base):
     id = Column(Integer, primary_key=True, index=True)
     hostname = Column(String(100))
     ip_address = Column(String(50), unique=True, nullable=False)
-    site_id = Column(Integer, ForeignKey("sites.id"))
+    site_id = Column(Integer, ForeignKey("sites.id"), index=True)
     device_type = Column(String(50), nullable=False)
     vendor = Column(String(50), default="Cisco")
     model = Column(String(100))
     os_version = Column(String(100))
     snmp_version = Column(String(10))
     snmp_community = Column(String(100))
+    poll_interval = Column(Integer, nullable=True)  # seconds; NULL = SNMP_POLL_INTERVAL
     status = Column(String(20), default="unknown")
     last_seen = Column(TIMESTAMP)
     ssh_enabled = Column(Boolean, default=False)
@@ -50,6 +54,8 @@ class Device(Base):
 # -------------------------------------------------
 class Interface(Base):
     __tablename__ = "interfaces"
+    # natural key: the poller upserts on it (ON CONFLICT)
+    __table_args__ = (UniqueConstraint("device_id", "interface_name", name="uq_interfaces_device_name"),)
     id = Column(Integer, primary_key=True, index=True)
     device_id = Column(Integer, ForeignKey("devices.id"))
     interface_name = Column(String(100))
@@ -68,16 +74,66 @@ class Interface(Base):
 # -------------------------------------------------
 # Interface Statistics
 # -------------------------------------------------
+# Range-partitioned by day on timestamp (see utils/partitions.py); the partition
+# key has to be part of the primary key.
 class InterfaceStats(Base):
     __tablename__ = "interface_stats"
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
     interface_id = Column(Integer, ForeignKey("interfaces.id"))
-    timestamp = Column(TIMESTAMP, default=datetime.utcnow)
+    timestamp = Column(TIMESTAMP, primary_key=True, default=datetime.utcnow)
     in_bps = Column(BigInteger)
     out_bps = Column(BigInteger)
 
     interface = relationship("Interface", back_populates="stats")
 
+    __table_args__ = (
+        Index("ix_interface_stats_interface_id_timestamp", "interface_id", "timestamp"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+
+
+# -------------------------------------------------
+# Interface Statistics rollups (see utils/rollups.py)
+# -------------------------------------------------
+class InterfaceStatsRollupMixin:
+    """
+    One row per interface per bucket: sample count and min/avg/max/p95 of in/out bps.
+    *_hist hold the bucket's log histogram as [bin, count, bin, count, ...] so
+    coarser buckets can be merged from finer ones with an accurate p95.
+    Range-partitioned on bucket like interface_stats.
+    """
+    interface_id = Column(Integer, ForeignKey("interfaces.id"), primary_key=True)
+    bucket = Column(TIMESTAMP, primary_key=True)  # bucket start (UTC)
+    samples = Column(Integer, nullable=False)
+    in_min = Column(BigInteger)
+    in_avg = Column(Float)
+    in_max = Column(BigInteger)
+    in_p95 = Column(BigInteger)
+    in_hist = Column(ARRAY(Integer))
+    out_min = Column(BigInteger)
+    out_avg = Column(Float)
+    out_max = Column(BigInteger)
+    out_p95 = Column(BigInteger)
+    out_hist = Column(ARRAY(Integer))
+
+    __table_args__ = ({"postgresql_partition_by": "RANGE (bucket)"},)
+
+
+class InterfaceStats1m(InterfaceStatsRollupMixin, Base):
+    __tablename__ = "interface_stats_1m"
+
+
+class InterfaceStats5m(InterfaceStatsRollupMixin, Base):
+    __tablename__ = "interface_stats_5m"
+
+
+class InterfaceStats1h(InterfaceStatsRollupMixin, Base):
+    __tablename__ = "interface_stats_1h"
+
+
+class InterfaceStats1d(InterfaceStatsRollupMixin, Base):
+    __tablename__ = "interface_stats_1d"
+
 
 # -------------------------------------------------
 # Alerts
@@ -95,6 +151,13 @@ class Alert(Base):
     device = relationship("Device", back_populates="alerts")
     interface = relationship("Interface", back_populates="alerts")
 
+    # list filters (keyset pagination orders by id)
+    __table_args__ = (
+        Index("ix_alerts_timestamp", "timestamp"),
+        Index("ix_alerts_device_id_id", "device_id", "id"),
+        Index("ix_alerts_severity_id", "severity", "id"),
+    )
+
 
 # -------------------------------------------------
 # MAC Change Log (NEW)
@@ -112,6 +175,12 @@ class MacChangeLog(Base):
     device = relationship("Device", back_populates="mac_changes")
     interface = relationship("Interface", back_populates="mac_changes")
 
+    # list filters (keyset pagination orders by id)
+    __table_args__ = (
+        Index("ix_mac_change_logs_timestamp", "timestamp"),
+        Index("ix_mac_change_logs_device_id_id", "device_id", "id"),
+    )
+
 
 # -------------------------------------------------
 # Topology Links
@@ -121,6 +190,13 @@ class MacChangeLog(Base):
 # -------------------------------------------------
 class TopologyLink(Base):
     __tablename__ = "topology_links"
+    # one row per link end pair: LLDP refreshes upsert on it (ON CONFLICT); the
+    # constraint's index also serves lookups by source device, the other one by destination
+    __table_args__ = (
+        UniqueConstraint("src_device_id", "src_interface", "dst_device_id", "dst_interface",
+                         name="uq_topology_links_endpoints"),
+        Index("ix_topology_links_dst_device_id", "dst_device_id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     src_device_id = Column(Integer, ForeignKey("devices.id"))
     src_interface = Column(String(100))
@@ -0,0 +1,77 @@
+# backend/app/poller.py
+"""
+Standalone SNMP poller, decoupled from the API process.
+
+Run:
+    python -m app.poller --processes 4
+
+and start the API with in-process polling disabled:
+    ENABLE_INPROCESS_POLLER=0 API_WORKERS=4 uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers 4
+
+Live updates reach every API worker over Postgres LISTEN/NOTIFY (see utils/live_channel.py).
+"""
+import argparse
+import asyncio
+import logging
+import signal
+
+from .config import SNMP_POLL_INTERVAL, POLLER_PROCESSES
+from .database import init_db
+from .utils.poller_pool import PollerPool, run_shard, resolve_process_count
+from .utils.partitions import run_partition_maintenance
+
+log = logging.getLogger("POLLER")
+
+
+async def run(processes, interval):
+    # service managers stop the poller with SIGTERM: turn it into a cancellation so
+    # _run() stops the shard processes and run_shard() drains the write-behind buffer
+    task = asyncio.current_task()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+    except (NotImplementedError, AttributeError):
+        pass  # no signal handlers on this platform (Windows)
+    try:
+        await _run(processes, interval)
+    except asyncio.CancelledError:
+        log.info("Poller stopped")
+
+
+async def _run(processes, interval):
+    await init_db()
+    # interface_stats partitions ahead / retention, for every shard's samples
+    asyncio.create_task(run_partition_maintenance())
+    processes = resolve_process_count(processes)
+    if processes == 1:
+        log.info("Polling in a single process")
+        await run_shard(0, 1, interval)
+        return
+
+    pool = PollerPool(processes, interval=interval)
+    pool.start()
+    try:
+        await pool.supervise()
+    finally:
+        await pool.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NMS SNMP/LLDP poller")
+    parser.add_argument(
+        "--processes", type=int, default=POLLER_PROCESSES,
+        help="worker processes to shard devices across (0 = one per CPU core)",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=SNMP_POLL_INTERVAL,
+        help="default poll interval in seconds for devices without their own",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    try:
+        asyncio.run(run(args.processes, args.interval))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
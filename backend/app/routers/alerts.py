@@ -1,13 +1,16 @@
 # backend/app/routers/alerts.py
 
-from typing import AsyncGenerator, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import AsyncGenerator, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.config import PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT
 from app.database import async_session
-from app.models import Alert as AlertModel
+from app.models import Alert as AlertModel, Device
 from app.schemas import Alert as AlertSchema, AlertBase
+from app.utils.pagination import keyset_page, set_next_cursor
 
 router = APIRouter()
 
@@ -27,11 +30,36 @@ async def create_alert(alert: AlertBase, session: AsyncSession = Depends(get_ses
     return new_alert
 
 
-# --- Get all alerts ---
+def filter_alerts(stmt, start=None, end=None, severity=None, site_id=None, device_id=None):
+    if start is not None:
+        stmt = stmt.where(AlertModel.timestamp >= start)
+    if end is not None:
+        stmt = stmt.where(AlertModel.timestamp < end)
+    if severity is not None:
+        stmt = stmt.where(AlertModel.severity == severity)
+    if device_id is not None:
+        stmt = stmt.where(AlertModel.device_id == device_id)
+    if site_id is not None:
+        stmt = stmt.join(Device, Device.id == AlertModel.device_id).where(Device.site_id == site_id)
+    return stmt
+
+
+# --- Get all alerts (newest first, one page at a time: pass X-Next-Cursor back as cursor) ---
 @router.get("/", response_model=List[AlertSchema])
-async def get_alerts(session: AsyncSession = Depends(get_session)):
-    result = await session.execute(select(AlertModel))
-    alerts = result.scalars().all()
+async def get_alerts(
+    response: Response,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    severity: Optional[str] = None,
+    site_id: Optional[int] = None,
+    device_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    session: AsyncSession = Depends(get_session),
+):
+    stmt = filter_alerts(select(AlertModel), start, end, severity, site_id, device_id)
+    alerts, next_cursor = await keyset_page(session, stmt, AlertModel.id, cursor, limit, descending=True)
+    set_next_cursor(response, next_cursor)
     return alerts
 
 
@@ -57,9 +85,19 @@ async def delete_alert(alert_id: int, session: AsyncSession = Depends(get_sessio
     return None
 
 
-# --- Get alerts for a specific device ---
+# --- Get alerts for a specific device (newest first, paginated like /alerts/) ---
 @router.get("/device/{device_id}", response_model=List[AlertSchema])
-async def get_device_alerts(device_id: int, session: AsyncSession = Depends(get_session)):
-    result = await session.execute(select(AlertModel).where(AlertModel.device_id == device_id))
-    alerts = result.scalars().all()
+async def get_device_alerts(
+    device_id: int,
+    response: Response,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    severity: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    session: AsyncSession = Depends(get_session),
+):
+    stmt = filter_alerts(select(AlertModel), start, end, severity, device_id=device_id)
+    alerts, next_cursor = await keyset_page(session, stmt, AlertModel.id, cursor, limit, descending=True)
+    set_next_cursor(response, next_cursor)
     return alerts
@@ -1,12 +1,18 @@
 # backend/app/routers/devices.py
 
-from typing import AsyncGenerator, List
-from fastapi import APIRouter, HTTPException, Depends
+from datetime import datetime
+from typing import AsyncGenerator, List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import async_session
-from ..models import Device as DeviceModel, Interface as InterfaceModel, InterfaceStats as InterfaceStatsModel
-from ..schemas import Device as DeviceSchema, DeviceCreate, Interface as InterfaceSchema, InterfaceStats as InterfaceStatsSchema
+from ..config import STATS_DEFAULT_POINTS, STATS_MAX_POINTS_PER_PAGE, PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT
+from ..models import Device as DeviceModel, Interface as InterfaceModel
+from ..schemas import Device as DeviceSchema, DeviceCreate, Interface as InterfaceSchema, InterfaceStatsPoint
+from ..utils.partitions import stats_window
+from ..utils.rollups import read_series, RESOLUTIONS
+from ..utils.live_channel import live_channel
+from ..utils.pagination import keyset_page, set_next_cursor, encode_series_cursor, decode_series_cursor
 
 router = APIRouter()
 
@@ -36,6 +42,7 @@ async def add_device(device: DeviceCreate, session: AsyncSession = Depends(get_s
         os_version=device.os_version,
         snmp_version=device.snmp_version,
         snmp_community=device.snmp_community,
+        poll_interval=device.poll_interval,
         ssh_enabled=device.ssh_enabled,
         ssh_username=device.ssh_username,
         ssh_password=device.ssh_password,
@@ -44,15 +51,40 @@ async def add_device(device: DeviceCreate, session: AsyncSession = Depends(get_s
     session.add(new_device)
     await session.commit()
     await session.refresh(new_device)
+    # live state and recent samples of every API worker follow device additions and removals
+    live_channel.publish({
+        "type": "device_added",
+        "device_id": new_device.id,
+        "hostname": new_device.hostname,
+        "ip": new_device.ip_address,
+        "site_id": new_device.site_id,
+        "device_type": new_device.device_type,
+        "status": new_device.status,
+    })
     return new_device
 
 # -----------------------------
-# List all devices
+# List devices, one page at a time (pass X-Next-Cursor back as cursor)
 # -----------------------------
 @router.get("/", response_model=List[DeviceSchema])
-async def list_devices(session: AsyncSession = Depends(get_session)):
-    query = await session.execute(select(DeviceModel))
-    devices = query.scalars().all()
+async def list_devices(
+    response: Response,
+    site_id: Optional[int] = None,
+    status: Optional[str] = None,
+    device_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    session: AsyncSession = Depends(get_session),
+):
+    stmt = select(DeviceModel)
+    if site_id is not None:
+        stmt = stmt.where(DeviceModel.site_id == site_id)
+    if status is not None:
+        stmt = stmt.where(DeviceModel.status == status)
+    if device_type is not None:
+        stmt = stmt.where(DeviceModel.device_type == device_type)
+    devices, next_cursor = await keyset_page(session, stmt, DeviceModel.id, cursor, limit)
+    set_next_cursor(response, next_cursor)
     return devices
 
 # -----------------------------
@@ -77,13 +109,20 @@ async def delete_device(device_id: int, session: AsyncSession = Depends(get_sess
         raise HTTPException(status_code=404, detail="Device not found")
     await session.delete(device)
     await session.commit()
+    live_channel.publish({"type": "device_removed", "device_id": device_id})
     return {"message": f"Device {device.hostname} deleted successfully"}
 
 # -----------------------------
 # Get interfaces for a device
 # -----------------------------
 @router.get("/{device_id}/interfaces", response_model=List[InterfaceSchema])
-async def get_device_interfaces(device_id: int, session: AsyncSession = Depends(get_session)):
+async def get_device_interfaces(
+    device_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    session: AsyncSession = Depends(get_session),
+):
     # Check if device exists
     query = await session.execute(select(DeviceModel).where(DeviceModel.id == device_id))
     device = query.scalars().first()
@@ -91,15 +130,33 @@ async def get_device_interfaces(device_id: int, session: AsyncSession = Depends(
         raise HTTPException(status_code=404, detail="Device not found")
     
     # Fetch interfaces for the device
-    query = await session.execute(select(InterfaceModel).where(InterfaceModel.device_id == device_id))
-    interfaces = query.scalars().all()
+    stmt = select(InterfaceModel).where(InterfaceModel.device_id == device_id)
+    interfaces, next_cursor = await keyset_page(session, stmt, InterfaceModel.id, cursor, limit)
+    set_next_cursor(response, next_cursor)
     return interfaces
 
 # -----------------------------
-# Get stats for a device
+# Get stats for a device (start/end default to the last STATS_DEFAULT_WINDOW_HOURS;
+# the resolution is picked so the range yields about `points` buckets per interface;
+# at most `limit` points per response, the rest through the X-Next-Cursor header)
 # -----------------------------
-@router.get("/{device_id}/stats", response_model=List[InterfaceStatsSchema])
-async def get_device_stats(device_id: int, session: AsyncSession = Depends(get_session)):
+@router.get("/{device_id}/stats", response_model=List[InterfaceStatsPoint])
+async def get_device_stats(
+    device_id: int,
+    response: Response,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    points: int = Query(STATS_DEFAULT_POINTS, ge=1, le=100_000),
+    cursor: Optional[str] = None,
+    limit: int = Query(STATS_MAX_POINTS_PER_PAGE, ge=1, le=STATS_MAX_POINTS_PER_PAGE),
+    session: AsyncSession = Depends(get_session),
+):
+    start, end = stats_window(start, end)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    # a cursor continues the previous page at the resolution that page was read at
+    resolution, after = decode_series_cursor(cursor, RESOLUTIONS) if cursor else (None, None)
+
     # Check if device exists
     query = await session.execute(select(DeviceModel).where(DeviceModel.id == device_id))
     device = query.scalars().first()
@@ -107,8 +164,10 @@ async def get_device_stats(device_id: int, session: AsyncSession = Depends(get_s
         raise HTTPException(status_code=404, detail="Device not found")
     
     # Fetch stats for all interfaces of this device
-    query = await session.execute(
-        select(InterfaceStatsModel).join(InterfaceModel).where(InterfaceModel.device_id == device_id)
+    interface_ids = select(InterfaceModel.id).where(InterfaceModel.device_id == device_id)
+    resolution, stats_list, next_after = await read_series(
+        session, interface_ids, start, end, points, limit=limit, after=after, resolution=resolution,
     )
-    stats_list = query.scalars().all()
+    if next_after is not None:
+        set_next_cursor(response, encode_series_cursor(resolution, next_after))
     return stats_list
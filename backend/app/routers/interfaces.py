@@ -1,13 +1,15 @@
 # backend/app/routers/interfaces.py
 
-from typing import AsyncGenerator, List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import AsyncGenerator, List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT
 from app.database import async_session
 from app.models import Device, Interface as InterfaceModel
 from app.schemas import Interface as InterfaceSchema
+from app.utils.pagination import keyset_page, set_next_cursor
 
 router = APIRouter()
 
@@ -17,9 +19,16 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
-# --- List all interfaces of a device ---
+# --- List the interfaces of a device, one page at a time (pass X-Next-Cursor back as cursor) ---
 @router.get("/device/{device_id}", response_model=List[InterfaceSchema])
-async def list_interfaces(device_id: int, session: AsyncSession = Depends(get_session)):
+async def list_interfaces(
+    device_id: int,
+    response: Response,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    session: AsyncSession = Depends(get_session),
+):
     # Check if device exists
     result = await session.execute(select(Device).where(Device.id == device_id))
     device = result.scalars().first()
@@ -27,8 +36,11 @@ async def list_interfaces(device_id: int, session: AsyncSession = Depends(get_se
         raise HTTPException(status_code=404, detail="Device not found")
 
     # Fetch interfaces for the device
-    result = await session.execute(select(InterfaceModel).where(InterfaceModel.device_id == device_id))
-    interfaces = result.scalars().all()
+    stmt = select(InterfaceModel).where(InterfaceModel.device_id == device_id)
+    if status is not None:
+        stmt = stmt.where(InterfaceModel.status == status)
+    interfaces, next_cursor = await keyset_page(session, stmt, InterfaceModel.id, cursor, limit)
+    set_next_cursor(response, next_cursor)
     return interfaces
 
 
@@ -1,13 +1,16 @@
 # backend/app/routers/mac_change.py
 
-from typing import AsyncGenerator, List
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import AsyncGenerator, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from ..config import PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT
 from ..database import async_session
 from ..models import MacChangeLog, Device
 from ..schemas import MacChangeLog as MacChangeLogSchema
+from ..utils.pagination import keyset_page, set_next_cursor
 
 router = APIRouter(prefix="/mac-change", tags=["MAC Change Logs"])
 
@@ -16,30 +19,59 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         yield session
 
+def filter_mac_changes(stmt, start=None, end=None, site_id=None, device_id=None):
+    if start is not None:
+        stmt = stmt.where(MacChangeLog.timestamp >= start)
+    if end is not None:
+        stmt = stmt.where(MacChangeLog.timestamp < end)
+    if device_id is not None:
+        stmt = stmt.where(MacChangeLog.device_id == device_id)
+    if site_id is not None:
+        stmt = stmt.join(Device, Device.id == MacChangeLog.device_id).where(Device.site_id == site_id)
+    return stmt
+
 # ---------------------------------------------------------
-# 1️⃣ Get all MAC change logs
+# 1️⃣ Get all MAC change logs (newest first; pass X-Next-Cursor back as cursor)
 # ---------------------------------------------------------
 @router.get("/", response_model=List[MacChangeLogSchema])
-async def get_all_mac_changes(session: AsyncSession = Depends(get_session)):
-    result = await session.execute(select(MacChangeLog))
-    logs = result.scalars().all()
+async def get_all_mac_changes(
+    response: Response,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    site_id: Optional[int] = None,
+    device_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    session: AsyncSession = Depends(get_session),
+):
+    stmt = filter_mac_changes(select(MacChangeLog), start, end, site_id, device_id)
+    logs, next_cursor = await keyset_page(session, stmt, MacChangeLog.id, cursor, limit, descending=True)
+    set_next_cursor(response, next_cursor)
     return logs
 
 # ---------------------------------------------------------
 # 2️⃣ Get MAC change logs for a specific device
 # ---------------------------------------------------------
 @router.get("/device/{device_id}", response_model=List[MacChangeLogSchema])
-async def get_mac_changes_by_device(device_id: int, session: AsyncSession = Depends(get_session)):
+async def get_mac_changes_by_device(
+    device_id: int,
+    response: Response,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    session: AsyncSession = Depends(get_session),
+):
     device_check = await session.execute(select(Device).where(Device.id == device_id))
     device = device_check.scalars().first()
 
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
 
-    result = await session.execute(
-        select(MacChangeLog).where(MacChangeLog.device_id == device_id)
-    )
-    return result.scalars().all()
+    stmt = filter_mac_changes(select(MacChangeLog), start, end, device_id=device_id)
+    logs, next_cursor = await keyset_page(session, stmt, MacChangeLog.id, cursor, limit, descending=True)
+    set_next_cursor(response, next_cursor)
+    return logs
 
 # ---------------------------------------------------------
 # 3️⃣ Add new MAC change log (called by SNMP/LLDP engine)
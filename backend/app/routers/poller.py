@@ -0,0 +1,78 @@
+# backend/app/routers/poller.py
+
+from fastapi import APIRouter, HTTPException, Request
+
+from app.schemas import PollerLimits
+from app.utils import snmp_engine
+from app.utils.poll_governor import governor
+from app.utils.live_channel import live_channel
+from app.utils.write_behind import write_behind
+from app.utils.recent_samples import recent_samples
+from app.utils.live_state import live_state
+from app.utils.live_fanout import live_fanout
+from app.config import ENABLE_INPROCESS_POLLER, API_WORKERS
+
+router = APIRouter()
+
+
+# --- Current polling load: concurrency usage and scheduler overruns ---
+@router.get("/status", response_model=dict)
+async def poller_status(request: Request):
+    status = _poller_status(request)
+    if API_WORKERS > 1:
+        # this worker's part in the multi-worker live push (only the producer polls)
+        status["live_fanout"] = live_fanout.stats()
+    return status
+
+
+def _poller_status(request: Request):
+    if not ENABLE_INPROCESS_POLLER:
+        # polling runs in the standalone poller; only the live update feed is visible here
+        return {
+            "mode": "standalone",
+            "live_channel": live_channel.stats(),
+            "recent_samples": recent_samples.stats(),
+            "live_state": live_state.stats(),
+        }
+
+    pool = getattr(request.app.state, "poller_pool", None)
+    if pool is not None:
+        # polling runs in worker processes; their schedulers and governors are not visible here
+        return {
+            "mode": "processes",
+            "pool": pool.status(),
+            "live_channel": live_channel.stats(),
+            "recent_samples": recent_samples.stats(),
+            "live_state": live_state.stats(),
+        }
+
+    scheduler = snmp_engine.scheduler
+    return {
+        "mode": "in-process",
+        "limits": governor.limits(),
+        "usage": governor.usage(),
+        "scheduler": scheduler.stats() if scheduler else None,
+        "write_behind": write_behind.stats(),
+        "recent_samples": recent_samples.stats(),
+        "live_state": live_state.stats(),
+    }
+
+
+# --- Current polling limits ---
+@router.get("/limits", response_model=PollerLimits)
+async def get_limits():
+    return governor.limits()
+
+
+# --- Change polling limits at runtime (omitted fields are left unchanged) ---
+@router.put("/limits", response_model=PollerLimits)
+async def update_limits(limits: PollerLimits, request: Request):
+    # only an in-process poller of a single API worker polls under this process's governor
+    if not ENABLE_INPROCESS_POLLER:
+        raise HTTPException(status_code=409, detail="Polling runs in the standalone poller and uses the POLL_* limits from config")
+    if getattr(request.app.state, "poller_pool", None) is not None:
+        raise HTTPException(status_code=409, detail="Polling runs in poller worker processes, which use the POLL_* limits from config")
+    if API_WORKERS > 1:
+        raise HTTPException(status_code=409, detail="Polling moves between API workers, which use the POLL_* limits from config")
+    governor.set_limits(**limits.dict())
+    return governor.limits()
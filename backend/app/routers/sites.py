@@ -1,10 +1,12 @@
-from typing import AsyncGenerator, List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import AsyncGenerator, List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from ..config import PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT
 from ..database import async_session
 from ..models import Site as SiteModel
 from ..schemas import Site as SiteSchema, SiteBase
+from ..utils.pagination import keyset_page, set_next_cursor
 
 router = APIRouter()
 
@@ -21,9 +23,15 @@ async def add_site(site: SiteBase, session: AsyncSession = Depends(get_session))
     return new_site
 
 @router.get("/", response_model=List[SiteSchema])
-async def list_sites(session: AsyncSession = Depends(get_session)):
-    query = await session.execute(select(SiteModel))
-    return query.scalars().all()
+async def list_sites(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    session: AsyncSession = Depends(get_session),
+):
+    sites, next_cursor = await keyset_page(session, select(SiteModel), SiteModel.id, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return sites
 
 @router.get("/{site_id}", response_model=SiteSchema)
 async def get_site(site_id: int, session: AsyncSession = Depends(get_session)):
@@ -1,13 +1,19 @@
 # backend/app/routers/stats.py
 
-from typing import AsyncGenerator, List
-from fastapi import APIRouter, HTTPException, Depends
+from datetime import datetime
+from typing import AsyncGenerator, List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import async_session
-from app.models import Device, Interface, InterfaceStats as InterfaceStatsModel
-from app.schemas import InterfaceStats as InterfaceStatsSchema
+from app.config import STATS_DEFAULT_POINTS, STATS_MAX_POINTS_PER_PAGE, RECENT_DEFAULT_SECONDS, RECENT_SAMPLES_CAPACITY, SNMP_POLL_INTERVAL
+from app.models import Device, Interface
+from app.schemas import InterfaceStatsBase, InterfaceStatsPoint
+from app.utils.partitions import stats_window
+from app.utils.rollups import read_series, RESOLUTIONS
+from app.utils.pagination import encode_series_cursor, decode_series_cursor, set_next_cursor
+from app.utils.recent_samples import recent_samples
 
 router = APIRouter()
 
@@ -18,9 +24,43 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+# --- Last few minutes of traffic, served from the in-memory ring buffer (no DB query) ---
+# Covers at most RECENT_SAMPLES_CAPACITY polls per interface; use /stats/device for longer ranges
+@router.get("/recent", response_model=List[InterfaceStatsBase])
+async def recent_stats(
+    device_id: Optional[int] = None,
+    interface_id: Optional[List[int]] = Query(None),
+    seconds: int = Query(RECENT_DEFAULT_SECONDS, ge=1, le=RECENT_SAMPLES_CAPACITY * SNMP_POLL_INTERVAL),
+):
+    if device_id is None and not interface_id:
+        raise HTTPException(status_code=400, detail="device_id or interface_id is required")
+    interface_ids = list(interface_id or [])
+    if device_id is not None:
+        interface_ids += recent_samples.interfaces_of(device_id)
+    return recent_samples.series(dict.fromkeys(interface_ids), seconds)
+
+
 # --- Get bandwidth stats for all interfaces of a device ---
-@router.get("/device/{device_id}", response_model=List[InterfaceStatsSchema])
-async def device_stats(device_id: int, session: AsyncSession = Depends(get_session)):
+# start/end (default: the last STATS_DEFAULT_WINDOW_HOURS) bound the scan to the matching partitions;
+# long ranges are served from the coarsest rollup that still yields `points` buckets per interface;
+# at most `limit` points per response, the rest through the X-Next-Cursor header
+@router.get("/device/{device_id}", response_model=List[InterfaceStatsPoint])
+async def device_stats(
+    device_id: int,
+    response: Response,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    points: int = Query(STATS_DEFAULT_POINTS, ge=1, le=100_000),
+    cursor: Optional[str] = None,
+    limit: int = Query(STATS_MAX_POINTS_PER_PAGE, ge=1, le=STATS_MAX_POINTS_PER_PAGE),
+    session: AsyncSession = Depends(get_session),
+):
+    start, end = stats_window(start, end)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    # a cursor continues the previous page at the resolution that page was read at
+    resolution, after = decode_series_cursor(cursor, RESOLUTIONS) if cursor else (None, None)
+
     # Check if device exists
     result = await session.execute(select(Device).where(Device.id == device_id))
     device = result.scalars().first()
@@ -28,19 +68,20 @@ async def device_stats(device_id: int, session: AsyncSession = Depends(get_sessi
         raise HTTPException(status_code=404, detail="Device not found")
 
     # Fetch stats for all interfaces of this device
-    result = await session.execute(
-        select(InterfaceStatsModel).join(Interface).where(Interface.device_id == device_id)
+    interface_ids = select(Interface.id).where(Interface.device_id == device_id)
+    resolution, stats_list, next_after = await read_series(
+        session, interface_ids, start, end, points, limit=limit, after=after, resolution=resolution,
     )
-    stats_list = result.scalars().all()
+    if next_after is not None:
+        set_next_cursor(response, encode_series_cursor(resolution, next_after))
 
     # Optional: Convert bps to kbps and Mbps (can also be done in frontend)
-    response = []
-    for stat in stats_list:
-        stat_dict = InterfaceStatsSchema.from_orm(stat).dict()
-        stat_dict["in_kbps"] = stat.in_bps / 1000 if stat.in_bps else 0
-        stat_dict["out_kbps"] = stat.out_bps / 1000 if stat.out_bps else 0
-        stat_dict["in_mbps"] = stat.in_bps / 1_000_000 if stat.in_bps else 0
-        stat_dict["out_mbps"] = stat.out_bps / 1_000_000 if stat.out_bps else 0
-        response.append(stat_dict)
-
-    return response
+    series = []
+    for stat_dict in stats_list:
+        stat_dict["in_kbps"] = stat_dict["in_bps"] / 1000 if stat_dict["in_bps"] else 0
+        stat_dict["out_kbps"] = stat_dict["out_bps"] / 1000 if stat_dict["out_bps"] else 0
+        stat_dict["in_mbps"] = stat_dict["in_bps"] / 1_000_000 if stat_dict["in_bps"] else 0
+        stat_dict["out_mbps"] = stat_dict["out_bps"] / 1_000_000 if stat_dict["out_bps"] else 0
+        series.append(stat_dict)
+
+    return series
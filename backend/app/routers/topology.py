@@ -1,14 +1,17 @@
 # backend/app/routers/topology.py
 
-from typing import AsyncGenerator, List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import AsyncGenerator, List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import or_
 
+from app.config import PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT
 from app.database import async_session
 from app.models import TopologyLink, Device
 from app.schemas import TopologyLink as TopologyLinkSchema
+from app.utils.pagination import keyset_page, set_next_cursor
+from app.utils.topology_graph import topology_snapshot, topology_graph
 
 router = APIRouter()
 
@@ -19,47 +22,105 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
-# --- List all topology links ---
-@router.get("/", response_model=List[TopologyLinkSchema])
-async def list_links(session: AsyncSession = Depends(get_session)):
-    query = await session.execute(select(TopologyLink))
-    links = query.scalars().all()
+# --- Whole topology as nodes + edges, served from the in-memory snapshot ---
+# Send the ETag back as If-None-Match: an unchanged graph answers 304 with no body
+@router.get("/graph")
+async def graph_snapshot(request: Request):
+    etag, body = await topology_snapshot.get()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in (t.strip() for t in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# --- Fewest-hop path between two devices ---
+@router.get("/path", response_model=dict)
+async def shortest_path(src: int, dst: int):
+    await topology_graph.ensure_loaded()
+    path = topology_graph.shortest_path(src, dst)
+    if path is None:
+        raise HTTPException(status_code=404, detail="No path between these devices")
+    return {"hops": len(path) - 1, "path": topology_graph.hostnames(path)}
+
+
+# --- Connected components (islands) of the topology, largest first ---
+@router.get("/components", response_model=dict)
+async def components(min_size: int = Query(1, ge=1)):
+    await topology_graph.ensure_loaded()
+    islands = [c for c in await topology_graph.components() if len(c) >= min_size]
+    return {"count": len(islands), "components": [{"size": len(c), "devices": c} for c in islands]}
+
+
+# --- Blast radius: devices cut off from the roots if a device and/or a whole site fails ---
+@router.get("/impact", response_model=dict)
+async def impact(
+    device_id: Optional[List[int]] = Query(None),
+    site_id: Optional[int] = None,
+    root: Optional[List[int]] = Query(None),
+):
+    if not device_id and site_id is None:
+        raise HTTPException(status_code=400, detail="device_id or site_id is required")
+    await topology_graph.ensure_loaded()
+    failed = set(device_id or [])
+    if site_id is not None:
+        failed |= topology_graph.sites.get(site_id, set())
+    impacted, roots = await topology_graph.impact(failed, root)
+    return {"failed": sorted(failed), "roots": roots, "count": len(impacted), "impacted": impacted}
+
+
+async def with_device_names(session, links):
+    """Link dicts with src/dst_device_name, resolving every hostname of the page in one query."""
+    device_ids = {link.src_device_id for link in links} | {link.dst_device_id for link in links}
+    device_ids.discard(None)
+    names = {}
+    if device_ids:
+        query = await session.execute(select(Device.id, Device.hostname).where(Device.id.in_(device_ids)))
+        names = dict(query.all())
     result = []
     for link in links:
-        src_device = await session.get(Device, link.src_device_id)
-        dst_device = await session.get(Device, link.dst_device_id)
         link_data = TopologyLinkSchema.from_orm(link).dict()
-        link_data["src_device_name"] = src_device.hostname if src_device else None
-        link_data["dst_device_name"] = dst_device.hostname if dst_device else None
+        link_data["src_device_name"] = names.get(link.src_device_id)
+        link_data["dst_device_name"] = names.get(link.dst_device_id)
         result.append(link_data)
     return result
 
 
-# --- Get topology links for a specific device ---
+def touching_device(stmt, device_id):
+    return stmt.where(or_(TopologyLink.src_device_id == device_id, TopologyLink.dst_device_id == device_id))
+
+
+# --- List topology links, one page at a time (pass X-Next-Cursor back as cursor) ---
+@router.get("/", response_model=List[TopologyLinkSchema])
+async def list_links(
+    response: Response,
+    device_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    session: AsyncSession = Depends(get_session),
+):
+    stmt = select(TopologyLink)
+    if device_id is not None:
+        stmt = touching_device(stmt, device_id)
+    links, next_cursor = await keyset_page(session, stmt, TopologyLink.id, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return await with_device_names(session, links)
+
+
+# --- Get topology links for a specific device (paginated like /topology/) ---
 @router.get("/device/{device_id}", response_model=List[TopologyLinkSchema])
-async def device_links(device_id: int, session: AsyncSession = Depends(get_session)):
+async def device_links(
+    device_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    session: AsyncSession = Depends(get_session),
+):
     device_result = await session.execute(select(Device).where(Device.id == device_id))
     device = device_result.scalars().first()
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
 
-    query = await session.execute(
-        select(TopologyLink).where(
-            or_(
-                TopologyLink.src_device_id == device_id,
-                TopologyLink.dst_device_id == device_id
-            )
-        )
-    )
-    links = query.scalars().all()
-
-    result = []
-    for link in links:
-        src_device = await session.get(Device, link.src_device_id)
-        dst_device = await session.get(Device, link.dst_device_id)
-        link_data = TopologyLinkSchema.from_orm(link).dict()
-        link_data["src_device_name"] = src_device.hostname if src_device else None
-        link_data["dst_device_name"] = dst_device.hostname if dst_device else None
-        result.append(link_data)
-
-    return result
+    stmt = touching_device(select(TopologyLink), device_id)
+    links, next_cursor = await keyset_page(session, stmt, TopologyLink.id, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return await with_device_names(session, links)
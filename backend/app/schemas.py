@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 # -----------------------------
@@ -32,6 +32,7 @@ class DeviceCreate(DeviceBase):
     site_id: Optional[int] = None
     snmp_version: Optional[str] = None
     snmp_community: Optional[str] = None
+    poll_interval: Optional[int] = None
     ssh_enabled: Optional[bool] = False
     ssh_username: Optional[str] = None
     ssh_password: Optional[str] = None
@@ -42,6 +43,7 @@ class Device(DeviceBase):
     site_id: Optional[int] = None
     status: Optional[str] = "unknown"
     last_seen: Optional[datetime] = None
+    poll_interval: Optional[int] = None
     ssh_enabled: bool
     ssh_username: Optional[str] = None
     ssh_port: int
@@ -85,6 +87,17 @@ class InterfaceStats(InterfaceStatsBase):
     class Config:
         orm_mode = True
 
+class InterfaceStatsPoint(InterfaceStatsBase):
+    # resolution: bucket length in seconds (0 = raw sample); in_bps/out_bps are bucket averages
+    resolution: int = 0
+    samples: int = 1
+    in_min: Optional[int] = None
+    in_max: Optional[int] = None
+    in_p95: Optional[int] = None
+    out_min: Optional[int] = None
+    out_max: Optional[int] = None
+    out_p95: Optional[int] = None
+
 # -----------------------------
 # --- Alerts ---
 # -----------------------------
@@ -159,3 +172,12 @@ class MacChangeLog(BaseModel):
 
     class Config:
         from_attributes = True  # For Pydantic V2
+
+# -----------------------------
+# --- Poller ---
+# -----------------------------
+class PollerLimits(BaseModel):
+    max_concurrent: Optional[int] = None  # 0 = unlimited
+    max_per_site: Optional[int] = None  # 0 = unlimited
+    site_limits: Optional[Dict[int, int]] = None  # per-site overrides of max_per_site
+    device_request_interval: Optional[float] = None  # seconds between requests to one device
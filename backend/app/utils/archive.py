@@ -0,0 +1,217 @@
+# backend/app/utils/archive.py
+import asyncio
+import logging
+import os
+import shutil
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from ..config import STATS_ARCHIVE_DIR, ARCHIVE_BATCH_ROWS
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency: without it nothing is archived or read back
+    pa = pc = pq = None
+
+log = logging.getLogger("ARCHIVE")
+
+COLUMNS = ["interface_id", "timestamp", "in_bps", "out_bps"]
+if pa is not None:
+    SCHEMA = pa.schema([
+        ("interface_id", pa.int32()),
+        ("timestamp", pa.timestamp("us")),
+        ("in_bps", pa.int64()),
+        ("out_bps", pa.int64()),
+    ])
+
+
+def archive_configured():
+    return bool(STATS_ARCHIVE_DIR)
+
+
+def archive_enabled():
+    return archive_configured() and pa is not None
+
+
+def day_dir(day, root=STATS_ARCHIVE_DIR):
+    return os.path.join(root, f"day={day:%Y-%m-%d}")
+
+
+def archived(day, root=STATS_ARCHIVE_DIR):
+    """Whether the day has been exported (its directory only appears once complete)."""
+    return os.path.isdir(day_dir(day, root))
+
+
+def device_file(day, device_id, root=STATS_ARCHIVE_DIR):
+    return os.path.join(day_dir(day, root), f"device={device_id}", "part-0.parquet")
+
+
+# --------------------------------------------------------------------------
+# Export (partition maintenance, before an expired partition is dropped)
+# --------------------------------------------------------------------------
+class _DayWriter:
+    """Writes rows ordered by (device_id, interface_id, timestamp) into one Parquet file per device."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.device_id = None
+        self.writer = None
+        self.rows = 0
+
+    def write(self, rows):
+        start = 0
+        for n in range(1, len(rows) + 1):
+            if n == len(rows) or rows[n][0] != rows[start][0]:
+                self._write_device(rows[start][0], rows[start:n])
+                start = n
+
+    def _write_device(self, device_id, rows):
+        if device_id != self.device_id:
+            self._close_writer()
+            path = os.path.join(self.directory, f"device={device_id}", "part-0.parquet")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.writer = pq.ParquetWriter(path, SCHEMA, compression="zstd")
+            self.device_id = device_id
+        _, interface_ids, timestamps, in_bps, out_bps = zip(*rows)
+        self.writer.write_table(pa.table([interface_ids, timestamps, in_bps, out_bps], schema=SCHEMA))
+        self.rows += len(rows)
+
+    def _close_writer(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def close(self):
+        self._close_writer()
+
+
+async def archive_partition(conn, partition, day, root=STATS_ARCHIVE_DIR):
+    """
+    Export one daily interface_stats partition to day=YYYY-MM-DD/device=N/part-0.parquet
+    (sorted by interface and time, one row group per ARCHIVE_BATCH_ROWS). The day is
+    written to a staging directory and renamed into place when complete, so readers
+    never see half a day; a day that already exists (its DROP did not commit last
+    time) is not exported again. Returns the number of rows written.
+    """
+    final = day_dir(day, root)
+    if archived(day, root):
+        return 0
+    staging = os.path.join(root, f".staging-{os.path.basename(final)}")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    writer = _DayWriter(staging)
+    try:
+        result = await conn.stream(text(
+            f"SELECT i.device_id, s.interface_id, s.timestamp, s.in_bps, s.out_bps FROM {partition} s "
+            f"JOIN interfaces i ON i.id = s.interface_id "
+            f"ORDER BY i.device_id, s.interface_id, s.timestamp"
+        ))
+        async for rows in result.partitions(ARCHIVE_BATCH_ROWS):
+            await asyncio.to_thread(writer.write, rows)
+    finally:
+        await asyncio.to_thread(writer.close)
+    os.replace(staging, final)
+    log.info(f"Archived {writer.rows} rows of {partition} to {final}")
+    return writer.rows
+
+
+# --------------------------------------------------------------------------
+# Historical reads (blocking: call through asyncio.to_thread)
+# --------------------------------------------------------------------------
+def read_archive(device_interfaces, start, end, resolution=0, after=None, limit=None, root=STATS_ARCHIVE_DIR):
+    """
+    Archived samples of {device_id: [interface_id, ...]} in [start, end), as the
+    point dicts of rollups.read_series(): raw samples for resolution 0, otherwise
+    min/avg/max/p95 per `resolution`-second bucket. Points are ordered by
+    (timestamp, interface_id); with `after` only those past that pair are returned,
+    with `limit` at most that many. Files are memory-mapped, only the needed columns,
+    row groups and interfaces are decoded, and days are read in order until the
+    limit is reached (buckets never span days).
+    """
+    if after is not None:
+        start = max(start, after[0])  # the cursor's own sample or bucket is the earliest still needed
+    points = []
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < end and (limit is None or len(points) < limit):
+        table = _read_day(device_interfaces, day, start, end, root)
+        if table is not None:
+            points.extend(_points(table, resolution, after, None if limit is None else limit - len(points)))
+        day += timedelta(days=1)
+    return points
+
+
+def _read_day(device_interfaces, day, start, end, root):
+    filters = [("timestamp", ">=", start), ("timestamp", "<", end)]
+    tables = []
+    for device_id, interface_ids in device_interfaces.items():
+        path = device_file(day, device_id, root)
+        if os.path.exists(path):
+            tables.append(pq.read_table(
+                path,
+                columns=COLUMNS,
+                filters=filters + [("interface_id", "in", list(interface_ids))],
+                memory_map=True,
+            ))
+    return pa.concat_tables(tables) if tables else None
+
+
+def _points(table, resolution, after, limit):
+    """Point dicts of one day's samples; the cursor, order and limit are applied before converting to Python."""
+    if resolution:
+        # buckets are aligned on the epoch, like the rollup tables
+        table = table.append_column("bucket", pc.floor_temporal(table["timestamp"], multiple=resolution, unit="second"))
+        p95 = pc.TDigestOptions(q=0.95)
+        table = table.group_by(["interface_id", "bucket"]).aggregate([
+            ("in_bps", "count"),
+            ("in_bps", "min"), ("in_bps", "mean"), ("in_bps", "max"), ("in_bps", "tdigest", p95),
+            ("out_bps", "min"), ("out_bps", "mean"), ("out_bps", "max"), ("out_bps", "tdigest", p95),
+        ])
+    time_column = "bucket" if resolution else "timestamp"
+    if after is not None:
+        ts, interface_id = after
+        table = table.filter(
+            (pc.field(time_column) > ts) | ((pc.field(time_column) == ts) & (pc.field("interface_id") > interface_id))
+        )
+    table = table.sort_by([(time_column, "ascending"), ("interface_id", "ascending")])
+    if limit is not None:
+        table = table.slice(0, limit)
+
+    if not resolution:
+        return [
+            {
+                "interface_id": row["interface_id"],
+                "timestamp": row["timestamp"],
+                "resolution": 0,
+                "samples": 1,
+                "in_bps": row["in_bps"],
+                "out_bps": row["out_bps"],
+                "in_min": row["in_bps"], "in_max": row["in_bps"], "in_p95": row["in_bps"],
+                "out_min": row["out_bps"], "out_max": row["out_bps"], "out_p95": row["out_bps"],
+            }
+            for row in table.to_pylist()
+        ]
+    return [
+        {
+            "interface_id": row["interface_id"],
+            "timestamp": row["bucket"],
+            "resolution": resolution,
+            "samples": row["in_bps_count"],
+            "in_bps": _int(row["in_bps_mean"]),
+            "out_bps": _int(row["out_bps_mean"]),
+            "in_min": row["in_bps_min"], "in_max": row["in_bps_max"], "in_p95": _int(_first(row["in_bps_tdigest"])),
+            "out_min": row["out_bps_min"], "out_max": row["out_bps_max"], "out_p95": _int(_first(row["out_bps_tdigest"])),
+        }
+        for row in table.to_pylist()
+    ]
+
+
+def _first(values):
+    return values[0] if values else None
+
+
+def _int(value):
+    return int(value) if value is not None and value == value else None  # NaN when a bucket has no values
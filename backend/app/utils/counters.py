@@ -0,0 +1,82 @@
+# backend/app/utils/counters.py
+import time
+
+COUNTER32_MAX = 2 ** 32
+COUNTER64_MAX = 2 ** 64
+
+
+# --------------------------------------------------------------------------
+# Per-interface counter state
+# --------------------------------------------------------------------------
+class CounterState:
+    __slots__ = ("in_octets", "out_octets", "timestamp", "uptime", "hc")
+
+    def __init__(self, in_octets, out_octets, timestamp, uptime, hc):
+        self.in_octets = in_octets
+        self.out_octets = out_octets
+        self.timestamp = timestamp
+        self.uptime = uptime
+        self.hc = hc
+
+
+def counter_delta(old, new, hc=False):
+    """
+    Delta between two readings of an SNMP counter.
+    A Counter32 that went backwards is assumed to have wrapped once; a Counter64
+    cannot realistically wrap between polls, so going backwards means it was reset.
+    """
+    if new >= old:
+        return new - old
+    if hc:
+        return None
+    return new + COUNTER32_MAX - old
+
+
+class CounterCache:
+    """
+    Last octet counters seen for every (device_id, ifIndex), used to turn absolute
+    ifInOctets/ifOutOctets (or ifHCInOctets/ifHCOutOctets) readings into bit rates
+    without reading previous samples back from the database.
+    """
+
+    def __init__(self):
+        self._state = {}
+
+    def __len__(self):
+        return len(self._state)
+
+    def update(self, device_id, if_index, in_octets, out_octets, timestamp=None, uptime=None, hc=False):
+        """
+        Record a new counter reading and return (in_bps, out_bps) since the previous one.
+        Returns None when no rate can be computed yet: first reading, 32/64-bit switch,
+        agent restart (sysUpTime went backwards) or a Counter64 reset.
+        `timestamp` is a time.monotonic() value, `uptime` is sysUpTime in centiseconds.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        key = (device_id, if_index)
+        prev = self._state.get(key)
+        self._state[key] = CounterState(in_octets, out_octets, timestamp, uptime, hc)
+
+        if prev is None or prev.hc != hc:
+            return None
+        if uptime is not None and prev.uptime is not None and uptime < prev.uptime:
+            # agent rebooted: counters restarted from zero
+            return None
+        elapsed = timestamp - prev.timestamp
+        if elapsed <= 0:
+            return None
+
+        in_delta = counter_delta(prev.in_octets, in_octets, hc)
+        out_delta = counter_delta(prev.out_octets, out_octets, hc)
+        if in_delta is None or out_delta is None:
+            return None
+        return int(in_delta * 8 / elapsed), int(out_delta * 8 / elapsed)
+
+    def forget_device(self, device_id):
+        for key in [k for k in self._state if k[0] == device_id]:
+            del self._state[key]
+
+
+# Shared by every poll of this process
+counter_cache = CounterCache()
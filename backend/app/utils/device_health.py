@@ -0,0 +1,93 @@
+# backend/app/utils/device_health.py
+import random
+import time
+
+from ..config import HEALTH_FAILURE_THRESHOLD, HEALTH_BACKOFF_BASE, HEALTH_BACKOFF_MAX
+
+
+# --------------------------------------------------------------------------
+# Per-device circuit breaker
+# --------------------------------------------------------------------------
+class DeviceHealth:
+    __slots__ = ("failures", "next_probe", "last_change")
+
+    def __init__(self):
+        self.failures = 0  # consecutive failed polls / probes
+        self.next_probe = None  # monotonic time of the next probe while the breaker is open
+        self.last_change = None
+
+    @property
+    def state(self):
+        if self.failures == 0:
+            return "up"
+        if self.next_probe is None:
+            return "suspect"
+        return "down"
+
+
+class HealthTracker:
+    """
+    Tracks consecutive SNMP failures per device. After `failure_threshold` failures
+    in a row the breaker opens: the device is no longer fully polled, only probed
+    with a single cheap GET on an exponentially backed-off schedule (with jitter),
+    until a probe answers again.
+    """
+
+    def __init__(self, failure_threshold=HEALTH_FAILURE_THRESHOLD, backoff_base=HEALTH_BACKOFF_BASE,
+                 backoff_max=HEALTH_BACKOFF_MAX):
+        self.failure_threshold = failure_threshold
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._devices = {}
+
+    def get(self, device_id):
+        health = self._devices.get(device_id)
+        if health is None:
+            health = self._devices[device_id] = DeviceHealth()
+        return health
+
+    def is_open(self, device_id):
+        health = self._devices.get(device_id)
+        return health is not None and health.next_probe is not None
+
+    def next_probe_at(self, device_id):
+        """Monotonic time of the next probe if the breaker is open, else None."""
+        health = self._devices.get(device_id)
+        return health.next_probe if health is not None else None
+
+    def record_success(self, device_id, now=None):
+        """Returns True when the device just recovered (was failing before)."""
+        health = self.get(device_id)
+        recovered = health.failures > 0
+        health.failures = 0
+        health.next_probe = None
+        if recovered:
+            health.last_change = now if now is not None else time.monotonic()
+        return recovered
+
+    def record_failure(self, device_id, now=None):
+        """Returns True on the first failure after success (the moment to mark the device down)."""
+        now = now if now is not None else time.monotonic()
+        health = self.get(device_id)
+        health.failures += 1
+        if health.failures >= self.failure_threshold:
+            exponent = health.failures - self.failure_threshold
+            backoff = min(self.backoff_base * (2 ** min(exponent, 16)), self.backoff_max)
+            health.next_probe = now + backoff * random.uniform(0.9, 1.1)
+        if health.failures == 1:
+            health.last_change = now
+            return True
+        return False
+
+    def forget(self, device_id):
+        self._devices.pop(device_id, None)
+
+    def summary(self):
+        states = {"up": 0, "suspect": 0, "down": 0}
+        for health in self._devices.values():
+            states[health.state] += 1
+        return states
+
+
+# Shared by the scheduler and poll_device of this process
+health_tracker = HealthTracker()
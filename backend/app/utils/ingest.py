@@ -0,0 +1,217 @@
+# backend/app/utils/ingest.py
+import logging
+
+from sqlalchemy import (
+    insert, select, update, bindparam, func, values, column, literal_column, Integer, String, TIMESTAMP,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from ..config import INGEST_INSERT_BATCH, INGEST_COPY_THRESHOLD
+from ..models import Device, Interface, InterfaceStats, TopologyLink
+
+log = logging.getLogger("INGEST")
+
+STATS_TABLE = InterfaceStats.__table__
+INTERFACES_TABLE = Interface.__table__
+DEVICES_TABLE = Device.__table__
+LINKS_TABLE = TopologyLink.__table__
+STATS_COLUMNS = ("interface_id", "timestamp", "in_bps", "out_bps")
+LINK_UPSERT_BATCH = 5000  # 6 bind parameters per link; asyncpg allows 32767 per statement
+
+
+# --------------------------------------------------------------------------
+# Interface samples
+# --------------------------------------------------------------------------
+async def _copy_records(session, records):
+    """COPY rows straight into interface_stats over the session's asyncpg connection."""
+    conn = await session.connection()
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        STATS_TABLE.name, records=records, columns=list(STATS_COLUMNS)
+    )
+
+
+async def insert_interface_stats(session, samples):
+    """
+    Write a batch of samples in as few round trips as possible, inside the session's
+    current transaction (the caller commits).
+    samples: iterable of (interface_id, timestamp, in_bps, out_bps) tuples.
+    Batches of INGEST_COPY_THRESHOLD rows or more go through asyncpg COPY; smaller
+    ones (or when COPY is unavailable) use multi-row INSERTs of INGEST_INSERT_BATCH rows.
+    No ORM objects are created. Returns the number of rows written.
+    """
+    records = [tuple(s) for s in samples]
+    if not records:
+        return 0
+
+    if len(records) >= INGEST_COPY_THRESHOLD:
+        try:
+            await _copy_records(session, records)
+            return len(records)
+        except (AttributeError, NotImplementedError) as e:
+            # not running on asyncpg: fall through to INSERT
+            log.debug(f"COPY unavailable, using multi-row INSERT: {e}")
+
+    for start in range(0, len(records), INGEST_INSERT_BATCH):
+        chunk = records[start:start + INGEST_INSERT_BATCH]
+        await session.execute(insert(STATS_TABLE).values([dict(zip(STATS_COLUMNS, r)) for r in chunk]))
+    return len(records)
+
+
+# --------------------------------------------------------------------------
+# Interface rows
+# --------------------------------------------------------------------------
+class InterfaceCache:
+    """
+    (device_id, interface_name) -> [id, status, mac_address, speed_bps] as last
+    written, so steady-state polls do not touch unchanged interface rows.
+    Callers must forget() devices whose transaction rolled back.
+    """
+
+    def __init__(self):
+        self._rows = {}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get(self, key):
+        return self._rows.get(key)
+
+    def set(self, key, values):
+        self._rows[key] = values
+
+    def forget(self, device_ids):
+        device_ids = set(device_ids)
+        for key in [k for k in self._rows if k[0] in device_ids]:
+            del self._rows[key]
+
+    def clear(self):
+        self._rows.clear()
+
+
+async def sync_interfaces(session, observed, cache=None):
+    """
+    Bring interface rows in line with one or more polls. Interfaces that are new
+    to `cache` or whose status, MAC or speed changed are written with a single
+    INSERT ... ON CONFLICT (device_id, interface_name) DO UPDATE ... RETURNING
+    (per INGEST_INSERT_BATCH rows); unchanged cached ones cost nothing.
+    observed: {(device_id, interface_name): {"status": str, "mac_address": str|None, "speed_bps": int|None}}
+    Returns {(device_id, interface_name): interface_id}.
+    """
+    cache = cache if cache is not None else InterfaceCache()
+    ids = {}
+    pending = []
+    for key, seen in observed.items():
+        cached = cache.get(key)
+        if cached is not None:
+            interface_id, status, old_mac, old_speed = cached
+            # like the ORM path: an empty MAC or unknown speed never overwrites a stored value
+            mac = seen.get("mac_address") or old_mac
+            speed = seen.get("speed_bps") if seen.get("speed_bps") is not None else old_speed
+            if (seen["status"], mac, speed) == (status, old_mac, old_speed):
+                ids[key] = interface_id
+                continue
+        pending.append({
+            "device_id": key[0],
+            "interface_name": key[1],
+            "status": seen["status"],
+            "mac_address": seen.get("mac_address"),
+            "speed_bps": seen.get("speed_bps"),
+        })
+
+    for start in range(0, len(pending), INGEST_INSERT_BATCH):
+        stmt = pg_insert(INTERFACES_TABLE).values(pending[start:start + INGEST_INSERT_BATCH])
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_interfaces_device_name",
+            set_={
+                "status": stmt.excluded.status,
+                "mac_address": func.coalesce(func.nullif(stmt.excluded.mac_address, ""), INTERFACES_TABLE.c.mac_address),
+                "speed_bps": func.coalesce(stmt.excluded.speed_bps, INTERFACES_TABLE.c.speed_bps),
+            },
+        ).returning(
+            INTERFACES_TABLE.c.id,
+            INTERFACES_TABLE.c.device_id,
+            INTERFACES_TABLE.c.interface_name,
+            INTERFACES_TABLE.c.status,
+            INTERFACES_TABLE.c.mac_address,
+            INTERFACES_TABLE.c.speed_bps,
+        )
+        for row in (await session.execute(stmt)).all():
+            key = (row.device_id, row.interface_name)
+            ids[key] = row.id
+            cache.set(key, [row.id, row.status, row.mac_address, row.speed_bps])
+    return ids
+
+
+# --------------------------------------------------------------------------
+# Device status
+# --------------------------------------------------------------------------
+async def update_device_status(session, statuses):
+    """statuses: [(device_id, status, last_seen), ...] applied in order with one executemany UPDATE."""
+    if not statuses:
+        return
+    await session.execute(
+        update(DEVICES_TABLE)
+        .where(DEVICES_TABLE.c.id == bindparam("_id"))
+        .values(status=bindparam("status"), last_seen=bindparam("last_seen")),
+        [{"_id": device_id, "status": status, "last_seen": last_seen} for device_id, status, last_seen in statuses],
+    )
+
+
+# --------------------------------------------------------------------------
+# LLDP links
+# --------------------------------------------------------------------------
+async def store_lldp_links(session, links):
+    """
+    links: [(device_id, local interface name, neighbor_ip, neighbor_iface, neighbor_name, seen_at), ...]
+    Creates or refreshes a TopologyLink for every neighbor whose IP is a known device,
+    in one INSERT ... SELECT ... ON CONFLICT per LINK_UPSERT_BATCH links: the neighbor
+    IPs are resolved to device ids inside the statement (a join on the unique
+    devices.ip_address), and links whose neighbor is not in the DB are skipped.
+    Returns (links written, [(src_device_id, dst_device_id) of each link created]):
+    only created links change the topology.
+    """
+    rows = {}
+    for device_id, name, neighbor_ip, neighbor_iface, neighbor_name, seen_at in links:
+        if neighbor_ip:
+            # the same link twice in one statement would make ON CONFLICT fail
+            rows[(device_id, name, neighbor_ip, neighbor_iface)] = (neighbor_name, seen_at)
+    rows = [key + value for key, value in rows.items()]
+
+    written = 0
+    created = []
+    for start in range(0, len(rows), LINK_UPSERT_BATCH):
+        chunk = rows[start:start + LINK_UPSERT_BATCH]
+        observed = values(
+            column("src_device_id", Integer),
+            column("src_interface", String),
+            column("neighbor_ip", String),
+            column("dst_interface", String),
+            column("dst_hostname", String),
+            column("last_seen", TIMESTAMP),
+            name="observed",
+        ).data(chunk)
+        stmt = pg_insert(LINKS_TABLE).from_select(
+            ["src_device_id", "src_interface", "dst_device_id", "dst_interface", "dst_hostname", "last_seen"],
+            select(
+                observed.c.src_device_id,
+                observed.c.src_interface,
+                DEVICES_TABLE.c.id,
+                observed.c.dst_interface,
+                observed.c.dst_hostname,
+                observed.c.last_seen,
+            ).join(DEVICES_TABLE, DEVICES_TABLE.c.ip_address == observed.c.neighbor_ip),
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_topology_links_endpoints",
+            set_={"last_seen": stmt.excluded.last_seen, "dst_hostname": stmt.excluded.dst_hostname},
+        ).returning(
+            LINKS_TABLE.c.src_device_id,
+            LINKS_TABLE.c.dst_device_id,
+            literal_column("xmax = 0").label("inserted"),  # xmax is 0 on freshly inserted rows
+        )
+        for src_device_id, dst_device_id, inserted in (await session.execute(stmt)).all():
+            written += 1
+            if inserted:
+                created.append((src_device_id, dst_device_id))
+    return written, created
@@ -0,0 +1,189 @@
+# backend/app/utils/live_channel.py
+import asyncio
+import itertools
+import json
+import logging
+
+import asyncpg
+
+from ..config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME, LIVE_CHANNEL_NAME, LIVE_CHANNEL_QUEUE
+
+log = logging.getLogger("LIVE_CHANNEL")
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more; larger events are sent in parts
+MAX_PAYLOAD = 7900
+CHUNK_CHARS = 3500  # a chunk is re-escaped inside the part envelope, so keep well under half
+
+
+def asyncpg_dsn():
+    return f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+
+# --------------------------------------------------------------------------
+# Poller -> API live update channel
+# --------------------------------------------------------------------------
+class LiveChannel:
+    """
+    Carries live poll events (device status, interface status and rates) from the
+    poller to the API process(es).
+
+    publish() always hands the event to local subscribers, which is all that is
+    needed when the API polls in-process. A standalone or multi-process poller also
+    calls start_publisher(), which forwards every event to Postgres NOTIFY on
+    LIVE_CHANNEL_NAME; API workers run listen() and see the same events through
+    their local subscribers. A process that both publishes and listens (API
+    workers of a multi-worker deployment) skips its own notifications.
+    """
+
+    def __init__(self, channel=LIVE_CHANNEL_NAME):
+        self.channel = channel
+        self._subscribers = []
+        self._outbox = None
+        self._sender = None
+        self._chunk_ids = itertools.count(1)
+        self._partials = {}  # (sender pid, chunk id) -> {part: data}
+        self._publisher_pid = None  # backend pid of our own NOTIFY connection
+        self.published = 0
+        self.dropped = 0
+        self.received = 0
+
+    # ------------------------------------------------------------------
+    # Local subscribers
+    # ------------------------------------------------------------------
+    def subscribe(self, callback):
+        """callback(event: dict) is called synchronously on the event loop for every event."""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        try:
+            self._subscribers.remove(callback)
+        except ValueError:
+            pass
+
+    def _dispatch(self, event):
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                log.exception(f"Live event subscriber failed: {e}")
+
+    def publish(self, event):
+        self.published += 1
+        self._dispatch(event)
+        if self._outbox is not None:
+            try:
+                self._outbox.put_nowait(event)
+            except asyncio.QueueFull:
+                # live updates are best effort: never let a slow DB stall polling
+                self.dropped += 1
+
+    # ------------------------------------------------------------------
+    # Publishing side (poller process)
+    # ------------------------------------------------------------------
+    def start_publisher(self):
+        if self._sender is None:
+            self._outbox = asyncio.Queue(maxsize=LIVE_CHANNEL_QUEUE)
+            self._sender = asyncio.create_task(self._send_loop())
+
+    async def stop_publisher(self):
+        if self._sender is not None:
+            self._sender.cancel()
+            try:
+                await self._sender
+            except asyncio.CancelledError:
+                pass
+            self._sender = None
+            self._outbox = None
+
+    def _encode(self, event):
+        data = json.dumps(event, default=str, separators=(",", ":"))
+        if len(data) <= MAX_PAYLOAD:
+            return [data]
+        chunk_id = next(self._chunk_ids)
+        pieces = [data[i:i + CHUNK_CHARS] for i in range(0, len(data), CHUNK_CHARS)]
+        return [
+            json.dumps({"_chunk": chunk_id, "_part": n, "_parts": len(pieces), "data": piece}, separators=(",", ":"))
+            for n, piece in enumerate(pieces)
+        ]
+
+    async def _send_loop(self):
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(asyncpg_dsn())
+                self._publisher_pid = conn.get_server_pid()
+                log.info(f"Publishing live updates on Postgres channel '{self.channel}'")
+                while True:
+                    event = await self._outbox.get()
+                    for payload in self._encode(event):
+                        await conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"Live channel publisher error: {e} - reconnecting")
+                await asyncio.sleep(2)
+            finally:
+                if conn is not None:
+                    await conn.close()
+
+    # ------------------------------------------------------------------
+    # Listening side (API process)
+    # ------------------------------------------------------------------
+    def _on_notify(self, connection, pid, channel, payload):
+        if pid == self._publisher_pid:
+            return  # published by this process: already dispatched locally
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            log.debug(f"Ignoring malformed live payload from pid {pid}")
+            return
+
+        if isinstance(message, dict) and "_chunk" in message:
+            key = (pid, message["_chunk"])
+            parts = self._partials.setdefault(key, {})
+            parts[message["_part"]] = message["data"]
+            if len(parts) < message["_parts"]:
+                if len(self._partials) > 1000:
+                    # a sender died mid-message; forget the oldest partial
+                    self._partials.pop(next(iter(self._partials)))
+                return
+            del self._partials[key]
+            try:
+                message = json.loads("".join(parts[n] for n in range(message["_parts"])))
+            except (KeyError, ValueError):
+                return
+
+        self.received += 1
+        self._dispatch(message)
+
+    async def listen(self):
+        """LISTEN on the channel forever (reconnecting as needed) and dispatch events locally."""
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(asyncpg_dsn())
+                await conn.add_listener(self.channel, self._on_notify)
+                log.info(f"Listening for live updates on Postgres channel '{self.channel}'")
+                while not conn.is_closed():
+                    await asyncio.sleep(5)
+                    await conn.execute("SELECT 1")  # surfaces a dead connection
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"Live channel listener error: {e} - reconnecting")
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(2)
+
+    def stats(self):
+        return {
+            "published": self.published,
+            "received": self.received,
+            "dropped": self.dropped,
+            "queued": self._outbox.qsize() if self._outbox is not None else 0,
+        }
+
+
+# One channel per process
+live_channel = LiveChannel()
@@ -0,0 +1,108 @@
+# backend/app/utils/live_fanout.py
+import asyncio
+import logging
+
+import asyncpg
+
+from ..config import LIVE_DELTA_CHANNEL_NAME, LIVE_ELECTION_INTERVAL
+from .live_channel import LiveChannel, asyncpg_dsn
+from .live_state import live_state
+
+log = logging.getLogger("LIVE_FANOUT")
+
+# pg_try_advisory_lock key held by the producer API worker (next to partitions.SCHEMA_LOCK_KEY)
+PRODUCER_LOCK_KEY = 0x4E4D5302
+
+
+# --------------------------------------------------------------------------
+# Live push across uvicorn workers
+# --------------------------------------------------------------------------
+class LiveFanout:
+    """
+    One producer, N relays. The API workers elect a producer by taking a
+    session-level Postgres advisory lock on a dedicated connection; it runs the
+    producer duties (in-process polling, partition maintenance) and its
+    LiveState turns poll events into deltas, which are published on the delta
+    channel. Every other worker LISTENs there, applies the deltas to its own
+    LiveState and so relays them to its own WebSocket clients: the database is
+    polled and the deltas computed once, however many workers serve sockets.
+
+    The lock goes away with the producer's connection, so a follower takes over
+    within `interval` seconds of the producer dying. A producer that loses its
+    connection stops its duties first, since another worker may already hold
+    the lock.
+    """
+
+    def __init__(self, state=live_state, channel=LIVE_DELTA_CHANNEL_NAME, interval=LIVE_ELECTION_INTERVAL):
+        self.state = state
+        self.channel = LiveChannel(channel)
+        self.interval = interval
+        self.producing = False
+        self.elections = 0
+
+    def _publish(self, delta):
+        """live_state subscriber: the producer's deltas go out to the other workers."""
+        if self.producing:
+            self.channel.publish(delta)
+
+    async def run(self, on_elected=None, on_demoted=None):
+        """
+        Follow the producer's deltas and take over as producer whenever the lock is
+        free, forever. on_elected() is called on promotion, on_demoted() awaited on
+        demotion.
+        """
+        self.state.producing = False
+        self.state.subscribe(self._publish)
+        self.channel.subscribe(self.state.apply_delta)
+        listener = asyncio.create_task(self.channel.listen())
+        try:
+            while True:
+                conn = None
+                try:
+                    conn = await asyncpg.connect(asyncpg_dsn())
+                    while not await conn.fetchval("SELECT pg_try_advisory_lock($1)", PRODUCER_LOCK_KEY):
+                        await asyncio.sleep(self.interval)
+                    self._promote(on_elected)
+                    while True:
+                        await asyncio.sleep(self.interval)
+                        await conn.execute("SELECT 1")  # surfaces a dead connection, and with it a lost lock
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    log.error(f"Live producer election error: {e} - reconnecting")
+                finally:
+                    if self.producing:
+                        await self._demote(on_demoted)
+                    if conn is not None and not conn.is_closed():
+                        await conn.close()
+                await asyncio.sleep(self.interval)
+        finally:
+            listener.cancel()
+
+    def _promote(self, on_elected):
+        self.producing = True
+        self.state.producing = True
+        self.elections += 1
+        self.channel.start_publisher()
+        log.warning("This API worker is now the live producer")
+        if on_elected is not None:
+            on_elected()
+
+    async def _demote(self, on_demoted):
+        self.producing = False
+        self.state.producing = False
+        log.warning("This API worker is no longer the live producer")
+        if on_demoted is not None:
+            await on_demoted()
+        await self.channel.stop_publisher()
+
+    def stats(self):
+        return {
+            "role": "producer" if self.producing else "follower",
+            "elections": self.elections,
+            "deltas": self.channel.stats(),
+        }
+
+
+# One fan-out per API worker (used when API_WORKERS > 1)
+live_fanout = LiveFanout()
@@ -0,0 +1,337 @@
+# backend/app/utils/live_state.py
+import asyncio
+import logging
+import secrets
+from collections import deque
+
+from sqlalchemy import select
+
+from ..config import LIVE_PUSH_INTERVAL, LIVE_REPLAY_ENTRIES
+from ..database import async_session
+from ..models import Device, Interface
+
+log = logging.getLogger("LIVE_STATE")
+
+
+def merge_deltas(deltas):
+    """
+    One delta equivalent to applying `deltas` in order (removed devices first,
+    then devices, then interfaces, like every delta): the latest value of each
+    field, a device removed and re-added kept as re-added. Carries the last seq.
+    """
+    devices, interfaces, removed = {}, {}, set()
+    for delta in deltas:
+        for device_id in delta["removed_devices"]:
+            devices.pop(device_id, None)
+            for interface_id in [i for i, entry in interfaces.items() if entry["device_id"] == device_id]:
+                del interfaces[interface_id]
+            removed.add(device_id)
+        for entry in delta["devices"]:
+            devices.setdefault(entry["device_id"], {}).update(entry)
+        for entry in delta["interfaces"]:
+            interfaces.setdefault(entry["interface_id"], {}).update(entry)
+    last = deltas[-1]
+    return {
+        "type": "delta",
+        "stream": last.get("stream"),
+        "seq": last.get("seq"),
+        "devices": list(devices.values()),
+        "interfaces": list(interfaces.values()),
+        "removed_devices": sorted(removed),
+    }
+
+
+# --------------------------------------------------------------------------
+# Current device/interface state and the changes not pushed yet (API process)
+# --------------------------------------------------------------------------
+class LiveState:
+    """
+    Status of every device and interface with the rates of its last poll. Loaded
+    once from the database (two queries), then kept current by live poll events
+    ("device_polled", "device_status") and device changes made through the
+    devices router.
+
+    Every change is also recorded in a pending delta holding only the fields that
+    changed; flush() hands it to the subscribers once per push interval. The
+    WebSocket layer sends snapshot() to a client when it connects and the deltas
+    from then on, without ever querying the database itself.
+
+    Deltas are numbered (`seq`) within a `stream`, a random id for this state's
+    history, and the recent ones are kept in a replay log so a reconnecting
+    client can be sent what it missed (missed()) instead of a snapshot.
+
+    With several API workers only the elected producer computes deltas
+    (`producing`); the others apply the producer's deltas with apply_delta()
+    (see live_fanout).
+    """
+
+    def __init__(self, interval=LIVE_PUSH_INTERVAL):
+        self.interval = interval
+        self.devices = {}  # device_id -> {"device_id", "hostname", "ip", "site_id", "status"}
+        self.interfaces = {}  # interface_id -> {"interface_id", "device_id", "name", "status", "speed_bps", "mac", "in_bps", "out_bps"}
+        self._device_interfaces = {}  # device_id -> {interface_id}
+        self._pending_devices = {}  # device_id -> changed fields
+        self._pending_interfaces = {}  # interface_id -> changed fields
+        self._pending_removed = set()
+        self._subscribers = []
+        self.loaded = False
+        self.producing = True  # False in follower API workers
+        self.version = 0  # bumped by every change (snapshot caches key on it)
+        self.stream = secrets.token_hex(6)
+        self.seq = 0  # of the last delta
+        self.replay = deque()  # recent deltas, oldest first
+        self.replay_entries = 0
+        self.max_replay_entries = LIVE_REPLAY_ENTRIES
+        self.events = 0
+        self.deltas = 0
+
+    # ------------------------------------------------------------------
+    # Subscribers (called synchronously with every delta)
+    # ------------------------------------------------------------------
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        try:
+            self._subscribers.remove(callback)
+        except ValueError:
+            pass
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    async def load(self):
+        """Seed devices and interfaces from the database; entries live events already created are newer and kept."""
+        async with async_session() as session:
+            q = await session.execute(
+                select(Device.id, Device.hostname, Device.ip_address, Device.site_id, Device.status)
+            )
+            devices = q.all()
+            q = await session.execute(
+                select(Interface.id, Interface.device_id, Interface.interface_name, Interface.status,
+                       Interface.speed_bps, Interface.mac_address)
+            )
+            interfaces = q.all()
+        for r in devices:
+            if r.id not in self.devices:
+                self.update_device(r.id, hostname=r.hostname, ip=r.ip_address, site_id=r.site_id, status=r.status)
+        for r in interfaces:
+            if r.id not in self.interfaces and r.device_id in self.devices:
+                self.update_interface(r.id, r.device_id, name=r.interface_name, status=r.status,
+                                      speed_bps=r.speed_bps, mac=r.mac_address)
+        self.loaded = True
+        log.info(f"Live state loaded: {len(self.devices)} devices, {len(self.interfaces)} interfaces")
+
+    def on_event(self, event):
+        """live_channel subscriber."""
+        if not self.producing:
+            return  # the producer's deltas carry the changes
+        kind = event.get("type")
+        if kind == "device_polled":
+            self.events += 1
+            device_id = event["device_id"]
+            self.update_device(device_id, hostname=event.get("hostname"), status=event.get("status", "up"))
+            for intf in event.get("interfaces", ()):
+                self.update_interface(
+                    intf["interface_id"], device_id,
+                    name=intf.get("name"), status=intf.get("status"), speed_bps=intf.get("speed_bps"),
+                    in_bps=intf.get("in_bps"), out_bps=intf.get("out_bps"),
+                )
+        elif kind == "device_status":
+            self.events += 1
+            self.update_device(event["device_id"], status=event.get("status"))
+        elif kind == "device_added":
+            self.update_device(event["device_id"], hostname=event.get("hostname"), ip=event.get("ip"),
+                               site_id=event.get("site_id"), status=event.get("status"))
+        elif kind == "device_removed":
+            self.remove_device(event["device_id"])
+
+    def apply_delta(self, delta):
+        """Delta channel subscriber (follower workers): apply the producer's delta and pass it on as is."""
+        if self.producing or delta.get("type") != "delta":
+            return
+        if delta.get("stream") != self.stream:
+            # first delta of this producer (or a new one that started from scratch): adopt its numbering
+            self.stream = delta.get("stream")
+            self._forget_replay()
+        elif delta.get("seq") != self.seq + 1:
+            # deltas lost while the listener reconnected: what is logged cannot be replayed across the gap
+            log.warning(f"Live deltas {self.seq + 1}..{delta.get('seq', 0) - 1} were not received")
+            self._forget_replay()
+        for device_id in delta.get("removed_devices", ()):
+            self.remove_device(device_id)
+        for entry in delta.get("devices", ()):
+            self.update_device(**entry)
+        for entry in delta.get("interfaces", ()):
+            self.update_interface(**entry)
+        # followers never flush: what was just recorded is this delta
+        self._pending_devices, self._pending_interfaces, self._pending_removed = {}, {}, set()
+        self.seq = delta.get("seq", self.seq)
+        self._remember(delta)
+        self.deltas += 1
+        self._dispatch(delta)
+
+    def update_device(self, device_id, **fields):
+        current = self.devices.get(device_id)
+        if current is None:
+            current = self.devices[device_id] = {"device_id": device_id, "hostname": None, "ip": None,
+                                                 "site_id": None, "status": None}
+            self._device_interfaces.setdefault(device_id, set())
+            self._pending_removed.discard(device_id)
+            # a new device is pushed whole
+            self._pending_devices.setdefault(device_id, {}).update(current)
+            self.version += 1
+        self._apply(current, self._pending_devices, device_id, fields)
+
+    def update_interface(self, interface_id, device_id, **fields):
+        current = self.interfaces.get(interface_id)
+        if current is None:
+            if device_id not in self.devices:
+                self.update_device(device_id)
+            current = self.interfaces[interface_id] = {
+                "interface_id": interface_id, "device_id": device_id, "name": None, "status": None,
+                "speed_bps": None, "mac": None, "in_bps": None, "out_bps": None,
+            }
+            self._device_interfaces[device_id].add(interface_id)
+            # a new interface is pushed whole
+            self._pending_interfaces.setdefault(interface_id, {}).update(current)
+            self.version += 1
+        self._apply(current, self._pending_interfaces, interface_id, fields)
+
+    def _apply(self, current, pending, key, fields):
+        # None never overwrites: no rate on the first poll of a counter, no MAC or speed reported
+        changes = {f: v for f, v in fields.items() if v is not None and current.get(f) != v}
+        if changes:
+            current.update(changes)
+            pending.setdefault(key, {}).update(changes)
+            self.version += 1
+
+    def remove_device(self, device_id):
+        self.devices.pop(device_id, None)
+        self._pending_devices.pop(device_id, None)
+        for interface_id in self._device_interfaces.pop(device_id, ()):
+            self.interfaces.pop(interface_id, None)
+            self._pending_interfaces.pop(interface_id, None)
+        self._pending_removed.add(device_id)
+        self.version += 1
+
+    # ------------------------------------------------------------------
+    # Push
+    # ------------------------------------------------------------------
+    def flush(self):
+        """Hand the changes since the last flush to the subscribers as one "delta" message (None if nothing changed)."""
+        if not (self._pending_devices or self._pending_interfaces or self._pending_removed):
+            return None
+        self.seq += 1
+        delta = {
+            "type": "delta",
+            "stream": self.stream,
+            "seq": self.seq,
+            "devices": [{"device_id": d, **changes} for d, changes in self._pending_devices.items()],
+            "interfaces": [
+                {"interface_id": i, "device_id": self.interfaces[i]["device_id"], **changes}
+                for i, changes in self._pending_interfaces.items()
+            ],
+            "removed_devices": sorted(self._pending_removed),
+        }
+        self._pending_devices, self._pending_interfaces, self._pending_removed = {}, {}, set()
+        self._remember(delta)
+        self.deltas += 1
+        self._dispatch(delta)
+        return delta
+
+    # ------------------------------------------------------------------
+    # Replay log
+    # ------------------------------------------------------------------
+    def _remember(self, delta):
+        self.replay.append(delta)
+        self.replay_entries += len(delta["devices"]) + len(delta["interfaces"]) + len(delta["removed_devices"])
+        while self.replay_entries > self.max_replay_entries and len(self.replay) > 1:
+            old = self.replay.popleft()
+            self.replay_entries -= len(old["devices"]) + len(old["interfaces"]) + len(old["removed_devices"])
+
+    def _forget_replay(self):
+        self.replay.clear()
+        self.replay_entries = 0
+
+    def missed(self, stream, since):
+        """
+        Deltas after seq `since` of `stream`, oldest first ([] when nothing was
+        missed), or None when they cannot be replayed: another stream, or older
+        than the replay log reaches.
+        """
+        if stream != self.stream or since is None or since > self.seq:
+            return None
+        if since == self.seq:
+            return []
+        if not self.replay or self.replay[0]["seq"] > since + 1:
+            return None
+        return [delta for delta in self.replay if delta["seq"] > since]
+
+    def _dispatch(self, delta):
+        for callback in list(self._subscribers):
+            try:
+                callback(delta)
+            except Exception as e:
+                log.exception(f"Live delta subscriber failed: {e}")
+
+    async def run(self):
+        """Load the state (retrying until the database answers), then flush every `interval` seconds forever (producer only)."""
+        while not self.loaded:
+            try:
+                await self.load()
+            except Exception as e:
+                log.error(f"Live state load failed: {e} - retrying")
+                await asyncio.sleep(5)
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.producing:
+                self.flush()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def site_of(self, device_id):
+        device = self.devices.get(device_id)
+        return device["site_id"] if device is not None else None
+
+    def device_of(self, interface_id):
+        interface = self.interfaces.get(interface_id)
+        return interface["device_id"] if interface is not None else None
+
+    def snapshot(self, wants_device=None, wants_interface=None):
+        """
+        Devices with their interfaces (sent to a WebSocket client when it connects),
+        optionally only those accepted by wants_device(device_id) and
+        wants_interface(interface_id, device_id).
+        """
+        data = []
+        for device_id in sorted(self.devices):
+            if wants_device is not None and not wants_device(device_id):
+                continue
+            device = dict(self.devices[device_id])
+            device["interfaces"] = [
+                dict(self.interfaces[i]) for i in sorted(self._device_interfaces.get(device_id, ()))
+                if wants_interface is None or wants_interface(i, device_id)
+            ]
+            data.append(device)
+        return data
+
+    def stats(self):
+        return {
+            "loaded": self.loaded,
+            "producing": self.producing,
+            "devices": len(self.devices),
+            "interfaces": len(self.interfaces),
+            "events": self.events,
+            "deltas": self.deltas,
+            "stream": self.stream,
+            "seq": self.seq,
+            "replay": {"deltas": len(self.replay), "entries": self.replay_entries,
+                       "oldest_seq": self.replay[0]["seq"] if self.replay else None},
+            "pending": len(self._pending_devices) + len(self._pending_interfaces) + len(self._pending_removed),
+        }
+
+
+# One state per API process
+live_state = LiveState()
@@ -0,0 +1,78 @@
+# backend/app/utils/pagination.py
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+
+from ..config import PAGE_DEFAULT_LIMIT
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+# --------------------------------------------------------------------------
+# Opaque cursors: urlsafe base64 of a small JSON object
+# --------------------------------------------------------------------------
+def encode_cursor(values):
+    data = json.dumps(values, separators=(",", ":"), default=lambda v: v.isoformat())
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, dict):
+            raise ValueError(cursor)
+        return values
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def cursor_time(values, key):
+    try:
+        return datetime.fromisoformat(values[key])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def set_next_cursor(response, next_cursor):
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+# --------------------------------------------------------------------------
+# Keyset pagination on a unique integer column
+# --------------------------------------------------------------------------
+async def keyset_page(session, stmt, key, cursor=None, limit=PAGE_DEFAULT_LIMIT, descending=False):
+    """
+    One page of the ORM select `stmt` ordered by the unique column `key` (e.g. Alert.id):
+    rows after the cursor's key are fetched with an indexed `key > :last` (or `<`)
+    instead of an OFFSET, so every page costs the same however deep it is.
+    Returns (rows, cursor of the next page or None on the last page).
+    """
+    if cursor is not None:
+        last = decode_cursor(cursor).get("k")
+        if not isinstance(last, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(key < last if descending else key > last)
+    stmt = stmt.order_by(key.desc() if descending else key).limit(limit + 1)
+    rows = (await session.execute(stmt)).scalars().all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor({"k": getattr(rows[-1], key.key)})
+
+
+# --------------------------------------------------------------------------
+# Time series pages (stats endpoints)
+# --------------------------------------------------------------------------
+def encode_series_cursor(resolution, after):
+    return encode_cursor({"r": resolution, "t": after[0], "i": after[1]})
+
+
+def decode_series_cursor(cursor, resolutions):
+    """-> (resolution, (timestamp, interface_id)) of the page the cursor continues."""
+    values = decode_cursor(cursor)
+    if values.get("r") not in resolutions or not isinstance(values.get("i"), int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values["r"], (cursor_time(values, "t"), values["i"])
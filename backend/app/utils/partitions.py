@@ -0,0 +1,273 @@
+# backend/app/utils/partitions.py
+import asyncio
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from ..config import (
+    STATS_RETENTION_DAYS, STATS_PARTITION_DAYS_AHEAD, PARTITION_MAINTENANCE_INTERVAL, STATS_DEFAULT_WINDOW_HOURS,
+    ROLLUP_RETENTION_DAYS,
+)
+from . import archive
+
+log = logging.getLogger("PARTITIONS")
+
+STATS_TABLE = "interface_stats"
+LEGACY_STATS_TABLE = "interface_stats_legacy"
+PARTITION_NAME = re.compile(r"^(.+)_p(\d{8})$")
+EPOCH = datetime(1970, 1, 1)
+
+# table -> (partition key column, days per partition, retention in days)
+PARTITIONED_TABLES = {
+    STATS_TABLE: ("timestamp", 1, STATS_RETENTION_DAYS),
+    "interface_stats_1m": ("bucket", 1, ROLLUP_RETENTION_DAYS["1m"]),
+    "interface_stats_5m": ("bucket", 1, ROLLUP_RETENTION_DAYS["5m"]),
+    "interface_stats_1h": ("bucket", 7, ROLLUP_RETENTION_DAYS["1h"]),
+    "interface_stats_1d": ("bucket", 30, ROLLUP_RETENTION_DAYS["1d"]),
+}
+# pg_advisory_xact_lock key serializing schema/partition changes across API and poller processes
+SCHEMA_LOCK_KEY = 0x4E4D5301
+# pg_try_advisory_xact_lock key held while one process exports an expired partition to Parquet
+ARCHIVE_LOCK_KEY = 0x4E4D5303
+
+
+def partition_name(day, table=STATS_TABLE):
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def default_partition_name(table=STATS_TABLE):
+    """Catch-all partition for rows outside every date range (clock skew, missing partitions)."""
+    return f"{table}_default"
+
+
+def partition_start(day, span_days=1):
+    """Start of the span_days-long partition containing `day` (spans are aligned on 1970-01-01)."""
+    day = day.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day - timedelta(days=(day - EPOCH).days % span_days)
+
+
+async def lock_schema(conn):
+    """Held until the transaction ends; concurrent CREATE ... PARTITION OF statements would conflict."""
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+
+
+def utc_today():
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def stats_window(start=None, end=None):
+    """
+    Time bounds for an interface_stats query. Queries must always filter on
+    timestamp so Postgres only scans the partitions of the requested days:
+    end defaults to now, start to STATS_DEFAULT_WINDOW_HOURS before end.
+    Timezone-aware values are converted to naive UTC, the column's convention.
+    """
+    end = _naive_utc(end) if end is not None else datetime.utcnow()
+    start = _naive_utc(start) if start is not None else end - timedelta(hours=STATS_DEFAULT_WINDOW_HOURS)
+    return start, end
+
+
+def _naive_utc(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+# --------------------------------------------------------------------------
+# Partition management (run on an AsyncConnection inside a transaction)
+# --------------------------------------------------------------------------
+async def list_partitions(conn, table=STATS_TABLE):
+    """{start day (datetime): partition name} for the date-named partitions of `table`."""
+    q = await conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table"
+    ), {"table": table})
+    partitions = {}
+    for (name,) in q.all():
+        match = PARTITION_NAME.match(name)
+        if match and match.group(1) == table:
+            partitions[datetime.strptime(match.group(2), "%Y%m%d")] = name
+    return partitions
+
+
+async def ensure_partitions(conn, table=STATS_TABLE, start=None, days_ahead=STATS_PARTITION_DAYS_AHEAD):
+    """
+    Create the partitions of `table` from `start` (default today, UTC) through
+    today + days_ahead, and its DEFAULT partition, so a row outside every range
+    is stored instead of failing the whole batch (write-behind COPY) it came in.
+    """
+    span_days = PARTITIONED_TABLES[table][1]
+    await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {default_partition_name(table)} PARTITION OF {table} DEFAULT"))
+    day = partition_start(start or utc_today(), span_days)
+    last = utc_today() + timedelta(days=days_ahead)
+    existing = await list_partitions(conn, table)
+    created = 0
+    while day <= last:
+        if day not in existing:
+            await create_partition(conn, table, day, day + timedelta(days=span_days))
+            created += 1
+        day += timedelta(days=span_days)
+    if created:
+        log.info(f"Created {created} {table} partitions (through {last:%Y-%m-%d})")
+    return created
+
+
+async def create_partition(conn, table, start, end):
+    """
+    Create the [start, end) partition of `table`. Rows of that range already in the
+    DEFAULT partition would make CREATE ... PARTITION OF fail, so in that case the
+    partition is built as a plain table, the rows are moved into it and it is attached.
+    """
+    key = PARTITIONED_TABLES[table][0]
+    name, default = partition_name(start, table), default_partition_name(table)
+    bounds = f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    in_range = f"{key} >= :start AND {key} < :end"
+    q = await conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})"),
+                           {"start": start, "end": end})
+    if not q.scalar():
+        await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} {bounds}"))
+        return
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+    result = await conn.execute(text(
+        f"WITH moved AS (DELETE FROM {default} WHERE {in_range} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), {"start": start, "end": end})
+    await conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {bounds}"))
+    log.warning(f"Moved {result.rowcount} rows from {default} into the new partition {name}")
+
+
+def expired(partitions, table=STATS_TABLE):
+    """(day, name) of the partitions, from list_partitions(), entirely past the retention of `table`, oldest first."""
+    _, span_days, retention_days = PARTITIONED_TABLES[table]
+    cutoff = utc_today() - timedelta(days=retention_days)
+    return [(day, name) for day, name in sorted(partitions.items()) if day + timedelta(days=span_days) <= cutoff]
+
+
+async def drop_expired_partitions(conn, table=STATS_TABLE):
+    """
+    Enforce retention by dropping whole partitions: no row-by-row DELETE, no vacuum debt.
+    With STATS_ARCHIVE_DIR set, a raw interface_stats partition is only dropped once
+    archive_expired_partitions() has exported it to Parquet. Expired rows in the
+    DEFAULT partition are deleted.
+    """
+    key, _, retention_days = PARTITIONED_TABLES[table]
+    archiving = table == STATS_TABLE and archive.archive_configured()
+    if archiving and not archive.archive_enabled():
+        log.error("STATS_ARCHIVE_DIR is set but pyarrow is not installed - keeping expired partitions")
+        return []
+    dropped = []
+    for day, name in expired(await list_partitions(conn, table), table):
+        if archiving and not archive.archived(day):
+            continue  # exported by the next archive_expired_partitions() run
+        await conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+        dropped.append(name)
+    if dropped:
+        log.info(f"Dropped {len(dropped)} expired {table} partitions ({dropped[0]} .. {dropped[-1]})")
+    result = await conn.execute(text(f"DELETE FROM {default_partition_name(table)} WHERE {key} < :cutoff"),
+                                {"cutoff": utc_today() - timedelta(days=retention_days)})
+    if result.rowcount:
+        log.warning(f"Deleted {result.rowcount} expired rows from {default_partition_name(table)}")
+    return dropped
+
+
+async def archive_expired_partitions(engine):
+    """
+    Export the expired interface_stats partitions that are not archived yet, each in
+    its own transaction and without the schema lock: an export can take minutes and
+    must not hold up partition creation, retention or startup in other processes.
+    One process exports at a time (ARCHIVE_LOCK_KEY); the others leave it to that one.
+    Returns the number of partitions exported.
+    """
+    if not archive.archive_enabled():
+        return 0
+    async with engine.begin() as conn:
+        pending = [(day, name) for day, name in expired(await list_partitions(conn)) if not archive.archived(day)]
+    exported = 0
+    for day, name in pending:
+        async with engine.begin() as conn:
+            q = await conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ARCHIVE_LOCK_KEY})
+            if not q.scalar():
+                break
+            # a partition is only dropped once its day is archived, so it still exists here
+            await archive.archive_partition(conn, name, day)
+            exported += 1
+    return exported
+
+
+async def maintain_all(conn):
+    for table in PARTITIONED_TABLES:
+        await ensure_partitions(conn, table)
+        await drop_expired_partitions(conn, table)
+
+
+# --------------------------------------------------------------------------
+# One-time migration of the original unpartitioned table
+# --------------------------------------------------------------------------
+async def retire_legacy_stats_table(conn):
+    """
+    If interface_stats is still the original plain table, rename it (with its
+    sequence and indexes) out of the way so create_all() builds the partitioned
+    one. Returns True when there is legacy data to import afterwards.
+    """
+    q = await conn.execute(text(
+        "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relname = :table AND n.nspname = current_schema()"
+    ), {"table": STATS_TABLE})
+    relkind = q.scalar()
+    if relkind != "r":
+        return False  # already partitioned ('p') or not created yet
+
+    log.warning(f"Converting {STATS_TABLE} to a partitioned table")
+    for statement in (
+        f"ALTER TABLE {STATS_TABLE} RENAME TO {LEGACY_STATS_TABLE}",
+        f"ALTER SEQUENCE IF EXISTS {STATS_TABLE}_id_seq RENAME TO {LEGACY_STATS_TABLE}_id_seq",
+        f"ALTER INDEX IF EXISTS {STATS_TABLE}_pkey RENAME TO {LEGACY_STATS_TABLE}_pkey",
+        f"ALTER INDEX IF EXISTS ix_{STATS_TABLE}_id RENAME TO ix_{LEGACY_STATS_TABLE}_id",
+    ):
+        await conn.execute(text(statement))
+    return True
+
+
+async def import_legacy_stats(conn, retention_days=STATS_RETENTION_DAYS):
+    """Copy the legacy rows still inside the retention window into the partitions, then drop the old table."""
+    cutoff = utc_today() - timedelta(days=retention_days)
+    q = await conn.execute(text(f"SELECT min(timestamp) FROM {LEGACY_STATS_TABLE} WHERE timestamp >= :cutoff"),
+                           {"cutoff": cutoff})
+    oldest = q.scalar()
+    if oldest is not None:
+        await ensure_partitions(conn, STATS_TABLE, start=oldest)
+        result = await conn.execute(text(
+            f"INSERT INTO {STATS_TABLE} (interface_id, timestamp, in_bps, out_bps) "
+            f"SELECT interface_id, timestamp, in_bps, out_bps FROM {LEGACY_STATS_TABLE} "
+            f"WHERE timestamp >= :cutoff AND timestamp < :horizon"
+        ), {"cutoff": cutoff, "horizon": utc_today() + timedelta(days=STATS_PARTITION_DAYS_AHEAD + 1)})
+        log.warning(f"Imported {result.rowcount} rows from {LEGACY_STATS_TABLE}")
+    await conn.execute(text(f"DROP TABLE {LEGACY_STATS_TABLE}"))
+
+
+# --------------------------------------------------------------------------
+# Background maintenance
+# --------------------------------------------------------------------------
+async def maintain_partitions(engine):
+    async with engine.begin() as conn:
+        await lock_schema(conn)
+        await maintain_all(conn)
+    # after the schema work, so a failing export never holds up partition creation;
+    # what it exports is dropped by the next run
+    await archive_expired_partitions(engine)
+
+
+async def run_partition_maintenance(interval=PARTITION_MAINTENANCE_INTERVAL):
+    """Keep partitions created ahead and expired ones dropped, forever."""
+    from ..database import engine  # database imports this module in init_db
+
+    while True:
+        try:
+            await maintain_partitions(engine)
+        except Exception as e:
+            log.exception(f"Partition maintenance failed: {e}")
+        await asyncio.sleep(interval)
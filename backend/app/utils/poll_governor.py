@@ -0,0 +1,163 @@
+# backend/app/utils/poll_governor.py
+import asyncio
+import collections
+from contextlib import asynccontextmanager
+
+from ..config import POLL_MAX_CONCURRENT, POLL_MAX_PER_SITE, POLL_DEVICE_REQUEST_INTERVAL
+
+
+# --------------------------------------------------------------------------
+# Resizable FIFO limiter
+# --------------------------------------------------------------------------
+class Limiter:
+    """Counting limiter whose limit can change at runtime. limit=0/None means unlimited."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_use = 0
+        self._waiters = collections.deque()
+
+    @property
+    def waiting(self):
+        return sum(1 for fut in self._waiters if not fut.done())
+
+    def _has_room(self):
+        return not self.limit or self.in_use < self.limit
+
+    async def acquire(self):
+        if self._has_room() and not self._waiters:
+            self.in_use += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # slot was handed over just before the cancellation landed
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self):
+        self.in_use -= 1
+        self._wake()
+
+    def set_limit(self, limit):
+        self.limit = limit
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self._has_room():
+            fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            self.in_use += 1
+            fut.set_result(None)
+
+    def usage(self):
+        return {"limit": self.limit or None, "in_use": self.in_use, "waiting": self.waiting}
+
+
+# --------------------------------------------------------------------------
+# Polling governor
+# --------------------------------------------------------------------------
+class PollGovernor:
+    """
+    Caps how much polling runs at once:
+      - a global cap on devices being polled concurrently,
+      - a cap per site (Device.site_id), default `max_per_site`, overridable per site,
+      - a minimum gap between SNMP requests sent to the same device.
+    All limits can be changed at runtime with set_limits(); usage() reports current load.
+    """
+
+    def __init__(self, max_concurrent=POLL_MAX_CONCURRENT, max_per_site=POLL_MAX_PER_SITE,
+                 device_request_interval=POLL_DEVICE_REQUEST_INTERVAL):
+        self._global = Limiter(max_concurrent)
+        self.max_per_site = max_per_site
+        self.site_limits = {}  # site_id -> cap overriding max_per_site
+        self._sites = {}  # site_id -> Limiter
+        self.device_request_interval = device_request_interval
+        self._next_request = {}  # host -> earliest loop time for its next request
+        self.paced_requests = 0
+
+    def _site_limiter(self, site_id):
+        limiter = self._sites.get(site_id)
+        if limiter is None:
+            limiter = Limiter(self.site_limits.get(site_id, self.max_per_site))
+            self._sites[site_id] = limiter
+        return limiter
+
+    @asynccontextmanager
+    async def slot(self, device_info):
+        """Hold one global slot (and one slot of the device's site) for the duration of a poll."""
+        site_id = device_info.get("site_id")
+        site = self._site_limiter(site_id) if site_id is not None else None
+        # take the narrower site slot first so a blocked site does not pin global slots
+        if site is not None:
+            await site.acquire()
+        try:
+            await self._global.acquire()
+            try:
+                yield
+            finally:
+                self._global.release()
+        finally:
+            if site is not None:
+                site.release()
+
+    async def pace(self, host):
+        """Delay an SNMP request so requests to one device are at least device_request_interval apart."""
+        gap = self.device_request_interval
+        if not gap:
+            return
+        now = asyncio.get_running_loop().time()
+        next_at = self._next_request.get(host, 0.0)
+        if next_at > now:
+            self._next_request[host] = next_at + gap
+            self.paced_requests += 1
+            await asyncio.sleep(next_at - now)
+        else:
+            self._next_request[host] = now + gap
+
+    def set_limits(self, max_concurrent=None, max_per_site=None, site_limits=None, device_request_interval=None):
+        """Change limits at runtime. None leaves a setting unchanged; 0 removes a cap."""
+        if max_concurrent is not None:
+            self._global.set_limit(max_concurrent)
+        if max_per_site is not None:
+            self.max_per_site = max_per_site
+        if site_limits is not None:
+            self.site_limits.update(site_limits)
+        if max_per_site is not None or site_limits is not None:
+            for site_id, limiter in self._sites.items():
+                limiter.set_limit(self.site_limits.get(site_id, self.max_per_site))
+        if device_request_interval is not None:
+            self.device_request_interval = device_request_interval
+
+    def limits(self):
+        return {
+            "max_concurrent": self._global.limit or 0,
+            "max_per_site": self.max_per_site or 0,
+            "site_limits": dict(self.site_limits),
+            "device_request_interval": self.device_request_interval,
+        }
+
+    def usage(self):
+        return {
+            "global": self._global.usage(),
+            "sites": {
+                site_id: limiter.usage()
+                for site_id, limiter in self._sites.items()
+                if limiter.in_use or limiter.waiting
+            },
+            "device_request_interval": self.device_request_interval,
+            "paced_requests": self.paced_requests,
+        }
+
+
+# Shared by the scheduler and the SNMP transport of this process
+governor = PollGovernor()
@@ -0,0 +1,257 @@
+# backend/app/utils/poll_scheduler.py
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import zlib
+
+from sqlalchemy.future import select
+
+from ..config import SNMP_POLL_INTERVAL, POLL_JITTER, INVENTORY_REFRESH_INTERVAL
+from ..database import async_session
+from ..models import Device
+from .poll_governor import governor as default_governor
+from .device_health import health_tracker as default_health
+from .counters import counter_cache as default_counters
+
+log = logging.getLogger("POLL_SCHEDULER")
+
+
+def device_info_from_model(d):
+    """Plain dict handed to poll_device (avoids passing ORM instances between tasks)."""
+    return {
+        "id": d.id,
+        "hostname": d.hostname,
+        "ip_address": d.ip_address,
+        "site_id": d.site_id,
+        "snmp_community": d.snmp_community,
+        "snmp_version": d.snmp_version,
+        "poll_interval": d.poll_interval,
+    }
+
+
+def shard_for(device_id, shard_count):
+    """Stable device -> shard assignment (same answer in every process and across restarts)."""
+    if shard_count <= 1:
+        return 0
+    return zlib.crc32(str(device_id).encode()) % shard_count
+
+
+# --------------------------------------------------------------------------
+# Per-device schedule entry
+# --------------------------------------------------------------------------
+class ScheduledDevice:
+    __slots__ = ("info", "interval", "deadline", "due", "task", "polls", "skipped", "late", "last_duration")
+
+    def __init__(self, info, interval, deadline):
+        self.info = info
+        self.interval = interval
+        self.deadline = deadline  # nominal start time of the next cycle (no jitter)
+        self.due = None  # jittered time the heap entry fires at
+        self.task = None
+        self.polls = 0
+        self.skipped = 0  # cycles skipped because the previous poll was still running
+        self.late = 0  # cycles missed because the scheduler itself fell behind
+        self.last_duration = None
+
+    @property
+    def running(self):
+        return self.task is not None and not self.task.done()
+
+
+# --------------------------------------------------------------------------
+# Deadline scheduler
+# --------------------------------------------------------------------------
+class PollScheduler:
+    """
+    Heap of per-device deadlines. Every device is polled on its own fixed-rate
+    schedule (Device.poll_interval, or the default), with the first start spread
+    uniformly across one interval and each start jittered by +/- `jitter` of the
+    interval. A slow device only delays itself; a device whose previous poll is
+    still running when its next deadline arrives has that cycle skipped and
+    counted as an overrun instead of piling up.
+    With shard_count > 1 only the devices hashed to shard_index are scheduled.
+    """
+
+    def __init__(self, poll_device, default_interval=SNMP_POLL_INTERVAL, jitter=POLL_JITTER,
+                 refresh_interval=INVENTORY_REFRESH_INTERVAL, governor=default_governor, health=default_health,
+                 counters=default_counters, shard_index=0, shard_count=1):
+        self._poll_device = poll_device  # async fn(device_info)
+        self._governor = governor
+        self._health = health
+        self._counters = counters
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.default_interval = default_interval
+        self.jitter = jitter
+        self.refresh_interval = refresh_interval
+        self._devices = {}  # device_id -> ScheduledDevice
+        self._heap = []  # (due, seq, device_id)
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._loop = None
+        self._window_skipped = 0
+        self._window_late = 0
+
+    # ------------------------------------------------------------------
+    # Inventory
+    # ------------------------------------------------------------------
+    def interval_for(self, info):
+        interval = info.get("poll_interval") or self.default_interval
+        return max(float(interval), 1.0)
+
+    def set_inventory(self, device_infos):
+        """Add new devices, update changed ones and drop deleted ones."""
+        now = self._loop.time()
+        seen = set()
+        for info in device_infos:
+            device_id = info["id"]
+            seen.add(device_id)
+            interval = self.interval_for(info)
+            entry = self._devices.get(device_id)
+            if entry is None:
+                # spread first polls over one interval so the fleet does not start in lockstep
+                entry = ScheduledDevice(info, interval, now + random.uniform(0, interval))
+                self._devices[device_id] = entry
+                self._push(entry)
+                continue
+            entry.info = info
+            if interval != entry.interval:
+                entry.interval = interval
+                entry.deadline = min(entry.deadline, now + interval)
+                self._push(entry)
+
+        for device_id in [d for d in self._devices if d not in seen]:
+            # heap entries for removed devices are discarded when they surface
+            del self._devices[device_id]
+            self._health.forget(device_id)
+            self._counters.forget_device(device_id)
+        self._wake.set()
+
+    async def refresh_inventory(self):
+        async with async_session() as session:
+            q = await session.execute(select(Device))
+            devices = q.scalars().all()
+        self.set_inventory([
+            device_info_from_model(d) for d in devices
+            if shard_for(d.id, self.shard_count) == self.shard_index
+        ])
+
+    # ------------------------------------------------------------------
+    # Heap helpers
+    # ------------------------------------------------------------------
+    def _push(self, entry, jitter=True):
+        spread = entry.interval * self.jitter if jitter else 0.0
+        entry.due = entry.deadline + (random.uniform(-spread, spread) if spread else 0.0)
+        heapq.heappush(self._heap, (entry.due, next(self._seq), entry.info["id"]))
+
+    def _dispatch(self, entry, now):
+        probe_at = self._health.next_probe_at(entry.info["id"])
+        if probe_at is not None and probe_at > now:
+            # breaker open: nothing to do until the next backed-off probe (already jittered)
+            entry.deadline = probe_at
+            self._push(entry, jitter=False)
+            return
+
+        if entry.running:
+            entry.skipped += 1
+            self._window_skipped += 1
+            log.debug(f"Overrun: {entry.info.get('hostname') or entry.info['id']} still polling, cycle skipped")
+        else:
+            entry.task = asyncio.create_task(self._run_poll(entry))
+
+        # fixed-rate: advance the nominal deadline, skipping slots we are already past
+        entry.deadline += entry.interval
+        if entry.deadline <= now:
+            missed = int((now - entry.deadline) // entry.interval) + 1
+            entry.deadline += missed * entry.interval
+            entry.late += missed
+            self._window_late += missed
+        self._push(entry)
+
+    async def _run_poll(self, entry):
+        start = self._loop.time()
+        try:
+            # waits here while the global / per-site concurrency caps are full
+            async with self._governor.slot(entry.info):
+                await self._poll_device(entry.info)
+        except Exception as e:
+            log.exception(f"Poll of device {entry.info.get('id')} failed: {e}")
+        finally:
+            entry.polls += 1
+            entry.last_duration = self._loop.time() - start
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def stats(self):
+        overrunning = sorted(
+            (e for e in self._devices.values() if e.skipped or e.late),
+            key=lambda e: e.skipped + e.late,
+            reverse=True,
+        )
+        return {
+            "shard": f"{self.shard_index + 1}/{self.shard_count}",
+            "devices": len(self._devices),
+            "running": sum(1 for e in self._devices.values() if e.running),
+            "health": self._health.summary(),
+            "skipped_cycles": sum(e.skipped for e in self._devices.values()),
+            "late_cycles": sum(e.late for e in self._devices.values()),
+            "top_overruns": [
+                {
+                    "device_id": e.info["id"],
+                    "hostname": e.info.get("hostname"),
+                    "interval": e.interval,
+                    "last_duration": e.last_duration,
+                    "skipped_cycles": e.skipped,
+                    "late_cycles": e.late,
+                }
+                for e in overrunning[:10]
+            ],
+        }
+
+    def _report_window(self):
+        if self._window_skipped or self._window_late:
+            log.warning(
+                f"Poll overruns in the last {self.refresh_interval}s: "
+                f"{self._window_skipped} cycles skipped (device still polling), "
+                f"{self._window_late} cycles late (scheduler behind)"
+            )
+        self._window_skipped = 0
+        self._window_late = 0
+
+    # ------------------------------------------------------------------
+    # Main loop
+    # ------------------------------------------------------------------
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        await self.refresh_inventory()
+        log.info(f"Scheduling {len(self._devices)} devices (default interval {self.default_interval}s)")
+        next_refresh = self._loop.time() + self.refresh_interval
+
+        while True:
+            now = self._loop.time()
+            if now >= next_refresh:
+                try:
+                    await self.refresh_inventory()
+                except Exception as e:
+                    log.exception(f"Inventory refresh failed: {e}")
+                self._report_window()
+                next_refresh = now + self.refresh_interval
+                continue
+
+            if not self._heap or self._heap[0][0] > now:
+                wake_at = min(self._heap[0][0], next_refresh) if self._heap else next_refresh
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=max(wake_at - now, 0))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due, _, device_id = heapq.heappop(self._heap)
+            entry = self._devices.get(device_id)
+            if entry is None or entry.due != due:
+                continue  # device removed or rescheduled since this entry was pushed
+            self._dispatch(entry, now)
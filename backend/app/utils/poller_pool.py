@@ -0,0 +1,157 @@
+# backend/app/utils/poller_pool.py
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+
+from ..config import SNMP_POLL_INTERVAL, POLL_MAX_CONCURRENT, POLL_MAX_PER_SITE
+from . import snmp_engine
+from .poll_governor import governor
+from .snmp_transport import close_transport
+from .live_channel import live_channel
+from .write_behind import write_behind
+
+log = logging.getLogger("POLLER_POOL")
+
+
+def resolve_process_count(processes):
+    """0 (or less) means one poller process per CPU core."""
+    if processes is None or processes <= 0:
+        return os.cpu_count() or 1
+    return processes
+
+
+# --------------------------------------------------------------------------
+# Worker process
+# --------------------------------------------------------------------------
+async def run_shard(shard_index, shard_count, interval=SNMP_POLL_INTERVAL):
+    """
+    Poll one shard of the inventory forever, restarting the scheduler after errors.
+    Runs outside the API process, so live updates go out over Postgres NOTIFY.
+    """
+    live_channel.start_publisher()
+    # the configured caps are fleet-wide: give each shard its share
+    governor.set_limits(
+        max_concurrent=-(-POLL_MAX_CONCURRENT // shard_count) if POLL_MAX_CONCURRENT else 0,
+        max_per_site=-(-POLL_MAX_PER_SITE // shard_count) if POLL_MAX_PER_SITE else 0,
+    )
+    try:
+        while True:
+            try:
+                await snmp_engine.poll_all_devices(interval, shard_index, shard_count)
+            except Exception as e:
+                log.exception(f"SNMP engine error: {e}")
+            await asyncio.sleep(5)  # back off before restarting the scheduler
+    finally:
+        await write_behind.stop()
+        await live_channel.stop_publisher()
+        close_transport()
+
+
+async def _run_worker(shard_index, shard_count, interval):
+    # PollerPool.stop() terminates workers: turn SIGTERM into a cancellation so
+    # run_shard drains the write-behind buffer on the way out
+    task = asyncio.current_task()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+    except (NotImplementedError, AttributeError):
+        pass  # no signal handlers on this platform (Windows)
+    try:
+        await run_shard(shard_index, shard_count, interval)
+    except asyncio.CancelledError:
+        pass
+
+
+def _worker_main(shard_index, shard_count, interval):
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s [%(levelname)s] [shard {shard_index + 1}/{shard_count}] %(message)s",
+        force=True,  # snmp_engine configures logging on import
+    )
+    try:
+        asyncio.run(_run_worker(shard_index, shard_count, interval))
+    except KeyboardInterrupt:
+        pass
+
+
+# --------------------------------------------------------------------------
+# Pool of sharded worker processes
+# --------------------------------------------------------------------------
+class PollerPool:
+    """
+    Splits the device inventory across `processes` worker processes. Each worker runs
+    its own event loop, SNMP transport and DB connection pool, and polls only the
+    devices that shard_for() assigns to it, so throughput scales with CPU cores.
+    Workers are started with the "spawn" method (no inherited sockets or DB
+    connections) and restarted by supervise() if they die.
+    """
+
+    def __init__(self, processes, interval=SNMP_POLL_INTERVAL):
+        self.processes = resolve_process_count(processes)
+        self.interval = interval
+        self._ctx = multiprocessing.get_context("spawn")
+        self._workers = [None] * self.processes
+        self.restarts = 0
+
+    def _spawn(self, shard_index):
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(shard_index, self.processes, self.interval),
+            name=f"snmp-poller-{shard_index + 1}",
+            daemon=True,
+        )
+        proc.start()
+        self._workers[shard_index] = proc
+        log.info(f"Started poller shard {shard_index + 1}/{self.processes} (pid {proc.pid})")
+
+    def start(self):
+        for shard_index in range(self.processes):
+            self._spawn(shard_index)
+
+    def check(self):
+        """Restart any worker that exited."""
+        for shard_index, proc in enumerate(self._workers):
+            if proc is not None and not proc.is_alive():
+                log.warning(f"Poller shard {shard_index + 1} exited (code {proc.exitcode}) - restarting")
+                self.restarts += 1
+                self._spawn(shard_index)
+
+    async def supervise(self, check_interval=5):
+        while True:
+            await asyncio.sleep(check_interval)
+            self.check()
+
+    async def stop(self, timeout=10, poll_interval=0.1):
+        """
+        Terminate the workers (each drains its write-behind buffer on SIGTERM) and
+        wait up to `timeout` seconds for them to exit without blocking the event
+        loop; stragglers are killed.
+        """
+        workers = [proc for proc in self._workers if proc is not None]
+        self._workers = [None] * self.processes  # supervise() must not restart them
+        for proc in workers:
+            if proc.is_alive():
+                proc.terminate()
+        deadline = time.monotonic() + timeout
+        while any(proc.is_alive() for proc in workers) and time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+        for proc in workers:
+            if proc.is_alive():
+                log.warning(f"{proc.name} did not exit within {timeout}s - killing it")
+                proc.kill()
+
+    def status(self):
+        return {
+            "processes": self.processes,
+            "restarts": self.restarts,
+            "workers": [
+                {
+                    "shard": shard_index + 1,
+                    "pid": proc.pid if proc else None,
+                    "alive": bool(proc and proc.is_alive()),
+                }
+                for shard_index, proc in enumerate(self._workers)
+            ],
+        }
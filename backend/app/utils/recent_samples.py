@@ -0,0 +1,145 @@
+# backend/app/utils/recent_samples.py
+import logging
+import time
+from array import array
+from datetime import datetime, timezone
+
+from ..config import RECENT_SAMPLES_CAPACITY, RECENT_DEFAULT_SECONDS
+
+log = logging.getLogger("RECENT_SAMPLES")
+
+
+# --------------------------------------------------------------------------
+# Fixed-size ring of (timestamp, in_bps, out_bps) for one interface
+# --------------------------------------------------------------------------
+class SampleRing:
+    """
+    The last `capacity` samples of one interface in three preallocated typed
+    arrays (epoch seconds as double, bps as int64): 24 bytes per slot, allocated
+    once, and appending overwrites the oldest slot instead of creating objects.
+    """
+
+    __slots__ = ("times", "in_bps", "out_bps", "head", "count")
+
+    def __init__(self, capacity):
+        self.times = array("d", bytes(8 * capacity))
+        self.in_bps = array("q", bytes(8 * capacity))
+        self.out_bps = array("q", bytes(8 * capacity))
+        self.head = 0  # next slot to write
+        self.count = 0
+
+    def append(self, ts, in_bps, out_bps):
+        capacity = len(self.times)
+        slot = self.head
+        self.times[slot] = ts
+        self.in_bps[slot] = in_bps
+        self.out_bps[slot] = out_bps
+        self.head = (slot + 1) % capacity
+        if self.count < capacity:
+            self.count += 1
+
+    def since(self, cutoff):
+        """(timestamp, in_bps, out_bps) tuples newer than epoch `cutoff`, oldest first."""
+        capacity = len(self.times)
+        start = (self.head - self.count) % capacity
+        out = []
+        for n in range(self.count):
+            slot = (start + n) % capacity
+            if self.times[slot] > cutoff:
+                out.append((self.times[slot], self.in_bps[slot], self.out_bps[slot]))
+        return out
+
+    def last(self):
+        if not self.count:
+            return None
+        slot = (self.head - 1) % len(self.times)
+        return self.times[slot], self.in_bps[slot], self.out_bps[slot]
+
+
+# --------------------------------------------------------------------------
+# Store of rings, filled from live poll events
+# --------------------------------------------------------------------------
+class RecentSamples:
+    """
+    Recent traffic of every interface, fed by the live channel's "device_polled"
+    events (in-process poller or Postgres NOTIFY), so /stats/recent and the
+    WebSocket backfill never touch the database. Starts empty after a restart and
+    fills up as polls come in.
+    """
+
+    def __init__(self, capacity=RECENT_SAMPLES_CAPACITY):
+        self.capacity = capacity
+        self._rings = {}  # interface_id -> SampleRing
+        self._device_interfaces = {}  # device_id -> {interface_id}
+        self.appended = 0
+
+    def on_event(self, event):
+        """live_channel subscriber."""
+        if event.get("type") == "device_removed":
+            self.forget_device(event["device_id"])
+            return
+        if event.get("type") != "device_polled":
+            return
+        ts = event.get("timestamp")
+        if isinstance(ts, str):
+            ts = datetime.fromisoformat(ts)
+        epoch = ts.replace(tzinfo=timezone.utc).timestamp() if ts is not None else time.time()
+        interface_ids = self._device_interfaces.setdefault(event["device_id"], set())
+        for intf in event.get("interfaces", ()):
+            if intf.get("in_bps") is None:
+                continue  # first poll of a counter: no rate yet
+            self.add(intf["interface_id"], epoch, intf["in_bps"], intf["out_bps"] or 0)
+            interface_ids.add(intf["interface_id"])
+
+    def add(self, interface_id, epoch, in_bps, out_bps):
+        ring = self._rings.get(interface_id)
+        if ring is None:
+            ring = self._rings[interface_id] = SampleRing(self.capacity)
+        ring.append(epoch, in_bps, out_bps)
+        self.appended += 1
+
+    def interfaces_of(self, device_id):
+        return sorted(self._device_interfaces.get(device_id, ()))
+
+    def forget_device(self, device_id):
+        for interface_id in self._device_interfaces.pop(device_id, ()):
+            self._rings.pop(interface_id, None)
+
+    def series(self, interface_ids, seconds=RECENT_DEFAULT_SECONDS):
+        """Samples of the last `seconds` as InterfaceStatsBase-shaped dicts, grouped by interface."""
+        cutoff = time.time() - seconds
+        points = []
+        for interface_id in interface_ids:
+            ring = self._rings.get(interface_id)
+            if ring is None:
+                continue
+            for ts, in_bps, out_bps in ring.since(cutoff):
+                points.append({
+                    "interface_id": interface_id,
+                    "timestamp": datetime.utcfromtimestamp(ts),
+                    "in_bps": in_bps,
+                    "out_bps": out_bps,
+                })
+        return points
+
+    def snapshot(self, seconds=RECENT_DEFAULT_SECONDS):
+        """{interface_id: [[epoch, in_bps, out_bps], ...]} for every interface (WebSocket backfill)."""
+        cutoff = time.time() - seconds
+        snapshot = {}
+        for interface_id, ring in self._rings.items():
+            samples = ring.since(cutoff)
+            if samples:
+                snapshot[interface_id] = [list(s) for s in samples]
+        return snapshot
+
+    def stats(self):
+        return {
+            "interfaces": len(self._rings),
+            "capacity": self.capacity,
+            "bytes": len(self._rings) * self.capacity * 24,
+            "appended": self.appended,
+        }
+
+
+# One store per API process
+recent_samples = RecentSamples()
@@ -0,0 +1,412 @@
+# backend/app/utils/rollups.py
+import asyncio
+import logging
+import math
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, any_, bindparam, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert, ARRAY
+from sqlalchemy import Integer
+
+from ..config import (
+    ROLLUP_GRACE, ROLLUP_FLUSH_INTERVAL, STATS_DEFAULT_POINTS, ROLLUP_RETENTION_DAYS, STATS_RETENTION_DAYS,
+)
+from ..database import async_session
+from ..models import Interface, InterfaceStats, InterfaceStats1m, InterfaceStats5m, InterfaceStats1h, InterfaceStats1d
+from .archive import archive_enabled, read_archive
+
+log = logging.getLogger("ROLLUPS")
+
+EPOCH = datetime(1970, 1, 1)
+
+# (bucket seconds, label, model), finest first
+LEVELS = [
+    (60, "1m", InterfaceStats1m),
+    (300, "5m", InterfaceStats5m),
+    (3600, "1h", InterfaceStats1h),
+    (86400, "1d", InterfaceStats1d),
+]
+VALUE_COLUMNS = (
+    "samples", "in_min", "in_avg", "in_max", "in_p95", "in_hist",
+    "out_min", "out_avg", "out_max", "out_p95", "out_hist",
+)
+LABELS = {seconds: label for seconds, label, _ in LEVELS}
+RESOLUTIONS = (0,) + tuple(LABELS)  # 0 = raw samples
+UPSERT_BATCH = 2000  # rows per INSERT ... ON CONFLICT (13 bind parameters each)
+# Columns of the finer rows merge_rows() reads, and how many are fetched per round trip
+MERGE_COLUMNS = (
+    "interface_id", "samples", "in_min", "in_avg", "in_max", "in_hist", "out_min", "out_avg", "out_max", "out_hist",
+)
+ROLLUP_FETCH_ROWS = 10_000
+
+
+def bucket_start(ts, seconds):
+    """Start of the `seconds`-long bucket containing naive-UTC `ts`."""
+    offset = int((ts - EPOCH).total_seconds()) // seconds * seconds
+    return EPOCH + timedelta(seconds=offset)
+
+
+# --------------------------------------------------------------------------
+# Mergeable log histogram (p95 of coarse buckets without keeping raw samples)
+# --------------------------------------------------------------------------
+# Bin b > 0 holds values in (GAMMA^(b-2), GAMMA^(b-1)]; bin 0 holds zeros. Any
+# quantile read back is within ~2% of the true sample value, and histograms of
+# adjacent buckets merge by adding counts.
+HIST_GAMMA = 1.04
+_LOG_GAMMA = math.log(HIST_GAMMA)
+
+
+def hist_bin(value):
+    if value <= 0:
+        return 0
+    return max(int(math.ceil(math.log(value) / _LOG_GAMMA)), 0) + 1
+
+
+def hist_value(bin_):
+    if bin_ == 0:
+        return 0
+    return int(2 * HIST_GAMMA ** (bin_ - 1) / (HIST_GAMMA + 1))
+
+
+def hist_from_values(values):
+    hist = {}
+    for v in values:
+        b = hist_bin(v)
+        hist[b] = hist.get(b, 0) + 1
+    return hist
+
+
+def hist_merge(into, other):
+    for b, count in other.items():
+        into[b] = into.get(b, 0) + count
+    return into
+
+
+def hist_quantile(hist, q):
+    total = sum(hist.values())
+    if not total:
+        return None
+    rank = q * (total - 1)
+    seen = 0
+    for b in sorted(hist):
+        seen += hist[b]
+        if seen > rank:
+            return hist_value(b)
+    return hist_value(max(hist))
+
+
+def hist_pack(hist):
+    packed = []
+    for b in sorted(hist):
+        packed.extend((b, hist[b]))
+    return packed
+
+
+def hist_unpack(packed):
+    packed = packed or []
+    return {packed[i]: packed[i + 1] for i in range(0, len(packed) - 1, 2)}
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of raw values (exact, used for 1m buckets)."""
+    ordered = sorted(values)
+    return ordered[min(int(math.ceil(q * len(ordered))) - 1, len(ordered) - 1)] if ordered else None
+
+
+# --------------------------------------------------------------------------
+# Bucket aggregation
+# --------------------------------------------------------------------------
+def summarize(values):
+    """Raw bps values of one bucket -> (min, avg, max, p95, packed hist)."""
+    return (
+        min(values),
+        sum(values) / len(values),
+        max(values),
+        percentile(values, 0.95),
+        hist_pack(hist_from_values(values)),
+    )
+
+
+def merge_rows(rows):
+    """Finer rollup rows of one interface -> column values of the coarser bucket."""
+    samples = sum(r.samples for r in rows)
+    merged = {"samples": samples}
+    for direction in ("in", "out"):
+        hist = {}
+        for r in rows:
+            hist_merge(hist, hist_unpack(getattr(r, f"{direction}_hist")))
+        mins = [getattr(r, f"{direction}_min") for r in rows if getattr(r, f"{direction}_min") is not None]
+        maxs = [getattr(r, f"{direction}_max") for r in rows if getattr(r, f"{direction}_max") is not None]
+        merged[f"{direction}_min"] = min(mins) if mins else None
+        merged[f"{direction}_max"] = max(maxs) if maxs else None
+        merged[f"{direction}_avg"] = (
+            sum((getattr(r, f"{direction}_avg") or 0) * r.samples for r in rows) / samples if samples else None
+        )
+        merged[f"{direction}_p95"] = hist_quantile(hist, 0.95)
+        merged[f"{direction}_hist"] = hist_pack(hist)
+    return merged
+
+
+async def upsert_rollups(session, model, rows):
+    """Insert or replace rollup rows (recomputing a bucket is idempotent)."""
+    table = model.__table__
+    for start in range(0, len(rows), UPSERT_BATCH):
+        stmt = pg_insert(table).values(rows[start:start + UPSERT_BATCH])
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=["interface_id", "bucket"],
+            set_={column: stmt.excluded[column] for column in VALUE_COLUMNS},
+        ))
+
+
+# --------------------------------------------------------------------------
+# Incremental rollup pipeline
+# --------------------------------------------------------------------------
+class RollupEngine:
+    """
+    Builds interface_stats_1m/5m/1h/1d as samples are written.
+
+    add_samples() accumulates every written sample into its open 1-minute bucket
+    in memory. flush() (every ROLLUP_FLUSH_INTERVAL seconds) closes 1m buckets
+    once they ended `grace` seconds ago (exact min/avg/max/p95 from the raw
+    values), then builds each coarser bucket that has just closed by merging the
+    finer rows below it: 5m from 1m, 1h from 5m, 1d from 1h. Only interfaces
+    polled by this process are rolled up, so sharded pollers split the work.
+    """
+
+    def __init__(self, grace=ROLLUP_GRACE, flush_interval=ROLLUP_FLUSH_INTERVAL):
+        self.grace = timedelta(seconds=grace)
+        self.flush_interval = flush_interval
+        self._open = {}  # (interface_id, 1m bucket) -> ([in_bps...], [out_bps...])
+        self._closed_until = None  # 1m buckets before this are written; later samples are late
+        self._next = {}  # coarse resolution -> start of the next bucket to build
+        self._interfaces = set()
+        self.late_samples = 0
+        self.rows_written = {label: 0 for _, label, _ in LEVELS}
+
+    def add_samples(self, samples):
+        """samples: (interface_id, timestamp, in_bps, out_bps) tuples already committed to interface_stats."""
+        for interface_id, timestamp, in_bps, out_bps in samples:
+            bucket = bucket_start(timestamp, 60)
+            if self._closed_until is not None and bucket < self._closed_until:
+                self.late_samples += 1
+                continue
+            values = self._open.get((interface_id, bucket))
+            if values is None:
+                values = self._open[(interface_id, bucket)] = ([], [])
+            values[0].append(in_bps)
+            values[1].append(out_bps)
+            self._interfaces.add(interface_id)
+
+    async def flush(self, now=None):
+        ready = (now or datetime.utcnow()) - self.grace
+        closed_until = bucket_start(ready, 60)
+        closing = [key for key in self._open if key[1] < closed_until]
+        minute_rows = []
+        for key in closing:
+            in_values, out_values = self._open[key]
+            in_min, in_avg, in_max, in_p95, in_hist = summarize(in_values)
+            out_min, out_avg, out_max, out_p95, out_hist = summarize(out_values)
+            minute_rows.append({
+                "interface_id": key[0], "bucket": key[1], "samples": len(in_values),
+                "in_min": in_min, "in_avg": in_avg, "in_max": in_max, "in_p95": in_p95, "in_hist": in_hist,
+                "out_min": out_min, "out_avg": out_avg, "out_max": out_max, "out_p95": out_p95, "out_hist": out_hist,
+            })
+
+        async with async_session() as session:
+            await upsert_rollups(session, InterfaceStats1m, minute_rows)
+            written = {"1m": len(minute_rows)}
+            pending = []
+            for (finer, _, finer_model), (seconds, label, model) in zip(LEVELS, LEVELS[1:]):
+                # (re)build the last closed bucket first after a restart; upserts make that idempotent
+                start = self._next.get(seconds) or bucket_start(ready, seconds) - timedelta(seconds=seconds)
+                written[label] = 0
+                while start + timedelta(seconds=seconds) <= ready and self._interfaces:
+                    written[label] += await self._roll_up(session, finer_model, model, start, seconds)
+                    start += timedelta(seconds=seconds)
+                pending.append((seconds, start))
+            await session.commit()
+
+        # only forget in-memory state once it is safely committed
+        for key in closing:
+            del self._open[key]
+        self._closed_until = closed_until
+        for seconds, start in pending:
+            self._next[seconds] = start
+        for label, count in written.items():
+            self.rows_written[label] += count
+
+    async def _roll_up(self, session, finer_model, model, start, seconds):
+        """
+        Build one coarse bucket from the finer rows below it. Only the columns
+        merge_rows() needs are fetched, as plain rows streamed in interface order
+        from a server-side cursor, so at most one interface's finer rows are held
+        at a time and the event loop gets control back between fetches.
+        """
+        end = start + timedelta(seconds=seconds)
+        table = finer_model.__table__
+        result = await session.stream(
+            select(*(table.c[column] for column in MERGE_COLUMNS))
+            .where(
+                table.c.bucket >= start,
+                table.c.bucket < end,
+                table.c.interface_id == any_(bindparam("ids", list(self._interfaces), type_=ARRAY(Integer))),
+            )
+            .order_by(table.c.interface_id)
+        )
+        rows = []
+        group = []
+        async for partition in result.partitions(ROLLUP_FETCH_ROWS):
+            for row in partition:
+                if group and row.interface_id != group[0].interface_id:
+                    rows.append({"interface_id": group[0].interface_id, "bucket": start, **merge_rows(group)})
+                    group = []
+                group.append(row)
+        if group:
+            rows.append({"interface_id": group[0].interface_id, "bucket": start, **merge_rows(group)})
+        await upsert_rollups(session, model, rows)
+        return len(rows)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"Rollup flush failed (will retry): {e}")
+
+    def stats(self):
+        return {
+            "open_buckets": len(self._open),
+            "interfaces": len(self._interfaces),
+            "late_samples": self.late_samples,
+            "rows_written": dict(self.rows_written),
+        }
+
+
+# One engine per process, fed by the write-behind flusher
+rollup_engine = RollupEngine()
+
+
+# --------------------------------------------------------------------------
+# Resolution-aware reads
+# --------------------------------------------------------------------------
+def retention_start(seconds):
+    """Oldest time still held in Postgres at this resolution (0 = raw interface_stats)."""
+    days = ROLLUP_RETENTION_DAYS[LABELS[seconds]] if seconds else STATS_RETENTION_DAYS
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+
+
+def pick_resolution(start, end, points=STATS_DEFAULT_POINTS):
+    """
+    Coarsest rollup that still gives at least `points` buckets over [start, end),
+    e.g. 30 days at 300 points -> 1h (720 rows per interface instead of ~500k raw).
+    0 means the range is too short for any rollup and raw samples are returned.
+    A rollup kept for less time than raw samples is skipped once it no longer
+    reaches back to `start`: the archive only holds raw samples past their retention.
+    """
+    span = (end - start).total_seconds()
+    for seconds, label, _ in reversed(LEVELS):
+        if ROLLUP_RETENTION_DAYS[label] < STATS_RETENTION_DAYS and start < retention_start(seconds):
+            continue
+        if span / seconds >= points:
+            return seconds
+    return 0
+
+
+def _raw_point(row):
+    return {
+        "interface_id": row.interface_id,
+        "timestamp": row.timestamp,
+        "resolution": 0,
+        "samples": 1,
+        "in_bps": row.in_bps,
+        "out_bps": row.out_bps,
+        "in_min": row.in_bps, "in_max": row.in_bps, "in_p95": row.in_bps,
+        "out_min": row.out_bps, "out_max": row.out_bps, "out_p95": row.out_bps,
+    }
+
+
+def _rollup_point(row, seconds):
+    return {
+        "interface_id": row.interface_id,
+        "timestamp": row.bucket,
+        "resolution": seconds,
+        "samples": row.samples,
+        "in_bps": int(row.in_avg) if row.in_avg is not None else None,
+        "out_bps": int(row.out_avg) if row.out_avg is not None else None,
+        "in_min": row.in_min, "in_max": row.in_max, "in_p95": row.in_p95,
+        "out_min": row.out_min, "out_max": row.out_max, "out_p95": row.out_p95,
+    }
+
+
+def _after(time_column, interface_column, after):
+    """Rows past the (timestamp, interface_id) of the previous page's last point."""
+    ts, interface_id = after
+    # the plain bound keeps partition pruning, the row comparison does the exact cut
+    return [time_column >= ts, tuple_(time_column, interface_column) > tuple_(ts, interface_id)]
+
+
+async def read_series(session, interface_ids, start, end, points=STATS_DEFAULT_POINTS,
+                      limit=None, after=None, resolution=None):
+    """
+    Stats of the interfaces selected by `interface_ids` (a SELECT of interface ids)
+    over [start, end) at the resolution chosen by pick_resolution(). The part of the
+    range older than that resolution's retention comes from the Parquet archive
+    (when enabled), aggregated to the same resolution. The most recent buckets of a
+    coarse level are not built until they close, so that tail is filled from the
+    next finer level (down to raw samples).
+
+    Points are ordered by (timestamp, interface_id). With `limit`, at most that many
+    are returned; the next page is read with after=(timestamp, interface_id) of the
+    last point and the same `resolution`. Returns (resolution, points, next_after),
+    next_after being None on the last page.
+    """
+    if resolution is None:
+        resolution = pick_resolution(start, end, points)
+    if after is not None:
+        start = max(start, after[0])
+    chain = [level for level in LEVELS if level[0] <= resolution][::-1] + [(0, "raw", InterfaceStats)]
+    now = datetime.utcnow()
+    wanted = limit + 1 if limit is not None else None  # one more tells whether another page exists
+    series = []
+    cursor = start
+
+    archived_until = min(end, retention_start(resolution))
+    if start < archived_until and archive_enabled():
+        q = await session.execute(select(Interface.device_id, Interface.id).where(Interface.id.in_(interface_ids)))
+        device_interfaces = {}
+        for device_id, interface_id in q.all():
+            device_interfaces.setdefault(device_id, []).append(interface_id)
+        series.extend(await asyncio.to_thread(
+            read_archive, device_interfaces, start, archived_until, resolution, after=after, limit=wanted,
+        ))
+        cursor = archived_until
+    for seconds, _, model in chain:
+        if cursor >= end or (wanted is not None and len(series) >= wanted):
+            break
+        time_column = model.bucket if seconds else model.timestamp
+        stmt = (
+            select(model)
+            .where(model.interface_id.in_(interface_ids), time_column >= cursor, time_column < end)
+            .order_by(time_column, model.interface_id)
+        )
+        if after is not None:
+            stmt = stmt.where(*_after(time_column, model.interface_id, after))
+        if wanted is not None:
+            stmt = stmt.limit(wanted - len(series))
+        rows = (await session.execute(stmt)).scalars().all()
+        if seconds:
+            series.extend(_rollup_point(r, seconds) for r in rows)
+            if rows:
+                cursor = rows[-1].bucket + timedelta(seconds=seconds)
+            # only the not-yet-closed tail is read at finer resolution, never the whole range
+            cursor = max(cursor, bucket_start(now, seconds) - timedelta(seconds=seconds))
+        else:
+            series.extend(_raw_point(r) for r in rows)
+
+    if wanted is not None and len(series) >= wanted:
+        series = series[:limit]
+        return resolution, series, (series[-1]["timestamp"], series[-1]["interface_id"])
+    return resolution, series, None
@@ -1,20 +1,15 @@
 # backend/app/utils/snmp_engine.py
 import asyncio
 import logging
-from datetime import datetime
-from pysnmp.hlapi import (
-    SnmpEngine,
-    CommunityData,
-    UdpTransportTarget,
-    ContextData,
-    ObjectType,
-    ObjectIdentity,
-    getCmd,
-    nextCmd,
-)
-from ..database import async_session
-from ..models import Device, Interface, InterfaceStats, TopologyLink
-from sqlalchemy.future import select
+import time
+from pysnmp.proto import rfc1905
+from ..config import SNMP_TIMEOUT, SNMP_RETRIES, SNMP_MAX_REPETITIONS, SNMP_POLL_INTERVAL, SNMP_PORT
+from .snmp_transport import get_transport, SNMP_V1, SNMP_V2C
+from .counters import counter_cache
+from .poll_scheduler import PollScheduler
+from .device_health import health_tracker
+from .live_channel import live_channel
+from .write_behind import write_behind, DeviceUpdate
 
 # --------------------------------------------------------------------------
 # Logging
@@ -22,6 +17,11 @@ from sqlalchemy.future import select
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 log = logging.getLogger("SNMP_ENGINE")
 
+# Device.status of devices skipped because their SNMP version cannot be polled
+UNSUPPORTED_STATUS = "unsupported"
+# ids already marked UNSUPPORTED_STATUS (cleared when the device is polled again)
+unsupported_devices = set()
+
 # --------------------------------------------------------------------------
 # SNMP OIDs
 # --------------------------------------------------------------------------
@@ -30,12 +30,38 @@ IF_OPER_STATUS_OID = "1.3.6.1.2.1.2.2.1.8"
 IF_IN_OCTETS_OID = "1.3.6.1.2.1.2.2.1.10"
 IF_OUT_OCTETS_OID = "1.3.6.1.2.1.2.2.1.16"
 IF_MAC_OID = "1.3.6.1.2.1.2.2.1.6"
+IF_SPEED_OID = "1.3.6.1.2.1.2.2.1.5"
+SYS_UPTIME_OID = "1.3.6.1.2.1.1.3.0"
+
+# IF-MIB ifXTable (64-bit counters, SNMPv2c only) - same ifIndex rows as ifTable
+IF_HC_IN_OCTETS_OID = "1.3.6.1.2.1.31.1.1.1.6"
+IF_HC_OUT_OCTETS_OID = "1.3.6.1.2.1.31.1.1.1.10"
+IF_HIGH_SPEED_OID = "1.3.6.1.2.1.31.1.1.1.15"
 
 # LLDP MIB OIDs (standard)
 LLDP_REM_SYS_NAME = "1.0.8802.1.1.2.1.4.1.1.9"
 LLDP_REM_PORT_DESC = "1.0.8802.1.1.2.1.4.1.1.8"
 LLDP_REM_MAN_ADDR = "1.0.8802.1.1.2.1.4.2.1.4"
 
+# Columns fetched together in one interleaved table walk
+IF_TABLE_COLUMNS = {
+    "descr": IF_DESCR_OID,
+    "oper": IF_OPER_STATUS_OID,
+    "in_octets": IF_IN_OCTETS_OID,
+    "out_octets": IF_OUT_OCTETS_OID,
+    "mac": IF_MAC_OID,
+    "speed": IF_SPEED_OID,
+}
+IF_X_TABLE_COLUMNS = {
+    "hc_in_octets": IF_HC_IN_OCTETS_OID,
+    "hc_out_octets": IF_HC_OUT_OCTETS_OID,
+    "high_speed": IF_HIGH_SPEED_OID,
+}
+LLDP_REM_COLUMNS = {
+    "sys_name": LLDP_REM_SYS_NAME,
+    "port_desc": LLDP_REM_PORT_DESC,
+}
+
 # --------------------------------------------------------------------------
 # Utility Functions
 # --------------------------------------------------------------------------
@@ -46,6 +72,15 @@ def calc_bps(old, new, interval):
         return 0
 
 
+def interface_speed(row):
+    """ifSpeed saturates at 2^32-1 on links faster than ~4.3 Gbps; use ifHighSpeed (Mbps) there."""
+    speed = row.get("speed")
+    high_speed = row.get("high_speed")
+    if high_speed is not None and (speed is None or int(speed) >= 4294967295):
+        return int(high_speed) * 1_000_000
+    return int(speed) if speed is not None else None
+
+
 def oid_index(oid_string):
     try:
         return oid_string.rsplit(".", 1)[-1]
@@ -53,118 +88,308 @@ def oid_index(oid_string):
         return None
 
 
+def _end_of_walk(value):
+    return isinstance(value, (rfc1905.EndOfMibView, rfc1905.NoSuchObject, rfc1905.NoSuchInstance))
+
+
+def is_snmp_v3(snmp_version):
+    return str(snmp_version or "").strip().lower().lstrip("v") == "3"
+
+
+def snmp_message_version(snmp_version):
+    """
+    Map Device.snmp_version ("1", "v2c", "2c", ...) to the wire protocol version.
+    Anything that is not explicitly v2c keeps the historical SNMPv1 behaviour.
+    v3 needs USM credentials the Device model does not hold, so it is refused
+    rather than sent as community-based v1/v2c.
+    """
+    if is_snmp_v3(snmp_version):
+        raise ValueError("SNMPv3 is not supported (no USM credentials)")
+    value = str(snmp_version or "").strip().lower().lstrip("v")
+    if value in ("2", "2c"):
+        return SNMP_V2C
+    return SNMP_V1
+
+
 # --------------------------------------------------------------------------
 # Async SNMP GET
 # --------------------------------------------------------------------------
-async def snmp_get(target, oid, community="public", port=161):
-    def run_get():
-        iterator = getCmd(
-            SnmpEngine(),
-            CommunityData(community, mpModel=0),
-            UdpTransportTarget((target, port), timeout=2, retries=1),
-            ContextData(),
-            ObjectType(ObjectIdentity(oid)),
-        )
-        return next(iterator)
-
+async def snmp_get(target, oid, community="public", port=SNMP_PORT, version=None):
     try:
-        errorIndication, errorStatus, errorIndex, varBinds = await asyncio.to_thread(run_get)
+        rsp = await get_transport().get(
+            target, [oid], community, snmp_message_version(version), port,
+            timeout=SNMP_TIMEOUT, retries=SNMP_RETRIES,
+        )
     except Exception as e:
         log.error(f"snmp_get exception on {target} oid={oid} -> {e}")
         return None
 
-    if errorIndication or errorStatus:
-        log.debug(f"SNMP GET failed {target} OID={oid} Error={errorIndication or errorStatus}")
+    if rsp is None:
+        log.debug(f"SNMP GET failed {target} OID={oid} Error=No SNMP response received before timeout")
+        return None
+    errorStatus, errorIndex, varBinds = rsp
+    if errorStatus:
+        log.debug(f"SNMP GET failed {target} OID={oid} Error=errorStatus {errorStatus}")
         return None
     try:
-        return varBinds[0][1]
+        value = varBinds[0][1]
     except Exception:
         return None
+    if _end_of_walk(value):
+        return None
+    return value
 
 
 # --------------------------------------------------------------------------
 # Async SNMP WALK
 # --------------------------------------------------------------------------
-async def snmp_walk(target, oid, community="public", port=161):
+async def snmp_walk(target, oid, community="public", port=SNMP_PORT, version=None, max_repetitions=SNMP_MAX_REPETITIONS):
+    """
+    Walk the subtree under `oid` over the shared SNMP transport.
+    SNMPv2c devices are walked with GETBULK (`max_repetitions` rows per round trip),
+    everything else with SNMPv1 GETNEXT.
+    Returns {full_oid_string: value}, or None on timeout / SNMP error.
+    """
+    if snmp_message_version(version) == SNMP_V2C and max_repetitions and max_repetitions > 1:
+        return await _snmp_bulk_walk(target, oid, community, port, max_repetitions)
+    return await _snmp_next_walk(target, oid, community, port)
+
+
+async def _snmp_next_walk(target, oid, community, port):
     results = {}
+    transport = get_transport()
+    prefix = oid + "."
+    current = oid
 
-    def run_walk():
-        iterator = nextCmd(
-            SnmpEngine(),
-            CommunityData(community, mpModel=0),
-            UdpTransportTarget((target, port), timeout=2, retries=1),
-            ContextData(),
-            ObjectType(ObjectIdentity(oid)),
-            lexicographicMode=False,
-        )
-        return list(iterator)
+    while True:
+        try:
+            rsp = await transport.get_next(
+                target, [current], community, SNMP_V1, port, timeout=SNMP_TIMEOUT, retries=SNMP_RETRIES
+            )
+        except Exception as e:
+            log.error(f"snmp_walk exception on {target} oid={oid} -> {e}")
+            return None
 
-    try:
-        walk_results = await asyncio.to_thread(run_walk)
-    except Exception as e:
-        log.error(f"snmp_walk exception on {target} oid={oid} -> {e}")
-        return None
+        if rsp is None:
+            log.debug(f"SNMP WALK error on {target} OID={oid} => No SNMP response received before timeout")
+            return None
+        errorStatus, errorIndex, varBinds = rsp
+        if errorStatus == 2:
+            # SNMPv1 agents report the end of the MIB view as noSuchName
+            break
+        if errorStatus:
+            log.debug(f"SNMP WALK error on {target} OID={oid} => errorStatus {errorStatus}")
+            return None
+
+        name, value = varBinds[0]
+        name = str(name)
+        if not name.startswith(prefix) or _end_of_walk(value):
+            break
+        results[name] = value
+        current = name
+
+    return results
+
+
+async def _snmp_bulk_walk(target, oid, community, port, max_repetitions):
+    results = {}
+    transport = get_transport()
+    prefix = oid + "."
+    current = oid
+
+    while True:
+        try:
+            rsp = await transport.get_bulk(
+                target, [current], max_repetitions, community, SNMP_V2C, port,
+                timeout=SNMP_TIMEOUT, retries=SNMP_RETRIES,
+            )
+        except Exception as e:
+            log.error(f"snmp_walk exception on {target} oid={oid} -> {e}")
+            return None
 
-    for errInd, errStat, errIdx, varBinds in walk_results:
-        if errInd or errStat:
-            log.debug(f"SNMP WALK error on {target} OID={oid} => {errInd or errStat}")
+        if rsp is None:
+            log.debug(f"SNMP BULK WALK error on {target} OID={oid} => No SNMP response received before timeout")
+            return None
+        errorStatus, errorIndex, varBinds = rsp
+        if errorStatus == 1 and max_repetitions > 1:
+            # tooBig: the agent cannot fit that many rows in one datagram
+            max_repetitions = max(max_repetitions // 2, 1)
+            continue
+        if errorStatus:
+            log.debug(f"SNMP BULK WALK error on {target} OID={oid} => errorStatus {errorStatus}")
             return None
-        for oid_val, value in varBinds:
-            results[str(oid_val)] = value
+        if not varBinds:
+            break
+
+        done = False
+        for name, value in varBinds:
+            name = str(name)
+            if not name.startswith(prefix) or _end_of_walk(value):
+                done = True
+                break
+            results[name] = value
+        if done or name == current:
+            break
+        current = name
+
     return results
 
 
+# --------------------------------------------------------------------------
+# Async SNMP TABLE (several columns in one interleaved walk)
+# --------------------------------------------------------------------------
+async def snmp_table(target, columns, community="public", port=SNMP_PORT, version=None,
+                     max_repetitions=SNMP_MAX_REPETITIONS):
+    """
+    Fetch several columns of one table in a single walk: every request carries one
+    var-bind per column still being walked (GETBULK for v2c, GETNEXT for v1).
+    `columns` maps a column name to its base OID.
+    Returns {row_index: {column_name: value}}, where row_index is the OID suffix after
+    the column OID (the ifIndex for ifTable), or None on timeout / SNMP error.
+    """
+    bulk = snmp_message_version(version) == SNMP_V2C and max_repetitions and max_repetitions > 1
+    transport = get_transport()
+    prefixes = {name: oid + "." for name, oid in columns.items()}
+    cursors = dict(columns)
+    active = list(columns)
+    rows = {}
+
+    while active:
+        oids = [cursors[name] for name in active]
+        try:
+            if bulk:
+                rsp = await transport.get_bulk(
+                    target, oids, max_repetitions, community, SNMP_V2C, port,
+                    timeout=SNMP_TIMEOUT, retries=SNMP_RETRIES,
+                )
+            else:
+                rsp = await transport.get_next(
+                    target, oids, community, SNMP_V1, port, timeout=SNMP_TIMEOUT, retries=SNMP_RETRIES
+                )
+        except Exception as e:
+            log.error(f"snmp_table exception on {target} columns={list(columns)} -> {e}")
+            return None
+
+        if rsp is None:
+            log.debug(f"SNMP TABLE error on {target} columns={list(columns)} => No SNMP response received before timeout")
+            return None
+        errorStatus, errorIndex, varBinds = rsp
+        if bulk and errorStatus == 1 and max_repetitions > 1:
+            # tooBig: the agent cannot fit that many rows in one datagram
+            max_repetitions = max(max_repetitions // 2, 1)
+            continue
+        if not bulk and errorStatus == 2 and 1 <= errorIndex <= len(active):
+            # SNMPv1 noSuchName: that column ran off the end of the MIB view
+            del active[errorIndex - 1]
+            continue
+        if errorStatus:
+            log.debug(f"SNMP TABLE error on {target} columns={list(columns)} => errorStatus {errorStatus}")
+            return None
+        if not varBinds:
+            break
+
+        width = len(active)
+        finished = set()
+        progressed = False
+        for position, (oid, value) in enumerate(varBinds):
+            name = active[position % width]
+            if name in finished:
+                continue
+            oid = str(oid)
+            prefix = prefixes[name]
+            if not oid.startswith(prefix) or _end_of_walk(value):
+                finished.add(name)
+                continue
+            rows.setdefault(oid[len(prefix):], {})[name] = value
+            if oid != cursors[name]:
+                cursors[name] = oid
+                progressed = True
+
+        active = [name for name in active if name not in finished]
+        if not progressed:
+            break
+
+    return rows
+
+
 # --------------------------------------------------------------------------
 # Fetch LLDP neighbors
 # --------------------------------------------------------------------------
-async def get_lldp_neighbors(target, community="public"):
+async def get_lldp_neighbors(target, community="public", snmp_version=None, port=SNMP_PORT):
     """
-    Returns dict: {local_iface_index: {"neighbor_ip": str, "neighbor_iface": str, "neighbor_name": str}}
-    Note: local_iface_index is the LLDP index suffix. Mapping index -> ifDescr may be needed if you require human
-    interface names (we keep index here and match to ifDescr loop).
+    Returns dict: {(local_port_num, rem_index): {"neighbor_ip": str, "neighbor_iface": str, "neighbor_name": str}}
+    lldpRemTable rows are indexed by timeMark.localPortNum.remIndex; local_port_num is the
+    middle component, which agents normally set to the local ifIndex (matched against ifTable).
+    A port can have several neighbors (e.g. behind an unmanaged switch), told apart by remIndex.
+    The neighbor IPv4 address is carried in the lldpRemManAddrTable row index.
     """
     neighbors = {}
-    sysnames = await snmp_walk(target, LLDP_REM_SYS_NAME, community)
-    portdesc = await snmp_walk(target, LLDP_REM_PORT_DESC, community)
-    manaddr = await snmp_walk(target, LLDP_REM_MAN_ADDR, community)
+    if is_snmp_v3(snmp_version):
+        log.warning(f"{target}: SNMPv3 is not supported - no LLDP neighbors fetched")
+        return neighbors
+    remote, manaddr = await asyncio.gather(
+        snmp_table(target, LLDP_REM_COLUMNS, community, port, version=snmp_version),
+        snmp_walk(target, LLDP_REM_MAN_ADDR, community, port, version=snmp_version),
+    )
 
-    if not sysnames:
+    if not remote:
         return neighbors
 
-    for oid, sysname in sysnames.items():
-        index = oid_index(oid)
-        if index is None:
+    # timeMark.localPortNum.remIndex -> IPv4 management address
+    addresses = {}
+    prefix = LLDP_REM_MAN_ADDR + "."
+    for oid in manaddr or {}:
+        parts = oid[len(prefix):].split(".")
+        # ...remIndex.addrSubtype(1 = ipV4).addrLen(4).a.b.c.d
+        if len(parts) >= 9 and parts[3] == "1" and parts[4] == "4":
+            addresses.setdefault(".".join(parts[:3]), ".".join(parts[5:9]))
+
+    for index, row in remote.items():
+        parts = index.split(".")
+        if len(parts) < 3 or "sys_name" not in row:
             continue
         # sanitize values
-        neighbor_name = str(sysname).replace("\x00", "").strip()
-        neighbor_ip = ""
-        if manaddr:
-            neighbor_ip = str(manaddr.get(f"{LLDP_REM_MAN_ADDR}.{index}", "")).replace("\x00", "").strip()
-        neighbor_iface = ""
-        if portdesc:
-            neighbor_iface = str(portdesc.get(f"{LLDP_REM_PORT_DESC}.{index}", "")).replace("\x00", "").strip()
-
-        neighbors[index] = {
-            "neighbor_name": neighbor_name,
-            "neighbor_ip": neighbor_ip,
-            "neighbor_iface": neighbor_iface,
+        neighbors[(parts[1], parts[2])] = {
+            "neighbor_name": str(row["sys_name"]).replace("\x00", "").strip(),
+            "neighbor_ip": addresses.get(index, ""),
+            "neighbor_iface": str(row.get("port_desc", "")).replace("\x00", "").strip(),
         }
 
     return neighbors
 
 
+# --------------------------------------------------------------------------
+# Fetch everything one poll needs from a device
+# --------------------------------------------------------------------------
+async def fetch_device(target, community="public", version=None, port=SNMP_PORT):
+    """
+    ifTable (+ ifXTable 64-bit counters on v2c), sysUpTime and LLDP neighbors, fetched concurrently.
+    Returns (if_table, uptime, neighbors); if_table is None/empty when the device did not answer.
+    """
+    columns = IF_TABLE_COLUMNS
+    if snmp_message_version(version) == SNMP_V2C:
+        columns = {**IF_TABLE_COLUMNS, **IF_X_TABLE_COLUMNS}
+    if_table, uptime, neighbors = await asyncio.gather(
+        snmp_table(target, columns, community, port, version=version),
+        snmp_get(target, SYS_UPTIME_OID, community, port, version=version),
+        get_lldp_neighbors(target, community, version, port),
+    )
+    return if_table, (int(uptime) if uptime is not None else None), neighbors
+
+
 # --------------------------------------------------------------------------
 # Poll a single device (interfaces + LLDP)
 # --------------------------------------------------------------------------
-async def poll_device(device_info: dict, interval=5):
+async def poll_device(device_info: dict):
     """
     device_info is a plain dict (not a SQLAlchemy instance):
-      { "id": int, "hostname": str, "ip_address": str, "snmp_community": str }
+      { "id": int, "hostname": str, "ip_address": str, "snmp_community": str, "snmp_version": str }
     This avoids DetachedInstance errors when sessions are closed.
     """
     try:
         target = device_info.get("ip_address")
         community = device_info.get("snmp_community") or "public"
+        version = device_info.get("snmp_version")
         device_id = device_info.get("id")
         device_name = device_info.get("hostname") or str(device_id)
 
@@ -172,166 +397,97 @@ async def poll_device(device_info: dict, interval=5):
             log.error(f"Device {device_name} has no IP configured - skipping")
             return
 
+        # SNMPv3 cannot be polled without USM credentials: flag the device once instead
+        if is_snmp_v3(version):
+            if device_id not in unsupported_devices:
+                unsupported_devices.add(device_id)
+                log.error(f"Device {device_name} is configured for SNMPv3, which is not supported - skipping")
+                live_channel.publish({"type": "device_status", "device_id": device_id, "status": UNSUPPORTED_STATUS})
+                await write_behind.put(DeviceUpdate(device_id, UNSUPPORTED_STATUS, hostname=device_info.get("hostname")))
+            return
+        unsupported_devices.discard(device_id)
+
+        # Breaker open after repeated failures: one sysUpTime GET decides whether full polling resumes
+        if health_tracker.is_open(device_id):
+            if await snmp_get(target, SYS_UPTIME_OID, community, version=version) is None:
+                health_tracker.record_failure(device_id)
+                log.debug(f"{target}: still unreachable, next probe backed off")
+                return
+            log.info(f"{target}: answering again, resuming full polling")
+
         log.info(f"Polling device {device_name} ({target})")
 
-        # SNMP interface data
-        if_descr = await snmp_walk(target, IF_DESCR_OID, community)
-        if_oper = await snmp_walk(target, IF_OPER_STATUS_OID, community)
-        if_in = await snmp_walk(target, IF_IN_OCTETS_OID, community)
-        if_out = await snmp_walk(target, IF_OUT_OCTETS_OID, community)
-        if_mac = await snmp_walk(target, IF_MAC_OID, community)
-
-        if not if_descr:
-            log.info(f"{target}: no ifDescr (SNMP may be unreachable)")
-            # mark device down in DB if present
-            async with async_session() as session:
-                try:
-                    q = await session.execute(select(Device).where(Device.id == device_id))
-                    db_dev = q.scalars().first()
-                    if db_dev:
-                        db_dev.status = "down"
-                        db_dev.last_seen = None
-                        await session.commit()
-                except Exception:
-                    await session.rollback()
+        # SNMP interface table, sysUpTime and LLDP neighbors
+        if_table, uptime, neighbors = await fetch_device(target, community, version)
+        sampled_at = time.monotonic()
+
+        if not if_table:
+            log.info(f"{target}: no ifTable (SNMP may be unreachable)")
+            if not health_tracker.record_failure(device_id):
+                return  # already marked down on the first failure
+            live_channel.publish({"type": "device_status", "device_id": device_id, "status": "down"})
+            # mark device down in DB (written by the write-behind flusher)
+            await write_behind.put(DeviceUpdate(device_id, "down", hostname=device_info.get("hostname")))
             return
+        health_tracker.record_success(device_id)
 
-        # SNMP LLDP neighbors
-        neighbors = await get_lldp_neighbors(target, community)
+        # LLDP neighbors by local port (ifIndex)
+        port_neighbors = {}
+        for (local_port, _), neighbor_info in neighbors.items():
+            port_neighbors.setdefault(local_port, []).append(neighbor_info)
 
-        async with async_session() as session:
+        # Decode the ifTable rows (keyed by ifIndex)
+        interfaces = []  # (name, status, mac, speed_bps, in_bps, out_bps)
+        links = []  # (name, neighbor_ip, neighbor_iface, neighbor_name)
+        for index, row in if_table.items():
             try:
-                # Load existing interface rows for this device, keyed by interface_name
-                q = await session.execute(select(Interface).where(Interface.device_id == device_id))
-                existing_ifaces = { (i.interface_name or "").strip(): i for i in q.scalars().all() }
-
-                # iterate ifDescr results
-                for full_oid, name_val in if_descr.items():
-                    try:
-                        name = str(name_val).replace("\x00", "").strip()
-                        index = oid_index(full_oid)
-                        if index is None:
-                            continue
-
-                        # build keys for other walks
-                        oper_key = f"{IF_OPER_STATUS_OID}.{index}"
-                        in_key = f"{IF_IN_OCTETS_OID}.{index}"
-                        out_key = f"{IF_OUT_OCTETS_OID}.{index}"
-                        mac_key = f"{IF_MAC_OID}.{index}"
-
-                        oper_raw = if_oper.get(oper_key) if if_oper else None
-                        oper_status_val = int(oper_raw) if oper_raw is not None else 2
-                        oper_status = "up" if oper_status_val == 1 else "down"
-
-                        in_oct = int(if_in.get(in_key, 0)) if if_in else 0
-                        out_oct = int(if_out.get(out_key, 0)) if if_out else 0
-                        mac = str(if_mac.get(mac_key, "")).replace("\x00", "").strip() if if_mac else None
-                        if mac == "":
-                            mac = None
-
-                        # compute bps and convert to integer for BigInteger DB column
-                        in_bps = int((in_oct * 8 / interval)) if in_oct is not None else 0
-                        out_bps = int((out_oct * 8 / interval)) if out_oct is not None else 0
-                        speed_bps = int(calc_bps(0, in_oct, interval)) if in_oct else None
-
-                        log.info(f"IF={name} STATUS={oper_status} IN={in_bps}bps OUT={out_bps}bps MAC=({mac})")
-
-                        # Find or create interface ORM row
-                        intf = existing_ifaces.get(name)
-                        if intf:
-                            intf.status = oper_status
-                            if mac:
-                                intf.mac_address = mac
-                            if speed_bps is not None:
-                                intf.speed_bps = speed_bps
-                        else:
-                            intf = Interface(
-                                device_id=device_id,
-                                interface_name=name,
-                                status=oper_status,
-                                mac_address=mac or None,
-                                speed_bps=speed_bps,
-                            )
-                            session.add(intf)
-                            # flush to get intf.id for InterfaceStats FK
-                            await session.flush()
-                            existing_ifaces[name] = intf
-
-                        # Insert interface stats (integers only)
-                        stats = InterfaceStats(
-                            interface_id=intf.id,
-                            timestamp=datetime.utcnow(),
-                            in_bps=in_bps,
-                            out_bps=out_bps,
-                        )
-                        session.add(stats)
-
-                        # Process LLDP neighbor for this index (if any)
-                        neighbor_info = neighbors.get(index)
-                        if neighbor_info:
-                            neighbor_ip = neighbor_info.get("neighbor_ip")
-                            neighbor_iface = neighbor_info.get("neighbor_iface")
-                            neighbor_name = neighbor_info.get("neighbor_name")
-
-                            # Lookup neighbor device by IP (if present in DB)
-                            neighbor_device = None
-                            if neighbor_ip:
-                                qdev = await session.execute(select(Device).where(Device.ip_address == neighbor_ip))
-                                neighbor_device = qdev.scalars().first()
-
-                            # Only create topology link if neighbor_device exists (your TopologyLink model stores device ids)
-                            if neighbor_device:
-                                qlink = await session.execute(
-                                    select(TopologyLink).where(
-                                        (TopologyLink.src_device_id == device_id)
-                                        & (TopologyLink.src_interface == name)
-                                        & (TopologyLink.dst_device_id == neighbor_device.id)
-                                        & (TopologyLink.dst_interface == neighbor_iface)
-                                    )
-                                )
-                                link = qlink.scalars().first()
-                                if link:
-                                    link.last_seen = datetime.utcnow()
-                                else:
-                                    new_link = TopologyLink(
-                                        src_device_id=device_id,
-                                        src_interface=name,
-                                        dst_device_id=neighbor_device.id,
-                                        dst_interface=neighbor_iface,
-                                        last_seen=datetime.utcnow(),
-                                    )
-                                    session.add(new_link)
-                            else:
-                                # If neighbor not in DB, we skip storing the link (alternatively you could store
-                                # an "unknown" link row if you expand your model later)
-                                log.debug(f"{target} IF={name}: neighbor ({neighbor_name} {neighbor_ip}) not in DB - skipping link storage")
-
-                    except Exception as e:
-                        log.exception(f"Error processing interface {full_oid} on {target}: {e}")
-                        # continue with other interfaces
-
-                # Update device status in DB (fetch the DB row and update)
-                qdev = await session.execute(select(Device).where(Device.id == device_id))
-                db_dev = qdev.scalars().first()
-                if db_dev:
-                    db_dev.status = "up"
-                    db_dev.last_seen = datetime.utcnow()
-
-                # commit everything for this device
-                try:
-                    await session.commit()
-                    log.info(f"{target}: interfaces, stats, and LLDP committed")
-                except Exception as e:
-                    log.exception(f"{target}: DB commit failed: {e}")
-                    await session.rollback()
-
+                name_val = row.get("descr")
+                if name_val is None:
+                    continue
+                name = str(name_val).replace("\x00", "").strip()
+
+                oper_raw = row.get("oper")
+                oper_status_val = int(oper_raw) if oper_raw is not None else 2
+                oper_status = "up" if oper_status_val == 1 else "down"
+
+                # prefer 64-bit counters when the agent exposes them for this row
+                hc = "hc_in_octets" in row and "hc_out_octets" in row
+                if hc:
+                    in_oct = int(row["hc_in_octets"])
+                    out_oct = int(row["hc_out_octets"])
+                else:
+                    in_oct = int(row.get("in_octets", 0))
+                    out_oct = int(row.get("out_octets", 0))
+                mac = str(row.get("mac", "")).replace("\x00", "").strip()
+                if mac == "":
+                    mac = None
+
+                # bps from the counter delta since the previous poll (None on first poll / reset)
+                rates = counter_cache.update(device_id, index, in_oct, out_oct, sampled_at, uptime, hc)
+                in_bps, out_bps = rates if rates else (None, None)
+                speed_bps = interface_speed(row)
+
+                if rates:
+                    log.debug(f"IF={name} STATUS={oper_status} IN={in_bps}bps OUT={out_bps}bps MAC=({mac})")
+                interfaces.append((name, oper_status, mac, speed_bps, in_bps, out_bps))
+
+                # LLDP neighbors on this index (if any)
+                for neighbor_info in port_neighbors.get(index, ()):
+                    links.append((
+                        name,
+                        neighbor_info.get("neighbor_ip"),
+                        neighbor_info.get("neighbor_iface"),
+                        neighbor_info.get("neighbor_name"),
+                    ))
             except Exception as e:
-                # rollback if something inside the session block blows up
-                log.exception(f"Session-level error for {target}: {e}")
-                try:
-                    await session.rollback()
-                except Exception:
-                    pass
+                log.exception(f"Error processing interface ifIndex={index} on {target}: {e}")
+                # continue with other interfaces
+
+        # Interfaces, stats, LLDP links and device status are written (and the live
+        # update published) by the write-behind flusher, batched with other devices
+        await write_behind.put(DeviceUpdate(
+            device_id, "up", hostname=device_info.get("hostname"), interfaces=interfaces, links=links,
+        ))
 
     except Exception as e:
         log.exception(f"Unexpected error polling device {device_info.get('hostname', device_info.get('id'))}: {e}")
@@ -340,30 +496,17 @@ async def poll_device(device_info: dict, interval=5):
 # --------------------------------------------------------------------------
 # Poll all devices continuously
 # --------------------------------------------------------------------------
-async def poll_all_devices(interval=5):
-    log.info(f"Starting continuous SNMP polling every {interval} seconds...")
-    while True:
-        try:
-            async with async_session() as session:
-                q = await session.execute(select(Device))
-                devices = q.scalars().all()
-
-            # build simple device_info dicts to avoid passing ORM instances between tasks
-            device_infos = []
-            for d in devices:
-                device_infos.append({
-                    "id": d.id,
-                    "hostname": d.hostname,
-                    "ip_address": d.ip_address,
-                    "snmp_community": d.snmp_community,
-                })
-
-            log.info(f"Polling {len(device_infos)} devices...")
-
-            tasks = [poll_device(info, interval) for info in device_infos]
-            # gather tasks but don't let one failing task cancel others
-            await asyncio.gather(*tasks, return_exceptions=False)
-        except Exception as e:
-            log.exception(f"poll_all_devices top-level error: {e}")
+# Scheduler currently driving poll_all_devices (exposed for status reporting)
+scheduler = None
+
 
-        await asyncio.sleep(interval)
+async def poll_all_devices(interval=SNMP_POLL_INTERVAL, shard_index=0, shard_count=1):
+    """
+    Poll every device on its own deadline (see PollScheduler); `interval` is the
+    default for devices without Device.poll_interval. With shard_count > 1 only this
+    process's share of the inventory is polled (see poller_pool). Runs forever.
+    """
+    global scheduler
+    log.info(f"Starting continuous SNMP polling (default every {interval} seconds)...")
+    scheduler = PollScheduler(poll_device, default_interval=interval, shard_index=shard_index, shard_count=shard_count)
+    await scheduler.run()
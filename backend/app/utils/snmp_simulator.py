@@ -0,0 +1,729 @@
+# backend/app/utils/snmp_simulator.py
+"""
+Local SNMP agent farm for load testing the poller without real switches.
+
+    python -m app.utils.snmp_simulator serve --devices 1000 --interfaces 50
+    python -m app.utils.snmp_simulator bench --devices 1000 --interfaces 50 --cycles 5
+    python -m app.utils.snmp_simulator seed  --devices 1000
+
+Every simulated device answers SNMPv1/v2c GET, GETNEXT and GETBULK on its own
+loopback address (127.1.0.1, 127.1.0.2, ... on --port; Linux routes all of
+127.0.0.0/8 to lo) or, with --port-per-device, on consecutive ports of 127.0.0.1.
+Devices serve the system group, ifTable/ifXTable with octet counters that grow
+with time (Counter32 wraps, Counter64 does not) and an LLDP ring where device N
+sees devices N-1 and N+1 on ifIndex 1 and 2.
+
+Impairments: --latency/--jitter delay every answer, --loss drops requests at
+random, --dead devices never answer and --slow devices answer after
+--slow-latency (past the poller timeout, so they time out too).
+
+bench starts the farm in background processes and runs full poll cycles
+(fetch_device on every device, the same SNMP work poll_device does, without the
+DB writes) and reports cycle time, per-device latency and failures. Typical sizes:
+1k interfaces = 20 x 50, 10k = 200 x 50, 50k = 1000 x 50.
+
+seed inserts matching Device rows so the real poller can be pointed at the farm
+(start the API or app.poller with SNMP_PORT set to the farm port).
+"""
+import argparse
+import asyncio
+import bisect
+import ipaddress
+import logging
+import multiprocessing
+import queue
+import random
+import socket
+import time
+
+from ..config import SNMP_POLL_INTERVAL, POLL_MAX_CONCURRENT, SNMP_DEFAULT_COMMUNITY
+
+log = logging.getLogger("SNMP_SIMULATOR")
+
+DEFAULT_BASE_ADDRESS = "127.1.0.1"
+DEFAULT_PORT = 1161
+MAX_BULK_VARBINDS = 500  # GETBULK answers are truncated here, as real agents do
+
+SYS_DESCR = (1, 3, 6, 1, 2, 1, 1, 1, 0)
+SYS_UPTIME = (1, 3, 6, 1, 2, 1, 1, 3, 0)
+SYS_NAME = (1, 3, 6, 1, 2, 1, 1, 5, 0)
+IF_ENTRY = (1, 3, 6, 1, 2, 1, 2, 2, 1)
+IF_X_ENTRY = (1, 3, 6, 1, 2, 1, 31, 1, 1, 1)
+LLDP_REM_ENTRY = (1, 0, 8802, 1, 1, 2, 1, 4, 1, 1)
+LLDP_REM_MAN_ADDR_ENTRY = (1, 0, 8802, 1, 1, 2, 1, 4, 2, 1)
+
+# column oid -> name used by SimulatedDevice.interface_value()
+INTERFACE_COLUMNS = {
+    IF_ENTRY + (2,): "descr",
+    IF_ENTRY + (5,): "speed",
+    IF_ENTRY + (6,): "mac",
+    IF_ENTRY + (8,): "oper",
+    IF_ENTRY + (10,): "in_octets",
+    IF_ENTRY + (16,): "out_octets",
+    IF_X_ENTRY + (6,): "hc_in_octets",
+    IF_X_ENTRY + (10,): "hc_out_octets",
+    IF_X_ENTRY + (15,): "high_speed",
+}
+COUNTER64_COLUMNS = ("hc_in_octets", "hc_out_octets")  # not representable in SNMPv1
+
+
+def device_address(base_address, index):
+    return str(ipaddress.IPv4Address(base_address) + index)
+
+
+def raise_file_limit():
+    """Each simulated device holds a socket; lift the soft fd limit as far as the hard limit allows."""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError) as e:
+            log.warning(f"Could not raise open file limit ({soft}): {e}")
+
+
+# --------------------------------------------------------------------------
+# Minimal BER codec for the agent side
+# --------------------------------------------------------------------------
+# pyasn1 costs ~100us per varbind to encode, which would make the farm, not the
+# poller, the bottleneck of a benchmark. Agents only need to parse small request
+# PDUs and emit flat response PDUs, so both directions are hand-rolled here.
+TAG_INTEGER = 0x02
+TAG_OCTET_STRING = 0x04
+TAG_NULL = 0x05
+TAG_OID = 0x06
+TAG_SEQUENCE = 0x30
+TAG_COUNTER32 = 0x41
+TAG_GAUGE32 = 0x42
+TAG_TIMETICKS = 0x43
+TAG_COUNTER64 = 0x46
+TAG_GET = 0xA0
+TAG_GET_NEXT = 0xA1
+TAG_RESPONSE = 0xA2
+TAG_GET_BULK = 0xA5
+
+NO_SUCH_INSTANCE = b"\x81\x00"
+END_OF_MIB_VIEW = b"\x82\x00"
+NULL = b"\x05\x00"
+
+
+def ber_length(n):
+    if n < 0x80:
+        return bytes((n,))
+    body = n.to_bytes((n.bit_length() + 7) // 8, "big")
+    return bytes((0x80 | len(body),)) + body
+
+
+def ber_tlv(tag, payload):
+    return bytes((tag,)) + ber_length(len(payload)) + payload
+
+
+def ber_integer(value, tag=TAG_INTEGER):
+    return ber_tlv(tag, value.to_bytes(value.bit_length() // 8 + 1, "big", signed=True))
+
+
+def ber_unsigned(tag, value):
+    # Counter32/Gauge32/TimeTicks/Counter64: unsigned, with a leading zero byte when the top bit is set
+    return ber_tlv(tag, value.to_bytes(value.bit_length() // 8 + 1, "big"))
+
+
+def ber_octets(value):
+    return ber_tlv(TAG_OCTET_STRING, value if isinstance(value, bytes) else value.encode())
+
+
+def ber_oid(oid):
+    body = bytearray((oid[0] * 40 + oid[1],))
+    for arc in oid[2:]:
+        chunk = bytearray((arc & 0x7F,))
+        arc >>= 7
+        while arc:
+            chunk.insert(0, 0x80 | (arc & 0x7F))
+            arc >>= 7
+        body += chunk
+    return ber_tlv(TAG_OID, bytes(body))
+
+
+def ber_read(data, pos):
+    """-> (tag, payload start, payload end) of the TLV at data[pos]."""
+    tag = data[pos]
+    length = data[pos + 1]
+    pos += 2
+    if length & 0x80:
+        size = length & 0x7F
+        length = int.from_bytes(data[pos:pos + size], "big")
+        pos += size
+    return tag, pos, pos + length
+
+
+def ber_decode_oid(payload):
+    first = payload[0]
+    oid = [first // 40, first % 40] if first < 80 else [2, first - 80]
+    arc = 0
+    for byte in payload[1:]:
+        arc = (arc << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            oid.append(arc)
+            arc = 0
+    return tuple(oid)
+
+
+def parse_request(data):
+    """SNMPv1/v2c request -> (version, community, pdu tag, request id, non_repeaters, max_repetitions, oids)."""
+    _, pos, _ = ber_read(data, 0)  # Message SEQUENCE
+    _, start, end = ber_read(data, pos)
+    version = int.from_bytes(data[start:end], "big")
+    _, start, end = ber_read(data, end)
+    community = bytes(data[start:end])
+    pdu_tag, pos, _ = ber_read(data, end)
+    fields = []
+    for _ in range(3):  # request-id, error-status/non-repeaters, error-index/max-repetitions
+        _, start, end = ber_read(data, pos)
+        fields.append(int.from_bytes(data[start:end], "big", signed=True))
+        pos = end
+    _, pos, list_end = ber_read(data, pos)  # VarBindList
+    oids = []
+    while pos < list_end:
+        _, vb_start, vb_end = ber_read(data, pos)
+        _, start, end = ber_read(data, vb_start)
+        oids.append(ber_decode_oid(data[start:end]))
+        pos = vb_end
+    return version, community, pdu_tag, fields[0], fields[1], fields[2], oids
+
+
+def encode_response(version, community, request_id, var_binds, error_status=0, error_index=0):
+    """var_binds: [(encoded oid TLV, encoded value TLV), ...]"""
+    body = b"".join(ber_tlv(TAG_SEQUENCE, oid + value) for oid, value in var_binds)
+    pdu = ber_integer(request_id) + ber_integer(error_status) + ber_integer(error_index) + ber_tlv(TAG_SEQUENCE, body)
+    message = ber_integer(version) + ber_octets(community) + ber_tlv(TAG_RESPONSE, pdu)
+    return ber_tlv(TAG_SEQUENCE, message)
+
+
+# --------------------------------------------------------------------------
+# Farm layout
+# --------------------------------------------------------------------------
+class FarmSpec:
+    """Everything that defines the farm; picklable so worker processes rebuild the same devices."""
+
+    def __init__(self, devices=100, interfaces=48, base_address=DEFAULT_BASE_ADDRESS, port=DEFAULT_PORT,
+                 port_per_device=False, community=SNMP_DEFAULT_COMMUNITY, latency=0.0, jitter=0.0, loss=0.0,
+                 dead=0.0, slow=0.0, slow_latency=5.0, seed=1):
+        self.devices = devices
+        self.interfaces = interfaces
+        self.base_address = base_address
+        self.port = port
+        self.port_per_device = port_per_device
+        self.community = community
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.dead = dead
+        self.slow = slow
+        self.slow_latency = slow_latency
+        self.seed = seed
+
+    def endpoint(self, index):
+        if self.port_per_device:
+            return "127.0.0.1", self.port + index
+        return device_address(self.base_address, index), self.port
+
+    def endpoints(self):
+        return [self.endpoint(index) for index in range(self.devices)]
+
+    def hostname(self, index):
+        return f"sim-{index + 1:05d}"
+
+    def condition(self, index):
+        """'dead', 'slow' or 'ok' - fixed per device for a given seed."""
+        draw = random.Random(self.seed * 1_000_003 + index).random()
+        if draw < self.dead:
+            return "dead"
+        if draw < self.dead + self.slow:
+            return "slow"
+        return "ok"
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(
+            devices=args.devices, interfaces=args.interfaces, base_address=args.base_address, port=args.port,
+            port_per_device=args.port_per_device, community=args.community, latency=args.latency,
+            jitter=args.jitter, loss=args.loss, dead=args.dead, slow=args.slow, slow_latency=args.slow_latency,
+            seed=args.seed,
+        )
+
+
+class InterfaceTree:
+    """Sorted OIDs of the system group + ifTable + ifXTable, shared by every device of the farm."""
+
+    def __init__(self, interfaces):
+        entries = {SYS_DESCR: ("sys", "descr"), SYS_UPTIME: ("sys", "uptime"), SYS_NAME: ("sys", "name")}
+        for column_oid, column in INTERFACE_COLUMNS.items():
+            for if_index in range(1, interfaces + 1):
+                entries[column_oid + (if_index,)] = (column, if_index)
+        self.entries = entries
+        self.encoded = {oid: ber_oid(oid) for oid in entries}
+        self.keys = sorted(entries)
+        # SNMPv1 view: Counter64 columns are skipped by GETNEXT
+        self.v1_keys = [k for k in self.keys if entries[k][0] not in COUNTER64_COLUMNS]
+
+
+# --------------------------------------------------------------------------
+# One simulated agent
+# --------------------------------------------------------------------------
+class SimulatedDevice(asyncio.DatagramProtocol):
+
+    def __init__(self, spec, tree, index, started):
+        self.spec = spec
+        self.tree = tree
+        self.index = index
+        self.hostname = spec.hostname(index)
+        self.condition = spec.condition(index)
+        self.community = spec.community.encode()
+        # booted some time before the farm started, so uptimes and counters differ per device
+        self.booted = started - (index * 7919) % 86400
+        self.rng = random.Random(spec.seed + index)
+        self._transport = None
+        self.requests = 0
+        self.lldp = self._build_lldp()  # oid -> encoded value
+        self.lldp_keys = sorted(self.lldp)
+        self.lldp_encoded = {oid: ber_oid(oid) for oid in self.lldp}
+
+    def _build_lldp(self):
+        """Ring topology: ifIndex 1 faces the previous device, ifIndex 2 the next one."""
+        count = self.spec.devices
+        if count < 2 or self.spec.interfaces < 2:
+            return {}
+        rows = {}
+        for local_port, peer, peer_port in ((1, (self.index - 1) % count, 2), (2, (self.index + 1) % count, 1)):
+            index = (0, local_port, 1)
+            rows[LLDP_REM_ENTRY + (8,) + index] = ber_octets(f"Gi0/{peer_port}")
+            rows[LLDP_REM_ENTRY + (9,) + index] = ber_octets(self.spec.hostname(peer))
+            address = self.spec.endpoint(peer)[0]
+            addr_index = index + (1, 4) + tuple(int(part) for part in address.split("."))
+            rows[LLDP_REM_MAN_ADDR_ENTRY + (4,) + addr_index] = ber_integer(2)  # ifIndex addressing
+        return rows
+
+    # ------------------------------------------------------------------
+    # MIB values
+    # ------------------------------------------------------------------
+    def _octets(self, if_index, direction, uptime):
+        # steady per-interface rate between ~0.1 and ~100 MB/s
+        rate = ((self.index * 131 + if_index * 7 + direction * 3) % 1000 + 1) * 100_000
+        return int(rate * uptime)
+
+    def interface_value(self, column, if_index, now):
+        uptime = now - self.booted
+        if column == "descr":
+            return ber_octets(f"Gi0/{if_index}")
+        if column == "speed":
+            return ber_unsigned(TAG_GAUGE32, 1_000_000_000)
+        if column == "high_speed":
+            return ber_unsigned(TAG_GAUGE32, 1000)
+        if column == "mac":
+            return ber_octets(bytes((0x02, self.index >> 16 & 0xFF, self.index >> 8 & 0xFF,
+                                     self.index & 0xFF, if_index >> 8 & 0xFF, if_index & 0xFF)))
+        if column == "oper":
+            return ber_integer(2 if if_index % 10 == 0 else 1)
+        if column in ("in_octets", "out_octets"):
+            return ber_unsigned(TAG_COUNTER32, self._octets(if_index, column == "out_octets", uptime) % 2 ** 32)
+        if column in ("hc_in_octets", "hc_out_octets"):
+            return ber_unsigned(TAG_COUNTER64, self._octets(if_index, column == "hc_out_octets", uptime) % 2 ** 64)
+        if if_index == "uptime":
+            return ber_unsigned(TAG_TIMETICKS, int(uptime * 100) % 2 ** 32)
+        if if_index == "name":
+            return ber_octets(self.hostname)
+        return ber_octets("NMS simulated switch")
+
+    def value(self, oid, now, v1):
+        entry = self.tree.entries.get(oid)
+        if entry is not None:
+            if v1 and entry[0] in COUNTER64_COLUMNS:
+                return None
+            return self.interface_value(entry[0], entry[1], now)
+        return self.lldp.get(oid)
+
+    def encoded_oid(self, oid):
+        encoded = self.tree.encoded.get(oid) or self.lldp_encoded.get(oid)
+        return encoded if encoded is not None else ber_oid(oid)
+
+    def next_oid(self, oid, v1):
+        """Lexicographic successor of `oid` in this device's MIB view, or None at the end."""
+        keys = self.tree.v1_keys if v1 else self.tree.keys
+        candidates = []
+        i = bisect.bisect_right(keys, oid)
+        if i < len(keys):
+            candidates.append(keys[i])
+        i = bisect.bisect_right(self.lldp_keys, oid)
+        if i < len(self.lldp_keys):
+            candidates.append(self.lldp_keys[i])
+        return min(candidates) if candidates else None
+
+    def next_var_bind(self, oid, now, v1):
+        nxt = self.next_oid(oid, v1)
+        if nxt is None:
+            return None
+        return nxt, (self.encoded_oid(nxt), self.value(nxt, now, v1))
+
+    # ------------------------------------------------------------------
+    # Request handling
+    # ------------------------------------------------------------------
+    def connection_made(self, transport):
+        self._transport = transport
+
+    def datagram_received(self, data, addr):
+        if self.condition == "dead":
+            return
+        if self.spec.loss and self.rng.random() < self.spec.loss:
+            return
+        try:
+            response = self.respond(data)
+        except Exception as e:
+            log.debug(f"{self.hostname}: dropping bad request from {addr}: {e}")
+            return
+        if response is None:
+            return
+        self.requests += 1
+        delay = self.spec.slow_latency if self.condition == "slow" else self.spec.latency
+        if self.spec.jitter:
+            delay += self.rng.uniform(0, self.spec.jitter)
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._send, response, addr)
+        else:
+            self._send(response, addr)
+
+    def _send(self, data, addr):
+        if self._transport is not None:
+            self._transport.sendto(data, addr)
+
+    def respond(self, data):
+        version, community, pdu_tag, request_id, non_repeaters, max_repetitions, oids = parse_request(data)
+        if community != self.community:
+            return None  # wrong community: agents stay silent
+        v1 = version == 0
+        now = time.monotonic()
+        var_binds = []
+
+        if pdu_tag == TAG_GET:
+            for n, oid in enumerate(oids):
+                value = self.value(oid, now, v1)
+                if value is None:
+                    if v1:
+                        return self._error(version, community, request_id, oids, n + 1)
+                    value = NO_SUCH_INSTANCE
+                var_binds.append((self.encoded_oid(oid), value))
+
+        elif pdu_tag == TAG_GET_NEXT:
+            for n, oid in enumerate(oids):
+                found = self.next_var_bind(oid, now, v1)
+                if found is None:
+                    if v1:
+                        return self._error(version, community, request_id, oids, n + 1)
+                    var_binds.append((self.encoded_oid(oid), END_OF_MIB_VIEW))
+                else:
+                    var_binds.append(found[1])
+
+        elif pdu_tag == TAG_GET_BULK and not v1:
+            non_repeaters = max(min(non_repeaters, len(oids)), 0)
+            for oid in oids[:non_repeaters]:
+                found = self.next_var_bind(oid, now, False)
+                var_binds.append(found[1] if found else (self.encoded_oid(oid), END_OF_MIB_VIEW))
+            cursor = oids[non_repeaters:]
+            for _ in range(max_repetitions):
+                if not cursor or len(var_binds) + len(cursor) > MAX_BULK_VARBINDS:
+                    break
+                advanced = []
+                for oid in cursor:
+                    found = self.next_var_bind(oid, now, False)
+                    if found is None:
+                        var_binds.append((self.encoded_oid(oid), END_OF_MIB_VIEW))
+                        advanced.append(oid)
+                    else:
+                        var_binds.append(found[1])
+                        advanced.append(found[0])
+                if advanced == cursor:
+                    break  # every column is past the end of the MIB
+                cursor = advanced
+        else:
+            return None
+
+        return encode_response(version, community, request_id, var_binds)
+
+    def _error(self, version, community, request_id, oids, index):
+        """SNMPv1 noSuchName: the request varbinds come back unchanged with error-status 2."""
+        var_binds = [(self.encoded_oid(oid), NULL) for oid in oids]
+        return encode_response(version, community, request_id, var_binds, error_status=2, error_index=index)
+
+
+# --------------------------------------------------------------------------
+# Farm (one process serves every device with index % workers == worker)
+# --------------------------------------------------------------------------
+async def serve_farm(spec, worker=0, workers=1, ready=None):
+    raise_file_limit()
+    loop = asyncio.get_running_loop()
+    tree = InterfaceTree(spec.interfaces)
+    started = time.monotonic()
+    agents = []
+    for index in range(worker, spec.devices, workers):
+        agent = SimulatedDevice(spec, tree, index, started)
+        await loop.create_datagram_endpoint(lambda agent=agent: agent, local_addr=spec.endpoint(index),
+                                            family=socket.AF_INET)
+        agents.append(agent)
+    conditions = [a.condition for a in agents]
+    log.info(
+        f"Simulating {len(agents)} devices x {spec.interfaces} interfaces "
+        f"({conditions.count('dead')} dead, {conditions.count('slow')} slow)"
+    )
+    if ready is not None:
+        ready.put(len(agents))
+    while True:
+        await asyncio.sleep(60)
+        log.info(f"Answered {sum(a.requests for a in agents)} requests")
+
+
+def _farm_worker(spec, worker, workers, ready):
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s [%(levelname)s] [farm {worker + 1}/{workers}] %(message)s",
+        force=True,
+    )
+    try:
+        asyncio.run(serve_farm(spec, worker, workers, ready))
+    except KeyboardInterrupt:
+        pass
+
+
+def start_farm(spec, processes, timeout=120):
+    """Start the farm in `processes` background processes and wait until every socket is bound."""
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Queue()
+    procs = [
+        ctx.Process(target=_farm_worker, args=(spec, worker, processes, ready), name=f"snmp-farm-{worker + 1}",
+                    daemon=True)
+        for worker in range(processes)
+    ]
+    for proc in procs:
+        proc.start()
+    deadline = time.monotonic() + timeout
+    started = 0
+    while started < len(procs):
+        try:
+            ready.get(timeout=1)
+            started += 1
+        except queue.Empty:
+            if any(not proc.is_alive() for proc in procs) or time.monotonic() > deadline:
+                stop_farm(procs)
+                raise RuntimeError("SNMP agent farm failed to start (see farm log above)")
+    return procs
+
+
+def stop_farm(procs):
+    for proc in procs:
+        if proc.is_alive():
+            proc.terminate()
+    for proc in procs:
+        proc.join(5)
+
+
+# --------------------------------------------------------------------------
+# Poll-cycle benchmark
+# --------------------------------------------------------------------------
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+async def run_bench(spec, cycles=5, interval=SNMP_POLL_INTERVAL, concurrency=POLL_MAX_CONCURRENT, version="2c"):
+    from .snmp_engine import fetch_device
+    from .snmp_transport import get_transport, close_transport
+    from .counters import CounterCache
+    from .poll_governor import Limiter
+
+    raise_file_limit()
+    loop = asyncio.get_running_loop()
+    limiter = Limiter(concurrency)
+    counters = CounterCache()
+    endpoints = spec.endpoints()
+    transport = get_transport()
+    results = []
+
+    async def poll_one(index, host, port):
+        await limiter.acquire()
+        try:
+            start = loop.time()
+            if_table, uptime, neighbors = await fetch_device(host, spec.community, version, port)
+            sampled_at = loop.time()
+        finally:
+            limiter.release()
+        rates = 0
+        for if_index, row in (if_table or {}).items():
+            hc = "hc_in_octets" in row and "hc_out_octets" in row
+            in_oct = int(row["hc_in_octets"] if hc else row.get("in_octets", 0))
+            out_oct = int(row["hc_out_octets"] if hc else row.get("out_octets", 0))
+            if counters.update(index, if_index, in_oct, out_oct, sampled_at, uptime, hc):
+                rates += 1
+        return sampled_at - start, len(if_table or {}), len(neighbors or {}), rates
+
+    try:
+        next_start = loop.time()
+        for cycle in range(1, cycles + 1):
+            await asyncio.sleep(max(next_start - loop.time(), 0))
+            before = transport.stats()
+            start = loop.time()
+            polled = await asyncio.gather(*(poll_one(i, host, port) for i, (host, port) in enumerate(endpoints)))
+            elapsed = loop.time() - start
+            after = transport.stats()
+
+            durations = [p[0] for p in polled]
+            interfaces = sum(p[1] for p in polled)
+            result = {
+                "cycle": cycle,
+                "seconds": elapsed,
+                "devices": len(polled),
+                "failed": sum(1 for p in polled if not p[1]),
+                "interfaces": interfaces,
+                "interfaces_per_sec": interfaces / elapsed if elapsed else 0.0,
+                "neighbors": sum(p[2] for p in polled),
+                "rates": sum(p[3] for p in polled),
+                "device_p50": _percentile(durations, 50),
+                "device_p95": _percentile(durations, 95),
+                "device_max": max(durations, default=0.0),
+                "requests": after["sent"] - before["sent"],
+                "retransmits": after["retransmits"] - before["retransmits"],
+                "timeouts": after["timeouts"] - before["timeouts"],
+                "overrun": elapsed > interval,
+            }
+            results.append(result)
+            log.info(
+                f"cycle {cycle}/{cycles}: {result['devices']} devices, {interfaces} interfaces in {elapsed:.2f}s "
+                f"({result['interfaces_per_sec']:.0f} if/s) | device p50 {result['device_p50']:.3f}s "
+                f"p95 {result['device_p95']:.3f}s max {result['device_max']:.3f}s | failed {result['failed']} | "
+                f"requests {result['requests']} retransmits {result['retransmits']} timeouts {result['timeouts']} | "
+                f"rates {result['rates']}" + (f" | OVERRUN (interval {interval}s)" if result["overrun"] else "")
+            )
+            next_start = start + interval
+    finally:
+        close_transport()
+    return results
+
+
+# --------------------------------------------------------------------------
+# Seed the inventory with the farm's devices
+# --------------------------------------------------------------------------
+async def seed_devices(spec, version="2c", site_id=None):
+    from sqlalchemy.future import select
+    from ..database import async_session, init_db
+    from ..models import Device
+
+    if spec.port_per_device:
+        raise SystemExit("seed needs one address per device (Device has no port column); drop --port-per-device")
+    await init_db()
+    async with async_session() as session:
+        q = await session.execute(select(Device.ip_address))
+        existing = set(q.scalars().all())
+        added = 0
+        for index, (host, _) in enumerate(spec.endpoints()):
+            if host in existing:
+                continue
+            session.add(Device(
+                hostname=spec.hostname(index),
+                ip_address=host,
+                device_type="switch",
+                site_id=site_id,
+                snmp_community=spec.community,
+                snmp_version=version,
+                status="unknown",
+            ))
+            added += 1
+        await session.commit()
+    log.info(f"Added {added} simulated devices ({spec.devices - added} already present); "
+             f"poll them with SNMP_PORT={spec.port}")
+
+
+# --------------------------------------------------------------------------
+# CLI
+# --------------------------------------------------------------------------
+def _farm_arguments(parser):
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--interfaces", type=int, default=48, help="interfaces per device")
+    parser.add_argument("--base-address", default=DEFAULT_BASE_ADDRESS, help="address of the first device")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--port-per-device", action="store_true",
+                        help="serve every device on 127.0.0.1, device N on port + N")
+    parser.add_argument("--community", default=SNMP_DEFAULT_COMMUNITY)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency, 0..jitter seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="fraction of requests dropped")
+    parser.add_argument("--dead", type=float, default=0.0, help="fraction of devices that never answer")
+    parser.add_argument("--slow", type=float, default=0.0, help="fraction of devices answering after --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=5.0,
+                        help="seconds; the default outlasts SNMP_TIMEOUT x (SNMP_RETRIES + 1)")
+    parser.add_argument("--seed", type=int, default=1, help="picks which devices are dead/slow")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.utils.snmp_simulator", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="run the agent farm in the foreground")
+    _farm_arguments(serve)
+    serve.add_argument("--processes", type=int, default=1)
+
+    bench = commands.add_parser("bench", help="start the farm and time full poll cycles against it")
+    _farm_arguments(bench)
+    bench.add_argument("--processes", type=int, default=max((multiprocessing.cpu_count() or 2) - 1, 1),
+                       help="farm processes (the benchmark itself runs in this process)")
+    bench.add_argument("--cycles", type=int, default=5)
+    bench.add_argument("--interval", type=float, default=SNMP_POLL_INTERVAL)
+    bench.add_argument("--concurrency", type=int, default=POLL_MAX_CONCURRENT, help="devices polled at once")
+    bench.add_argument("--snmp-version", default="2c")
+
+    seed = commands.add_parser("seed", help="insert the farm's devices into the inventory")
+    _farm_arguments(seed)
+    seed.add_argument("--snmp-version", default="2c")
+    seed.add_argument("--site-id", type=int, default=None)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s", force=True)
+    spec = FarmSpec.from_args(args)
+
+    if args.command == "serve":
+        if args.processes <= 1:
+            try:
+                asyncio.run(serve_farm(spec))
+            except KeyboardInterrupt:
+                pass
+            return
+        procs = start_farm(spec, args.processes)
+        try:
+            for proc in procs:
+                proc.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop_farm(procs)
+
+    elif args.command == "bench":
+        procs = start_farm(spec, args.processes)
+        try:
+            results = asyncio.run(run_bench(spec, args.cycles, args.interval, args.concurrency, args.snmp_version))
+        finally:
+            stop_farm(procs)
+        # first cycle has no previous counters, so judge steady state on the rest
+        steady = results[1:] or results
+        log.info(
+            f"{spec.devices} devices x {spec.interfaces} interfaces: "
+            f"median cycle {_percentile([r['seconds'] for r in steady], 50):.2f}s, "
+            f"worst {max(r['seconds'] for r in steady):.2f}s, "
+            f"{sum(r['overrun'] for r in steady)}/{len(steady)} cycles over the {args.interval}s interval"
+        )
+
+    elif args.command == "seed":
+        asyncio.run(seed_devices(spec, args.snmp_version, args.site_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# backend/app/utils/snmp_transport.py
+import asyncio
+import ipaddress
+import logging
+import random
+import socket
+
+from pyasn1.codec.ber import encoder, decoder
+from pysnmp.proto import api
+
+from ..config import SNMP_SOCKET_BUFFER
+from .poll_governor import governor
+
+log = logging.getLogger("SNMP_TRANSPORT")
+
+# Version names accepted by the transport (mirrors pysnmp mpModel numbering)
+SNMP_V1 = api.protoVersion1
+SNMP_V2C = api.protoVersion2c
+
+
+# --------------------------------------------------------------------------
+# Shared asyncio UDP transport
+# --------------------------------------------------------------------------
+class SnmpTransport(asyncio.DatagramProtocol):
+    """
+    One UDP socket shared by every SNMP request issued from this event loop.
+
+    Requests are multiplexed by SNMP request-id: each outstanding request owns a
+    future in `_pending`, and `datagram_received` resolves it when the matching
+    response arrives. No threads and no per-request SnmpEngine are involved, so
+    thousands of requests can be in flight at once.
+    """
+
+    def __init__(self):
+        self._transport = None
+        self._loop = None
+        self._lock = asyncio.Lock()
+        self._pending = {}  # request_id -> (address, future)
+        self._next_id = random.randrange(1, 0x7FFFFFFF)
+        self._addresses = {}  # hostname -> resolved IPv4 address
+        self.sent = 0  # datagrams sent, including retransmissions
+        self.retransmits = 0
+        self.timeouts = 0  # requests that got no answer after all retries
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    async def start(self):
+        if self._transport is not None:
+            return
+        async with self._lock:
+            if self._transport is not None:
+                return
+            self._loop = asyncio.get_running_loop()
+            transport, _ = await self._loop.create_datagram_endpoint(
+                lambda: self, local_addr=("0.0.0.0", 0), family=socket.AF_INET
+            )
+            sock = transport.get_extra_info("socket")
+            if sock is not None and SNMP_SOCKET_BUFFER:
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SNMP_SOCKET_BUFFER)
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SNMP_SOCKET_BUFFER)
+                except OSError as e:
+                    log.debug(f"Could not resize SNMP socket buffers: {e}")
+            self._transport = transport
+            log.info(f"SNMP transport listening on {transport.get_extra_info('sockname')}")
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        for _, fut in self._pending.values():
+            if not fut.done():
+                fut.cancel()
+        self._pending.clear()
+
+    @property
+    def loop(self):
+        return self._loop
+
+    @property
+    def in_flight(self):
+        return len(self._pending)
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "sent": self.sent,
+            "retransmits": self.retransmits,
+            "timeouts": self.timeouts,
+        }
+
+    # ------------------------------------------------------------------
+    # asyncio.DatagramProtocol callbacks
+    # ------------------------------------------------------------------
+    def connection_lost(self, exc):
+        self._transport = None
+
+    def datagram_received(self, data, addr):
+        try:
+            version = int(api.decodeMessageVersion(data))
+            proto = api.protoModules[version]
+            msg, _ = decoder.decode(data, asn1Spec=proto.Message())
+            pdu = proto.apiMessage.getPDU(msg)
+            request_id = int(proto.apiPDU.getRequestID(pdu))
+        except Exception as e:
+            log.debug(f"Dropping undecodable SNMP datagram from {addr}: {e}")
+            return
+
+        entry = self._pending.get(request_id)
+        if entry is None:
+            # late answer to a request that already timed out
+            return
+        address, fut = entry
+        if addr[0] != address[0] or addr[1] != address[1]:
+            log.debug(f"Ignoring SNMP response id={request_id} from unexpected peer {addr}")
+            return
+        if not fut.done():
+            fut.set_result(pdu)
+
+    def error_received(self, exc):
+        log.debug(f"SNMP socket error: {exc}")
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def _allocate_request_id(self):
+        while True:
+            request_id = self._next_id
+            self._next_id = self._next_id + 1 if self._next_id < 0x7FFFFFFF else 1
+            if request_id not in self._pending:
+                return request_id
+
+    async def _resolve(self, host):
+        address = self._addresses.get(host)
+        if address is not None:
+            return address
+        try:
+            address = str(ipaddress.IPv4Address(host))
+        except ValueError:
+            infos = await self._loop.getaddrinfo(host, None, family=socket.AF_INET, type=socket.SOCK_DGRAM)
+            address = infos[0][4][0]
+        self._addresses[host] = address
+        return address
+
+    # ------------------------------------------------------------------
+    # Request / response
+    # ------------------------------------------------------------------
+    async def request(self, host, port, community, version, pdu, timeout=2, retries=1):
+        """
+        Send `pdu` to host:port and wait for the matching response PDU.
+        Returns the response PDU, or None if no answer arrived after all retries.
+        """
+        await self.start()
+        await governor.pace(host)
+        proto = api.protoModules[version]
+        address = (await self._resolve(host), port)
+
+        request_id = self._allocate_request_id()
+        proto.apiPDU.setRequestID(pdu, request_id)
+        msg = proto.Message()
+        proto.apiMessage.setDefaults(msg)
+        proto.apiMessage.setCommunity(msg, community)
+        proto.apiMessage.setPDU(msg, pdu)
+        data = encoder.encode(msg)
+
+        fut = self._loop.create_future()
+        self._pending[request_id] = (address, fut)
+        try:
+            for attempt in range(retries + 1):
+                if self._transport is None:
+                    return None
+                self._transport.sendto(data, address)
+                self.sent += 1
+                if attempt:
+                    self.retransmits += 1
+                try:
+                    return await asyncio.wait_for(asyncio.shield(fut), timeout)
+                except asyncio.TimeoutError:
+                    continue
+            self.timeouts += 1
+            return None
+        finally:
+            self._pending.pop(request_id, None)
+            if not fut.done():
+                fut.cancel()
+
+    @staticmethod
+    def _unpack(proto, rsp):
+        """Response PDU -> (error_status, error_index, [(ObjectName, value), ...]), or None on timeout."""
+        if rsp is None:
+            return None
+        return (
+            int(proto.apiPDU.getErrorStatus(rsp)),
+            int(proto.apiPDU.getErrorIndex(rsp)),
+            proto.apiPDU.getVarBinds(rsp),
+        )
+
+    async def get(self, host, oids, community="public", version=SNMP_V1, port=161, timeout=2, retries=1):
+        proto = api.protoModules[version]
+        pdu = proto.GetRequestPDU()
+        proto.apiPDU.setDefaults(pdu)
+        proto.apiPDU.setVarBinds(pdu, [(oid, proto.Null("")) for oid in oids])
+        return self._unpack(proto, await self.request(host, port, community, version, pdu, timeout, retries))
+
+    async def get_next(self, host, oids, community="public", version=SNMP_V1, port=161, timeout=2, retries=1):
+        proto = api.protoModules[version]
+        pdu = proto.GetNextRequestPDU()
+        proto.apiPDU.setDefaults(pdu)
+        proto.apiPDU.setVarBinds(pdu, [(oid, proto.Null("")) for oid in oids])
+        return self._unpack(proto, await self.request(host, port, community, version, pdu, timeout, retries))
+
+    async def get_bulk(self, host, oids, max_repetitions, community="public", version=SNMP_V2C, port=161,
+                       timeout=2, retries=1, non_repeaters=0):
+        """GETBULK (SNMPv2c only). Returns the flat var-bind list in response order."""
+        proto = api.protoModules[version]
+        pdu = proto.GetBulkRequestPDU()
+        proto.apiBulkPDU.setDefaults(pdu)
+        proto.apiBulkPDU.setNonRepeaters(pdu, non_repeaters)
+        proto.apiBulkPDU.setMaxRepetitions(pdu, max_repetitions)
+        proto.apiBulkPDU.setVarBinds(pdu, [(oid, proto.Null("")) for oid in oids])
+        return self._unpack(proto, await self.request(host, port, community, version, pdu, timeout, retries))
+
+
+# --------------------------------------------------------------------------
+# Per-loop singleton
+# --------------------------------------------------------------------------
+_transport = None
+
+
+def get_transport():
+    """Return the SNMP transport owned by the running event loop (created on first use)."""
+    global _transport
+    loop = asyncio.get_running_loop()
+    if _transport is None or (_transport.loop is not None and _transport.loop is not loop):
+        if _transport is not None:
+            _transport.close()
+        _transport = SnmpTransport()
+    return _transport
+
+
+def close_transport():
+    global _transport
+    if _transport is not None:
+        _transport.close()
+        _transport = None
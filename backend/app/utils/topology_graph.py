@@ -0,0 +1,445 @@
+# backend/app/utils/topology_graph.py
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from ..config import TOPOLOGY_SNAPSHOT_MAX_AGE, TOPOLOGY_ROOT_DEVICE_TYPES
+from ..database import async_session
+from ..models import Device, TopologyLink
+
+log = logging.getLogger("TOPOLOGY")
+
+# live_channel events that change the device set (published by the devices router)
+DEVICE_EVENTS = ("device_added", "device_removed")
+
+
+async def load_graph(session):
+    """(nodes, edges) of the whole topology: one query for devices, one join for links with both hostnames."""
+    q = await session.execute(
+        select(Device.id, Device.hostname, Device.ip_address, Device.site_id, Device.device_type)
+        .order_by(Device.id)
+    )
+    nodes = [
+        {"id": r.id, "hostname": r.hostname, "ip_address": r.ip_address, "site_id": r.site_id,
+         "device_type": r.device_type}
+        for r in q.all()
+    ]
+
+    src = aliased(Device)
+    dst = aliased(Device)
+    q = await session.execute(
+        select(
+            TopologyLink.id,
+            TopologyLink.src_device_id,
+            TopologyLink.src_interface,
+            TopologyLink.dst_device_id,
+            TopologyLink.dst_interface,
+            src.hostname.label("src_device_name"),
+            dst.hostname.label("dst_device_name"),
+        )
+        .outerjoin(src, src.id == TopologyLink.src_device_id)
+        .outerjoin(dst, dst.id == TopologyLink.dst_device_id)
+        .order_by(TopologyLink.id)
+    )
+    edges = [dict(r._mapping) for r in q.all()]
+    return nodes, edges
+
+
+# --------------------------------------------------------------------------
+# Cached graph snapshot (API process)
+# --------------------------------------------------------------------------
+class TopologySnapshot:
+    """
+    The serialized /topology/graph response, built from two queries and reused by
+    every request until it is invalidated: by "topology_changed" live events (LLDP
+    created links), by device added/removed live events from any API
+    worker, or after `max_age` seconds as a safety net.
+    The ETag is a hash of the content, so it is the same in every worker and an
+    unchanged graph is still "not modified" after a rebuild.
+    """
+
+    def __init__(self, max_age=TOPOLOGY_SNAPSHOT_MAX_AGE):
+        self.max_age = max_age
+        self.etag = None
+        self.version = 0
+        self.body = None
+        self.nodes = []
+        self.edges = []
+        self.rebuilds = 0
+        self._built_at = 0.0
+        self._dirty = True
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self._dirty = True
+
+    def on_event(self, event):
+        """live_channel subscriber."""
+        if event.get("type") in DEVICE_EVENTS or event.get("type") == "topology_changed":
+            self.invalidate()
+
+    def _fresh(self):
+        return not self._dirty and time.monotonic() - self._built_at < self.max_age
+
+    async def get(self):
+        """-> (etag, serialized JSON body), rebuilding first if stale."""
+        if not self._fresh():
+            async with self._lock:
+                if not self._fresh():  # another request may have rebuilt it meanwhile
+                    await self._rebuild()
+        return self.etag, self.body
+
+    async def _rebuild(self):
+        self._dirty = False  # changes arriving during the rebuild mark it dirty again
+        try:
+            async with async_session() as session:
+                nodes, edges = await load_graph(session)
+        except Exception:
+            self._dirty = True
+            raise
+        content = json.dumps({"nodes": nodes, "edges": edges}, separators=(",", ":"))
+        etag = '"' + hashlib.sha1(content.encode()).hexdigest()[:20] + '"'
+        if etag != self.etag:
+            self.version += 1
+            self.etag = etag
+            self.nodes, self.edges = nodes, edges
+            self.body = f'{{"version":{self.version},"etag":{json.dumps(etag)},{content[1:]}'.encode()
+            log.info(f"Topology snapshot v{self.version}: {len(nodes)} nodes, {len(edges)} edges")
+        self._built_at = time.monotonic()
+        self.rebuilds += 1
+
+
+# One snapshot per API process
+topology_snapshot = TopologySnapshot()
+
+
+# --------------------------------------------------------------------------
+# Graph algorithms on a plain adjacency mapping (run in worker threads)
+# --------------------------------------------------------------------------
+def reach(adjacency, starts, blocked=frozenset()):
+    """Nodes connected to `starts` without crossing `blocked` (BFS)."""
+    starts = {n for n in starts if n in adjacency and n not in blocked}
+    seen = set(blocked) | starts  # blocked nodes count as visited so they are never crossed
+    frontier = list(starts)
+    while frontier:
+        next_frontier = []
+        for node in frontier:
+            for neighbor in adjacency[node]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return seen - set(blocked)
+
+
+def cut_off(adjacency, roots, failed):
+    """Nodes connected to `roots` that lose every path to them once the `failed` nodes go down."""
+    alive = [n for n in roots if n not in failed]
+    return reach(adjacency, roots) - reach(adjacency, alive, failed) - failed
+
+
+def connected_components(adjacency):
+    """Components as sorted node lists, largest first."""
+    remaining = set(adjacency)
+    result = []
+    while remaining:
+        component = reach(adjacency, [next(iter(remaining))])
+        remaining -= component
+        result.append(sorted(component))
+    result.sort(key=len, reverse=True)
+    return result
+
+
+def dominator_tree(adjacency, roots):
+    """
+    idom children lists for the graph seen from a virtual source linked to every
+    root (Cooper-Harvey-Kennedy iteration in reverse postorder): node v dominates
+    w when every path from the roots to w crosses v.
+    """
+    source = object()
+    successors = lambda n: roots if n is source else adjacency[n]
+    # iterative DFS postorder from the virtual source
+    postorder, index = [], {}
+    visited = {source}
+    stack = [(source, iter(successors(source)))]
+    while stack:
+        node, children = stack[-1]
+        for child in children:
+            if child not in visited:
+                visited.add(child)
+                stack.append((child, iter(successors(child))))
+                break
+        else:
+            stack.pop()
+            index[node] = len(postorder)
+            postorder.append(node)
+
+    root_set = set(roots)
+    idom = {source: source}
+
+    def intersect(a, b):
+        while a is not b and a != b:
+            while index[a] < index[b]:
+                a = idom[a]
+            while index[b] < index[a]:
+                b = idom[b]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+        for node in reversed(postorder[:-1]):  # the source is last in postorder
+            new = source if node in root_set else None
+            for pred in adjacency[node]:
+                if pred in idom:
+                    new = pred if new is None else intersect(pred, new)
+            if idom.get(node) != new:
+                idom[node] = new
+                changed = True
+
+    tree = {}
+    for node, parent in idom.items():
+        if node is not source:
+            tree.setdefault(parent, []).append(node)
+    return tree
+
+
+# --------------------------------------------------------------------------
+# Adjacency-list graph engine (API process)
+# --------------------------------------------------------------------------
+class TopologyGraph:
+    """
+    Undirected device graph for path and blast-radius queries: node -> {neighbor:
+    number of links}, plus node attributes and a site index. Loaded from the DB on
+    first use (and again after `max_age` seconds), then kept current incrementally:
+    links created by LLDP arrive in "topology_changed" live events, device
+    additions and removals in device_added/device_removed live events (the
+    devices router publishes them, including to this process). Paths are
+    bidirectional BFS.
+
+    Components and impact need whole-graph passes: they run in a worker thread
+    on a copy of the adjacency taken once per graph version, so they never hold
+    up the event loop (polling, WebSocket pushes), and are cached per version.
+    The dominator tree behind single-device impact is rebuilt in the background
+    after a change while the last complete tree keeps answering.
+    """
+
+    def __init__(self, max_age=TOPOLOGY_SNAPSHOT_MAX_AGE, root_types=TOPOLOGY_ROOT_DEVICE_TYPES):
+        self.max_age = max_age
+        self.root_types = set(root_types)
+        self.adjacency = {}
+        self.attrs = {}  # node -> {"hostname", "site_id", "device_type"}
+        self.sites = {}  # site_id -> {node}
+        self.version = 0
+        self._components = None  # (version, [sorted node lists, largest first])
+        self._cache = {}  # "roots" -> (version, result)
+        self._frozen = None  # (version, adjacency copy) handed to worker threads
+        self._trees = {}  # roots -> (version, last complete dominator tree)
+        self._builds = {}  # roots -> task building a newer tree
+        self._loaded_at = None
+        self._lock = asyncio.Lock()
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    async def ensure_loaded(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.max_age:
+            return
+        async with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.max_age:
+                return
+            async with async_session() as session:
+                nodes, edges = await load_graph(session)
+            self.adjacency, self.attrs, self.sites = {}, {}, {}
+            for node in nodes:
+                self.add_node(node["id"], node["hostname"], node["site_id"], node["device_type"])
+            for edge in edges:
+                self.add_link(edge["src_device_id"], edge["dst_device_id"])
+            self._loaded_at = time.monotonic()
+            log.info(f"Topology graph loaded: {len(self.adjacency)} nodes, {len(edges)} links")
+
+    def _changed(self):
+        self.version += 1
+
+    def add_node(self, node, hostname=None, site_id=None, device_type=None):
+        """Add a device, or update the attributes of a known one (its links are kept)."""
+        self.adjacency.setdefault(node, {})
+        old_site = self.attrs.get(node, {}).get("site_id")
+        if old_site in self.sites:
+            self.sites[old_site].discard(node)
+        self.attrs[node] = {"hostname": hostname, "site_id": site_id, "device_type": device_type}
+        if site_id is not None:
+            self.sites.setdefault(site_id, set()).add(node)
+        self._changed()
+
+    def remove_node(self, node):
+        for neighbor in self.adjacency.pop(node, {}):
+            self.adjacency.get(neighbor, {}).pop(node, None)
+        site_id = self.attrs.pop(node, {}).get("site_id")
+        if site_id in self.sites:
+            self.sites[site_id].discard(node)
+        self._changed()
+
+    def add_link(self, a, b):
+        if a is None or b is None or a == b:
+            return
+        for x, y in ((a, b), (b, a)):
+            neighbors = self.adjacency.setdefault(x, {})
+            neighbors[y] = neighbors.get(y, 0) + 1
+        self._changed()
+
+    def on_event(self, event):
+        """live_channel subscriber."""
+        if self._loaded_at is None:
+            return
+        kind = event.get("type")
+        if kind == "topology_changed":
+            for a, b in event.get("links", ()):
+                self.add_link(a, b)
+        elif kind == "device_added":
+            self.add_node(event["device_id"], event.get("hostname"), event.get("site_id"), event.get("device_type"))
+        elif kind == "device_removed":
+            self.remove_node(event["device_id"])
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def shortest_path(self, src, dst):
+        """Fewest-hop path [src, ..., dst] (bidirectional BFS), or None if they are not connected."""
+        if src not in self.adjacency or dst not in self.adjacency:
+            return None
+        if src == dst:
+            return [src]
+        parents = {src: None}
+        children = {dst: None}
+        front, back = [src], [dst]
+        while front and back:
+            # always expand the smaller frontier
+            if len(front) > len(back):
+                front, back, parents, children = back, front, children, parents
+            next_front = []
+            for node in front:
+                for neighbor in self.adjacency[node]:
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = node
+                    if neighbor in children:
+                        return self._join_path(neighbor, parents, children, src)
+                    next_front.append(neighbor)
+            front = next_front
+        return None
+
+    @staticmethod
+    def _join_path(meeting, parents, children, src):
+        left, node = [], meeting
+        while node is not None:
+            left.append(node)
+            node = parents[node]
+        right, node = [], children[meeting]
+        while node is not None:
+            right.append(node)
+            node = children[node]
+        path = left[::-1] + right
+        return path if path[0] == src else path[::-1]
+
+    def _reach(self, starts, blocked=frozenset()):
+        return reach(self.adjacency, starts, blocked)
+
+    async def components(self):
+        """Connected components as sorted node lists, largest first (cached per graph version)."""
+        if self._components is None or self._components[0] != self.version:
+            version, adjacency = self._frozen_adjacency()
+            result = await asyncio.to_thread(connected_components, adjacency)
+            self._components = (version, result)
+        return self._components[1]
+
+    def default_roots(self):
+        if self._cache.get("roots", (None,))[0] != self.version:
+            roots = [n for n, a in self.attrs.items() if (a["device_type"] or "").lower() in self.root_types]
+            self._cache["roots"] = (self.version, roots)
+        return self._cache["roots"][1]
+
+    async def impact(self, failed, roots=None):
+        """
+        Nodes that can reach a root now but not once the `failed` nodes go down:
+        -> (impacted nodes, roots used). Roots default to devices of the root types;
+        without any, the largest component counts as the network. A single failed
+        device is answered from the dominator tree (its subtree is exactly what
+        depends on it), which may trail the graph by one rebuild right after a
+        change; several failed devices (a site) need one BFS.
+        """
+        failed = set(failed)
+        roots = sorted(n for n in (roots or self.default_roots()) if n in self.adjacency)
+        if not roots:
+            roots = (await self.components())[0][:1] if self.adjacency else []
+        if len(failed) == 1:
+            tree = await self._dominator_tree(tuple(roots))
+            # a tree built before a removal may still name devices deleted since
+            impacted = self._dominated(next(iter(failed)), tree) & self.adjacency.keys()
+        else:
+            _, adjacency = self._frozen_adjacency()
+            impacted = await asyncio.to_thread(cut_off, adjacency, roots, failed)
+        return sorted(impacted), roots
+
+    def _frozen_adjacency(self):
+        """(version, copy of the adjacency) that worker threads can read while the graph changes."""
+        if self._frozen is None or self._frozen[0] != self.version:
+            self._frozen = (self.version, {node: tuple(neighbors) for node, neighbors in self.adjacency.items()})
+        return self._frozen
+
+    @staticmethod
+    def _dominated(node, tree):
+        impacted, stack = set(), list(tree.get(node, ()))
+        while stack:
+            child = stack.pop()
+            impacted.add(child)
+            stack.extend(tree.get(child, ()))
+        return impacted
+
+    async def _dominator_tree(self, roots):
+        """
+        Dominator tree for `roots`: the current one, else the last complete one
+        while a rebuild runs in a thread (only the very first build is awaited).
+        """
+        cached = self._trees.get(roots)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        build = self._builds.get(roots)
+        if build is None:
+            build = self._builds[roots] = asyncio.create_task(self._build_tree(roots))
+        if cached is not None:
+            return cached[1]
+        return await asyncio.shield(build)
+
+    async def _build_tree(self, roots):
+        try:
+            version, adjacency = self._frozen_adjacency()
+            start = time.monotonic()
+            tree = await asyncio.to_thread(dominator_tree, adjacency, roots)
+            self._trees[roots] = (version, tree)
+            log.debug(f"Dominator tree v{version} built in {time.monotonic() - start:.3f}s")
+            return tree
+        except Exception as e:
+            log.exception(f"Dominator tree build failed: {e}")
+            raise
+        finally:
+            del self._builds[roots]
+
+    def hostnames(self, nodes):
+        return [{"id": n, "hostname": self.attrs.get(n, {}).get("hostname")} for n in nodes]
+
+    def stats(self):
+        return {
+            "nodes": len(self.adjacency),
+            "links": sum(len(n) for n in self.adjacency.values()) // 2,
+            "version": self.version,
+        }
+
+
+# One graph per API process
+topology_graph = TopologyGraph()
@@ -0,0 +1,287 @@
+# backend/app/utils/write_behind.py
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import select
+
+from ..config import WRITE_BEHIND_QUEUE, WRITE_BEHIND_BATCH, WRITE_BEHIND_FLUSH_INTERVAL, WRITE_BEHIND_RETRIES
+from ..database import async_session
+from ..models import Device
+from .ingest import InterfaceCache, sync_interfaces, insert_interface_stats, update_device_status, store_lldp_links
+from .live_channel import live_channel
+from .rollups import rollup_engine
+
+log = logging.getLogger("WRITE_BEHIND")
+
+
+# --------------------------------------------------------------------------
+# One poll's worth of state
+# --------------------------------------------------------------------------
+class DeviceUpdate:
+    """
+    Result of polling one device, queued for the flusher.
+    interfaces: [(name, status, mac_address, speed_bps, in_bps, out_bps), ...] (bps None until a rate exists)
+    links: [(local interface name, neighbor_ip, neighbor_iface, neighbor_name), ...]
+    A "down" update carries neither.
+    """
+
+    __slots__ = ("device_id", "hostname", "status", "timestamp", "interfaces", "links")
+
+    def __init__(self, device_id, status, hostname=None, interfaces=(), links=(), timestamp=None):
+        self.device_id = device_id
+        self.hostname = hostname
+        self.status = status
+        self.timestamp = timestamp or datetime.utcnow()
+        self.interfaces = interfaces
+        self.links = links
+
+
+# --------------------------------------------------------------------------
+# Write-behind buffer
+# --------------------------------------------------------------------------
+class WriteBehind:
+    """
+    Decouples pollers from the database. poll_device puts a DeviceUpdate and moves
+    on; a single flusher task groups queued updates into batches of up to
+    `batch_size` devices (or whatever arrived within `flush_interval` of the first
+    one) and writes each batch in ONE transaction: device status, interface rows,
+    samples (COPY / multi-row INSERT) and LLDP links. Live "device_polled" events
+    are published once the batch is committed, when interface ids are known, and
+    committed samples are handed to the rollup engine, whose flush loop runs
+    alongside the flusher.
+
+    Backpressure: the queue is bounded, so when the DB falls behind put() waits and
+    the poll scheduler sees the slowdown as overruns instead of memory growing.
+    A failing batch is retried `retries` times (after dropping devices deleted in
+    the meantime), then dropped. stop() drains everything still queued.
+    """
+
+    def __init__(self, queue_size=WRITE_BEHIND_QUEUE, batch_size=WRITE_BEHIND_BATCH,
+                 flush_interval=WRITE_BEHIND_FLUSH_INTERVAL, retries=WRITE_BEHIND_RETRIES):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.interfaces = InterfaceCache()
+        self._queue = None
+        self._flusher = None
+        self._rollups = None
+        self._closing = False
+        self.queued = 0
+        self.written = 0
+        self.samples = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.dropped = 0
+        self.blocked_puts = 0
+        self.blocked_seconds = 0.0
+        self.last_batch = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._flusher is None:
+            self._closing = False
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._flusher = asyncio.create_task(self._run())
+            self._rollups = asyncio.create_task(rollup_engine.run())
+
+    async def stop(self):
+        """Stop accepting updates, write everything already queued, then stop the flusher."""
+        if self._flusher is None:
+            return
+        self._closing = True
+        await self._queue.put(None)  # wakes the flusher; everything before it is drained first
+        await self._flusher
+        self._rollups.cancel()
+        try:
+            await self._rollups
+        except asyncio.CancelledError:
+            pass
+        try:
+            await rollup_engine.flush()  # write the 1m buckets that have closed by now
+        except Exception as e:
+            log.warning(f"Final rollup flush failed: {e}")
+        self._flusher = None
+        self._rollups = None
+        self._queue = None
+        log.info(f"Write-behind drained ({self.written} device updates written)")
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+    async def put(self, update):
+        if self._closing:
+            self.dropped += 1
+            return
+        self.start()
+        if self._queue.full():
+            # DB is behind: hold the poller here until the flusher catches up
+            self.blocked_puts += 1
+            start = time.monotonic()
+            await self._queue.put(update)
+            self.blocked_seconds += time.monotonic() - start
+        else:
+            self._queue.put_nowait(update)
+        self.queued += 1
+
+    # ------------------------------------------------------------------
+    # Flusher
+    # ------------------------------------------------------------------
+    async def _next_batch(self):
+        """-> (updates, stop) with at least one update unless stopping."""
+        first = await self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = asyncio.get_running_loop().time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if self._queue.empty():
+                if self._closing:
+                    break  # drain without waiting for more
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self._queue.get_nowait()
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self):
+        while True:
+            batch, stop = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+            if stop:
+                # anything put after stop() began is still in the queue
+                while not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if item is not None:
+                        await self._flush([item])
+                return
+
+    async def _flush(self, batch):
+        for attempt in range(self.retries + 1):
+            start = time.monotonic()
+            try:
+                events = await self._write(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # cached interface ids of these devices may not exist any more
+                self.interfaces.forget({u.device_id for u in batch})
+                if attempt == self.retries:
+                    self.failed_batches += 1
+                    self.dropped += len(batch)
+                    log.error(f"Dropping {len(batch)} device updates after {attempt + 1} failed writes: {e}")
+                    return
+                log.warning(f"Write of {len(batch)} device updates failed ({e}) - retrying")
+                await asyncio.sleep(min(2 ** attempt, 10))
+                batch = await self._existing(batch)
+                if not batch:
+                    return
+                continue
+
+            self.batches += 1
+            self.written += len(batch)
+            self.last_batch = {"devices": len(batch), "seconds": round(time.monotonic() - start, 4)}
+            for event in events:
+                live_channel.publish(event)
+            return
+
+    async def _existing(self, batch):
+        """Drop updates of devices deleted since they were polled (their rows would violate FKs)."""
+        try:
+            async with async_session() as session:
+                q = await session.execute(select(Device.id).where(Device.id.in_({u.device_id for u in batch})))
+                existing = set(q.scalars().all())
+        except Exception:
+            return batch  # DB still unreachable: retry as is
+        kept = [u for u in batch if u.device_id in existing]
+        self.dropped += len(batch) - len(kept)
+        return kept
+
+    async def _write(self, batch):
+        """Write one batch in a single transaction; returns the live events to publish after commit."""
+        statuses = []
+        observed = {}
+        for u in batch:
+            statuses.append((u.device_id, u.status, u.timestamp if u.status == "up" else None))
+            for name, status, mac, speed_bps, _, _ in u.interfaces:
+                observed[(u.device_id, name)] = {"status": status, "mac_address": mac, "speed_bps": speed_bps}
+
+        events = []
+        async with async_session() as session:
+            await update_device_status(session, statuses)
+            interface_ids = await sync_interfaces(session, observed, self.interfaces) if observed else {}
+
+            samples = []
+            links = []
+            for u in batch:
+                if u.status != "up":
+                    continue
+                live_interfaces = []
+                for name, status, _, speed_bps, in_bps, out_bps in u.interfaces:
+                    interface_id = interface_ids.get((u.device_id, name))
+                    if interface_id is None:
+                        continue
+                    if in_bps is not None:
+                        samples.append((interface_id, u.timestamp, in_bps, out_bps))
+                    live_interfaces.append({
+                        "interface_id": interface_id,
+                        "name": name,
+                        "status": status,
+                        "in_bps": in_bps,
+                        "out_bps": out_bps,
+                        "speed_bps": speed_bps,
+                    })
+                links.extend((u.device_id, *link, u.timestamp) for link in u.links)
+                events.append({
+                    "type": "device_polled",
+                    "device_id": u.device_id,
+                    "hostname": u.hostname,
+                    "status": "up",
+                    "timestamp": u.timestamp.isoformat(),
+                    "interfaces": live_interfaces,
+                })
+            self.samples += await insert_interface_stats(session, samples)
+            _, new_links = await store_lldp_links(session, links)
+            await session.commit()
+        if new_links:
+            # API processes add the links to their topology graph and rebuild its snapshot
+            events.append({"type": "topology_changed", "links": new_links})
+        rollup_engine.add_samples(samples)
+        return events
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def stats(self):
+        return {
+            "running": self._flusher is not None,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "written": self.written,
+            "samples": self.samples,
+            "batches": self.batches,
+            "last_batch": self.last_batch,
+            "failed_batches": self.failed_batches,
+            "dropped": self.dropped,
+            "blocked_puts": self.blocked_puts,
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "cached_interfaces": len(self.interfaces),
+            "rollups": rollup_engine.stats(),
+        }
+
+
+# One buffer per process, shared by every poll_device call
+write_behind = WriteBehind()
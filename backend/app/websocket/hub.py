@@ -0,0 +1,426 @@
+# backend/app/websocket/hub.py
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import deque
+
+from ..config import WS_CLIENT_QUEUE, WS_SLOW_CONSUMER_POLICY, LIVE_PUSH_INTERVAL
+from ..utils.live_state import live_state, merge_deltas
+from ..utils.recent_samples import recent_samples
+
+try:
+    import msgpack
+except ImportError:  # optional dependency: without it every client gets JSON
+    msgpack = None
+
+log = logging.getLogger("WEBSOCKET")
+
+# Close code for slow consumers under the "disconnect" policy (1013: try again later)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Queue marker: the writer sends a fresh snapshot of the client's topics in its place
+RESYNC = object()
+
+# Encodings, chosen by the WebSocket subprotocol the client offers (Sec-WebSocket-Protocol).
+# No subprotocol means JSON text frames; "nms.msgpack" gets the same messages as
+# MessagePack binary frames (when msgpack is installed). permessage-deflate on top
+# of either is negotiated by the server (uvicorn --ws websockets, on by default).
+JSON = "json"
+MSGPACK = "msgpack"
+SUBPROTOCOLS = {"nms.json": JSON, "nms.msgpack": MSGPACK}
+
+
+def negotiate(offered):
+    """(subprotocol to accept or None, encoding) for the subprotocols a client offered, in its order of preference."""
+    for subprotocol in offered:
+        encoding = SUBPROTOCOLS.get(subprotocol)
+        if encoding == MSGPACK and msgpack is None:
+            continue
+        if encoding is not None:
+            return subprotocol, encoding
+    return None, JSON
+
+
+def encode(message, encoding=JSON):
+    """Frame payload of a message: str (text frame) for JSON, bytes (binary frame) for MessagePack."""
+    if encoding == MSGPACK:
+        return msgpack.packb(message, use_bin_type=True)
+    return json.dumps(message, separators=(",", ":"), default=str)
+
+
+def decode(frame):
+    """Message of a received WebSocket frame (text: JSON, bytes: MessagePack), or None if it cannot be decoded."""
+    try:
+        if frame.get("text") is not None:
+            return json.loads(frame["text"])
+        if frame.get("bytes") is not None and msgpack is not None:
+            return msgpack.unpackb(frame["bytes"], raw=False)
+    except ValueError:  # msgpack's decoding errors are ValueErrors too
+        pass
+    return None
+
+
+def is_id(value):
+    """An integer id, or its decimal string (bools are not ids)."""
+    if isinstance(value, str):
+        return value.lstrip("-").isdigit()
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+# --------------------------------------------------------------------------
+# Topics a client subscribed to
+# --------------------------------------------------------------------------
+class Subscription:
+    """
+    Sites, devices and interfaces a client wants; all empty means everything.
+    A device is wanted when it is listed, belongs to a listed site or owns a
+    listed interface; an interface when it is listed or its device is listed or
+    belongs to a listed site.
+    """
+
+    def __init__(self, sites=(), devices=(), interfaces=(), state=live_state):
+        self.sites = set(sites)
+        self.devices = set(devices)
+        self.interfaces = set(interfaces)
+        self.state = state
+        # clients with equal keys share filtered and encoded messages
+        self.key = (frozenset(self.sites), frozenset(self.devices), frozenset(self.interfaces))
+
+    @classmethod
+    def from_message(cls, message, state=live_state):
+        """
+        From {"sites": [...], "devices": [...], "interfaces": [...]} or query parameters
+        (site=, device=, interface=; malformed ones are ignored). Raises ValueError
+        when a message value is not a list of ids.
+        """
+        def ids(*keys):
+            values = []
+            for key in keys:
+                if hasattr(message, "getlist"):
+                    values.extend(v for v in message.getlist(key) if v.lstrip("-").isdigit())
+                    continue
+                value = message.get(key)
+                if value is None:
+                    continue
+                if not isinstance(value, list) or not all(is_id(v) for v in value):
+                    raise ValueError(f'"{key}" must be a list of ids')
+                values.extend(value)
+            return [int(v) for v in values]
+        return cls(ids("sites", "site"), ids("devices", "device"), ids("interfaces", "interface"), state)
+
+    @property
+    def everything(self):
+        return not (self.sites or self.devices or self.interfaces)
+
+    def wants_device(self, device_id):
+        if self.everything or device_id in self.devices:
+            return True
+        if self.sites and self.state.site_of(device_id) in self.sites:
+            return True
+        return any(self.state.device_of(i) == device_id for i in self.interfaces)
+
+    def wants_interface(self, interface_id, device_id):
+        if self.everything or interface_id in self.interfaces or device_id in self.devices:
+            return True
+        return bool(self.sites) and self.state.site_of(device_id) in self.sites
+
+    def filter(self, delta):
+        """The part of a "delta" message this client wants, or None if nothing is left."""
+        if self.everything:
+            return delta
+        devices = [d for d in delta["devices"] if self.wants_device(d["device_id"])]
+        interfaces = [i for i in delta["interfaces"] if self.wants_interface(i["interface_id"], i["device_id"])]
+        removed = delta["removed_devices"]  # rare, and ids the client does not know are ignored
+        if not (devices or interfaces or removed):
+            return None
+        return {**delta, "devices": devices, "interfaces": interfaces, "removed_devices": removed}
+
+    def snapshot(self):
+        if self.everything:
+            return self.state.snapshot()
+        return self.state.snapshot(self.wants_device, self.wants_interface)
+
+    def describe(self):
+        return {"sites": sorted(self.sites), "devices": sorted(self.devices), "interfaces": sorted(self.interfaces)}
+
+
+# --------------------------------------------------------------------------
+# One connected client: bounded queue drained by its own writer task
+# --------------------------------------------------------------------------
+class LiveClient:
+    """
+    Encoded frames for one WebSocket, queued by offer() (never blocks) and sent
+    by a writer task of its own, so a slow client only ever delays itself. When
+    its queue is full the client is a slow consumer: under the "coalesce" policy
+    the queued frames are dropped and replaced by one fresh snapshot of its
+    topics (the latest state), under "disconnect" the socket is closed.
+    """
+
+    def __init__(self, client_id, websocket, subscription, hub, encoding=JSON):
+        self.id = client_id
+        self.websocket = websocket
+        self.subscription = subscription
+        self.hub = hub
+        self.encoding = encoding
+        self.max_queue = hub.max_queue
+        self.policy = hub.policy
+        self.queue = deque()  # (enqueued at, payload)
+        self.closed = False
+        self.too_slow = False
+        self.connected_at = time.time()
+        self.sent = 0
+        self.coalesced = 0  # messages dropped in favour of a snapshot
+        self.resyncs = 0
+        self.resumes = 0
+        self.last_send_seconds = 0.0
+        self._wakeup = asyncio.Event()
+        self._writer = None
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def offer(self, payload):
+        """Queue an encoded frame (see encode()); send() encodes a message for this client only."""
+        if self.closed:
+            return
+        if len(self.queue) >= self.max_queue:
+            if self.policy == "disconnect":
+                log.warning(f"WebSocket client {self.id} is {len(self.queue)} messages behind - disconnecting")
+                self.too_slow = True
+                self.close(SLOW_CONSUMER_CLOSE_CODE)
+                return
+            self.coalesced += len(self.queue)
+            self.queue.clear()
+            self.queue.append((time.monotonic(), RESYNC))
+        self.queue.append((time.monotonic(), payload))
+        self._wakeup.set()
+
+    def send(self, message):
+        self.offer(encode(message, self.encoding))
+
+    def resume(self, stream, since):
+        """Queue what the client missed after seq `since` of `stream`; False when it needs a snapshot instead."""
+        frames = self.hub.replay_frames(self.subscription, self.encoding, stream, since)
+        if frames is None:
+            return False
+        self.resumes += 1
+        for payload in frames:
+            self.offer(payload)
+        return True
+
+    def resync(self, subscription=None):
+        """Replace whatever is queued by a fresh snapshot (connect, subscription change)."""
+        if subscription is not None:
+            self.subscription = subscription
+        self.queue.clear()
+        self.queue.append((time.monotonic(), RESYNC))
+        self._wakeup.set()
+
+    async def _write_loop(self):
+        try:
+            while True:
+                while not self.queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                _, payload = self.queue.popleft()
+                if payload is RESYNC:
+                    self.resyncs += 1
+                    payload = self.hub.snapshot_frame(self.subscription, self.encoding)
+                start = time.monotonic()
+                if isinstance(payload, bytes):
+                    await self.websocket.send_bytes(payload)
+                else:
+                    await self.websocket.send_text(payload)
+                self.last_send_seconds = time.monotonic() - start
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.debug(f"WebSocket client {self.id} send failed: {e}")
+            self.close()
+
+    def close(self, code=None):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.clear()
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        if code is not None:
+            asyncio.get_running_loop().create_task(self._close_socket(code))
+        self.hub.closed(self)
+
+    async def _close_socket(self, code):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def lag(self):
+        """Seconds the oldest queued message has been waiting (0 when the client is caught up)."""
+        return time.monotonic() - self.queue[0][0] if self.queue else 0.0
+
+    def stats(self):
+        client = self.websocket.client
+        return {
+            "id": self.id,
+            "peer": f"{client.host}:{client.port}" if client else None,
+            "connected_seconds": round(time.time() - self.connected_at, 1),
+            "subscription": self.subscription.describe(),
+            "encoding": self.encoding,
+            "queued": len(self.queue),
+            "lag_seconds": round(self.lag(), 3),
+            "last_send_seconds": round(self.last_send_seconds, 4),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "resyncs": self.resyncs,
+            "resumes": self.resumes,
+        }
+
+
+# --------------------------------------------------------------------------
+# All clients of this API process
+# --------------------------------------------------------------------------
+class ClientHub:
+    """
+    Every message is filtered once per distinct subscription and encoded once
+    per subscription and encoding; all clients sharing them queue the same
+    str/bytes object. Snapshots and replays are cached the same way until the
+    live state changes, so many clients (re)connecting at once after a network
+    blip cost one encode per subscription, and those that resume get only what
+    they missed, merged into one delta.
+    """
+
+    def __init__(self, max_queue=WS_CLIENT_QUEUE, policy=WS_SLOW_CONSUMER_POLICY, state=live_state):
+        self.max_queue = max_queue
+        self.policy = policy
+        self.state = state
+        self.clients = {}  # id -> LiveClient
+        self._ids = itertools.count(1)
+        self._frames = {}  # snapshots and replays, valid while the state is at _frames_mark
+        self._frames_mark = None
+        self._backfills = {}  # (subscription key, encoding) -> payload, for one push interval
+        self._backfills_at = 0.0
+        self.slow_disconnects = 0
+        self.frames_encoded = 0
+        self.frames_queued = 0
+        self.snapshots_encoded = 0
+        self.replays_encoded = 0
+
+    def connect(self, websocket, subscription, encoding=JSON):
+        client = LiveClient(next(self._ids), websocket, subscription, self, encoding)
+        self.clients[client.id] = client
+        client.start()
+        return client
+
+    def disconnect(self, client):
+        client.close()
+
+    def closed(self, client):
+        self.clients.pop(client.id, None)
+        if client.too_slow:
+            self.slow_disconnects += 1
+
+    def broadcast(self, delta):
+        """live_state subscriber: queue the delta for every client (filtered by its topics, encoded once)."""
+        filtered = {}  # subscription key -> message or None
+        frames = {}  # (subscription key, encoding) -> payload
+        for client in list(self.clients.values()):
+            key = client.subscription.key
+            if key not in filtered:
+                filtered[key] = client.subscription.filter(delta)
+            if filtered[key] is None:
+                continue
+            frame_key = (key, client.encoding)
+            if frame_key not in frames:
+                frames[frame_key] = encode(filtered[key], client.encoding)
+                self.frames_encoded += 1
+            client.offer(frames[frame_key])
+            self.frames_queued += 1
+
+    def _cached_frames(self):
+        mark = (self.state.version, self.state.seq)
+        if self._frames_mark != mark:
+            self._frames = {}
+            self._frames_mark = mark
+        return self._frames
+
+    def snapshot_frame(self, subscription, encoding=JSON):
+        frames = self._cached_frames()
+        key = ("snapshot", subscription.key, encoding)
+        payload = frames.get(key)
+        if payload is None:
+            payload = frames[key] = encode({
+                "type": "snapshot",
+                "stream": self.state.stream,
+                "seq": self.state.seq,
+                "data": subscription.snapshot(),
+            }, encoding)
+            self.snapshots_encoded += 1
+        return payload
+
+    def replay_frames(self, subscription, encoding, stream, since):
+        """
+        Frames resuming a client after seq `since` of `stream`: a "resumed"
+        message, then the missed deltas merged into one (filtered by its topics;
+        left out when nothing it wants changed). None when the deltas are no
+        longer kept, or belong to another stream: the client needs a snapshot.
+        """
+        frames = self._cached_frames()
+        key = ("replay", stream, since, subscription.key, encoding)
+        if key in frames:
+            return frames[key]
+        merged_key = ("merged", stream, since)
+        if merged_key not in frames:
+            missed = self.state.missed(stream, since)
+            frames[merged_key] = merge_deltas(missed) if missed else missed
+        merged = frames[merged_key]
+        if merged is None:
+            frames[key] = None
+            return None
+        payloads = [encode({"type": "resumed", "stream": self.state.stream, "seq": self.state.seq}, encoding)]
+        message = subscription.filter(merged) if merged else None
+        if message is not None:
+            payloads.append(encode(message, encoding))
+        self.replays_encoded += 1
+        frames[key] = payloads
+        return payloads
+
+    def backfill_frame(self, subscription, encoding=JSON):
+        """Recent samples of the subscription's interfaces (live chart backfill), encoded at most once per push interval."""
+        now = time.monotonic()
+        if now - self._backfills_at > LIVE_PUSH_INTERVAL:
+            self._backfills = {}
+            self._backfills_at = now
+        key = (subscription.key, encoding)
+        payload = self._backfills.get(key)
+        if payload is None:
+            samples = recent_samples.snapshot()
+            if not subscription.everything:
+                samples = {
+                    interface_id: points for interface_id, points in samples.items()
+                    if subscription.wants_interface(interface_id, self.state.device_of(interface_id))
+                }
+            payload = self._backfills[key] = encode({"type": "recent_samples", "data": samples}, encoding)
+        return payload
+
+    def stats(self):
+        clients = [c.stats() for c in self.clients.values()]
+        return {
+            "clients": len(clients),
+            "policy": self.policy,
+            "max_queue": self.max_queue,
+            "max_lag_seconds": max((c["lag_seconds"] for c in clients), default=0.0),
+            "slow_disconnects": self.slow_disconnects,
+            "frames_encoded": self.frames_encoded,
+            "frames_queued": self.frames_queued,
+            "snapshots_encoded": self.snapshots_encoded,
+            "replays_encoded": self.replays_encoded,
+            "per_client": clients,
+        }
+
+
+# One hub per API process
+hub = ClientHub()
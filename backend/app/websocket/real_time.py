@@ -1,67 +1,54 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-import asyncio
-from ..database import async_session
-from ..models import Device, Interface
-from sqlalchemy.future import select
+from ..utils.live_state import live_state
+from .hub import hub, Subscription, negotiate, decode
 
 router = APIRouter()
-clients = []  # Connected WebSocket clients
 
 # WebSocket endpoint
+# Topics can be given in the query string (?site=1&device=7&interface=42, repeatable;
+# none = everything) and changed later by sending
+# {"type": "subscribe", "sites": [...], "devices": [...], "interfaces": [...]}
+# (as a JSON text frame, or a MessagePack binary frame); a malformed one is
+# answered with {"type": "error", "detail": ...} and the subscription is kept.
+# Offering the "nms.msgpack" subprotocol switches the pushes to MessagePack binary frames.
+# Every snapshot and delta carries "stream" and "seq": a client reconnecting with
+# ?stream=<stream>&since=<last seq> gets a "resumed" message and only what it missed
+# (or a snapshot when that is no longer kept).
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    await websocket.accept()
-    clients.append(websocket)
+    subprotocol, encoding = negotiate(websocket.scope.get("subprotocols", ()))
+    await websocket.accept(subprotocol=subprotocol)
+    client = hub.connect(websocket, Subscription.from_message(websocket.query_params), encoding)
+    if not client.resume(websocket.query_params.get("stream"), last_seq(websocket.query_params.get("since"))):
+        # current state of the client's topics from memory; "delta" messages update it from here on
+        client.resync()
+        # backfill live charts from the ring buffer; the rates in deltas extend them from here on
+        client.offer(hub.backfill_frame(client.subscription, encoding))
     try:
         while True:
-            await asyncio.sleep(5)  # Keep connection alive
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            message = decode(frame)
+            if not isinstance(message, dict) or message.get("type") != "subscribe":
+                continue
+            try:
+                client.resync(Subscription.from_message(message))
+            except ValueError as e:
+                client.send({"type": "error", "detail": str(e)})
     except WebSocketDisconnect:
-        clients.remove(websocket)
+        pass
+    finally:
+        hub.disconnect(client)
 
-# Send JSON to all connected clients
-async def send_to_clients(message: dict):
-    disconnected = []
-    for client in clients:
-        try:
-            await client.send_json(message)
-        except:
-            disconnected.append(client)
-    for d in disconnected:
-        clients.remove(d)
+# Sequence number a reconnecting client last received (None if absent or malformed)
+def last_seq(value):
+    return int(value) if value is not None and value.isdigit() else None
 
-# Prepare real-time device/interface data
-async def collect_device_data():
-    async with async_session() as session:
-        query = await session.execute(select(Device))
-        devices = query.scalars().all()
-        data = []
-        for d in devices:
-            device_data = {
-                "device_id": d.id,
-                "hostname": d.hostname,
-                "ip": d.ip_address,
-                "status": d.status,
-                "interfaces": []
-            }
-            query2 = await session.execute(select(Interface).where(Interface.device_id==d.id))
-            interfaces = query2.scalars().all()
-            for intf in interfaces:
-                device_data["interfaces"].append({
-                    "name": intf.interface_name,
-                    "status": intf.status,
-                    "speed_bps": intf.speed_bps,
-                    "mac": intf.mac_address
-                })
-            data.append(device_data)
-        return data
+# Connected clients with their queue depth and lag
+@router.get("/clients", response_model=dict)
+async def websocket_clients():
+    return hub.stats()
 
-# Push updates every interval
-async def realtime_push(interval=1):
-    while True:
-        data = await collect_device_data()
-        await send_to_clients({"type": "device_update", "data": data})
-        await asyncio.sleep(interval)
-
-# Start real-time WebSocket push
-def start_realtime(interval=1):
-    asyncio.run(realtime_push(interval))
+# Queue the changes of every push interval for each client (only what changed, no DB access)
+live_state.subscribe(hub.broadcast)
@@ -0,0 +1,53 @@
+# backend/tests/test_archive.py
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from app.utils.archive import _DayWriter, day_dir, read_archive
+
+DAY = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def root(tmp_path):
+    # two days of samples every 10 minutes for interfaces 1 and 2 (device 1) and 3 (device 2)
+    for day in (DAY, DAY + timedelta(days=1)):
+        writer = _DayWriter(day_dir(day, str(tmp_path)))
+        rows = [
+            (device_id, interface_id, day + timedelta(minutes=m), interface_id * 1000 + m, m)
+            for device_id, interface_id in ((1, 1), (1, 2), (2, 3))
+            for m in range(0, 1440, 10)
+        ]
+        writer.write(rows)
+        writer.close()
+    return str(tmp_path)
+
+
+def read(root, resolution=0, **kwargs):
+    return read_archive({1: [1, 2], 2: [3]}, DAY, DAY + timedelta(days=2), resolution, root=root, **kwargs)
+
+
+@pytest.mark.parametrize("resolution", [0, 3600])
+def test_pages_match_the_full_read(root, resolution):
+    everything = read(root, resolution)
+    keys = [(p["timestamp"], p["interface_id"]) for p in everything]
+    assert keys == sorted(keys) and len(set(keys)) == len(keys)
+
+    pages, after = [], None
+    while True:
+        page = read(root, resolution, after=after, limit=100)
+        pages.extend(page)
+        if len(page) < 100:
+            break
+        after = (page[-1]["timestamp"], page[-1]["interface_id"])
+    assert pages == everything
+
+
+def test_hourly_buckets(root):
+    points = read(root, 3600)
+    assert len(points) == 48 * 3
+    first = points[0]
+    assert (first["timestamp"], first["interface_id"], first["samples"]) == (DAY, 1, 6)
+    assert (first["in_min"], first["in_max"]) == (1000, 1050)
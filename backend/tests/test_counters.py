@@ -0,0 +1,76 @@
+# backend/tests/test_counters.py
+from app.utils.counters import COUNTER32_MAX, CounterCache, counter_delta
+
+
+# --------------------------------------------------------------------------
+# counter_delta
+# --------------------------------------------------------------------------
+def test_delta_forward():
+    assert counter_delta(100, 350) == 250
+    assert counter_delta(100, 350, hc=True) == 250
+
+
+def test_counter32_wrap():
+    assert counter_delta(COUNTER32_MAX - 100, 50) == 150
+
+
+def test_counter64_going_backwards_is_a_reset():
+    assert counter_delta(1000, 10, hc=True) is None
+
+
+# --------------------------------------------------------------------------
+# CounterCache
+# --------------------------------------------------------------------------
+def test_first_reading_has_no_rate():
+    cache = CounterCache()
+    assert cache.update(1, 1, 0, 0, timestamp=10.0) is None
+    assert len(cache) == 1
+
+
+def test_rate_in_bits_per_second():
+    cache = CounterCache()
+    cache.update(1, 1, 1000, 2000, timestamp=10.0)
+    assert cache.update(1, 1, 2000, 4000, timestamp=12.0) == (4000, 8000)
+
+
+def test_rate_across_counter32_wrap():
+    cache = CounterCache()
+    cache.update(1, 1, COUNTER32_MAX - 500, 0, timestamp=0.0)
+    assert cache.update(1, 1, 500, 0, timestamp=1.0) == (8000, 0)
+
+
+def test_counter64_reset_has_no_rate():
+    cache = CounterCache()
+    cache.update(1, 1, 10 ** 12, 10 ** 12, timestamp=0.0, hc=True)
+    assert cache.update(1, 1, 100, 10 ** 12 + 100, timestamp=1.0, hc=True) is None
+    # the reset reading becomes the new baseline
+    assert cache.update(1, 1, 200, 10 ** 12 + 200, timestamp=2.0, hc=True) == (800, 800)
+
+
+def test_agent_restart_has_no_rate():
+    cache = CounterCache()
+    cache.update(1, 1, 5000, 5000, timestamp=0.0, uptime=100000)
+    # sysUpTime went backwards: the small counters are not a 32-bit wrap
+    assert cache.update(1, 1, 100, 100, timestamp=1.0, uptime=50) is None
+
+
+def test_switch_between_32_and_64_bit_counters_has_no_rate():
+    cache = CounterCache()
+    cache.update(1, 1, 100, 100, timestamp=0.0, hc=False)
+    assert cache.update(1, 1, 10 ** 10, 10 ** 10, timestamp=1.0, hc=True) is None
+
+
+def test_no_elapsed_time_has_no_rate():
+    cache = CounterCache()
+    cache.update(1, 1, 100, 100, timestamp=5.0)
+    assert cache.update(1, 1, 200, 200, timestamp=5.0) is None
+
+
+def test_forget_device():
+    cache = CounterCache()
+    cache.update(1, 1, 0, 0, timestamp=0.0)
+    cache.update(1, 2, 0, 0, timestamp=0.0)
+    cache.update(2, 1, 0, 0, timestamp=0.0)
+    cache.forget_device(1)
+    assert len(cache) == 1
+    assert cache.update(1, 1, 800, 800, timestamp=1.0) is None
@@ -0,0 +1,31 @@
+# backend/tests/test_hub.py
+import pytest
+from starlette.datastructures import QueryParams
+
+from app.websocket.hub import Subscription, decode, encode
+
+
+# --------------------------------------------------------------------------
+# Subscribe messages
+# --------------------------------------------------------------------------
+def test_subscription_from_message():
+    subscription = Subscription.from_message({"sites": [1, "2"], "devices": [], "interfaces": [7]})
+    assert subscription.describe() == {"sites": [1, 2], "devices": [], "interfaces": [7]}
+    assert Subscription.from_message({}).everything
+
+
+@pytest.mark.parametrize("value", [5, "12", [1, "x"], [True], [[1]], {"1": 1}])
+def test_malformed_subscription_is_rejected(value):
+    with pytest.raises(ValueError):
+        Subscription.from_message({"sites": value})
+
+
+def test_malformed_query_parameters_are_ignored():
+    subscription = Subscription.from_message(QueryParams("site=1&site=x&device=-&interface=42"))
+    assert subscription.describe() == {"sites": [1], "devices": [], "interfaces": [42]}
+
+
+def test_decode_frames():
+    assert decode({"type": "websocket.receive", "text": encode({"type": "subscribe"})}) == {"type": "subscribe"}
+    assert decode({"type": "websocket.receive", "text": "{"}) is None
+    assert decode({"type": "websocket.receive", "bytes": b"\xc1"}) is None
@@ -0,0 +1,187 @@
+# backend/tests/test_live_state.py
+import copy
+
+from app.utils.live_state import LiveState, merge_deltas
+
+
+def polled(device_id, *interfaces, status="up"):
+    return {
+        "type": "device_polled",
+        "device_id": device_id,
+        "hostname": f"dev{device_id}",
+        "status": status,
+        "interfaces": [
+            {"interface_id": i, "name": f"eth{i}", "status": "up", "in_bps": in_bps, "out_bps": in_bps}
+            for i, in_bps in interfaces
+        ],
+    }
+
+
+def follower():
+    state = LiveState()
+    state.producing = False
+    return state
+
+
+# --------------------------------------------------------------------------
+# Deltas
+# --------------------------------------------------------------------------
+def test_flush_numbers_deltas_and_skips_empty_ones():
+    state = LiveState()
+    received = []
+    state.subscribe(received.append)
+    assert state.flush() is None
+    state.on_event(polled(1, (10, 100)))
+    first = state.flush()
+    assert (first["stream"], first["seq"]) == (state.stream, 1)
+    assert state.flush() is None
+    state.on_event(polled(1, (10, 200)))
+    assert state.flush()["seq"] == 2
+    assert [d["seq"] for d in received] == [1, 2]
+
+
+def test_delta_carries_only_changed_fields():
+    state = LiveState()
+    state.on_event(polled(1, (10, 100), (11, 5)))
+    first = state.flush()
+    assert first["devices"] == [{"device_id": 1, "hostname": "dev1", "ip": None, "site_id": None, "status": "up"}]
+    assert len(first["interfaces"]) == 2
+    state.on_event(polled(1, (10, 300), (11, 5)))
+    assert state.flush()["interfaces"] == [{"interface_id": 10, "device_id": 1, "in_bps": 300, "out_bps": 300}]
+
+
+def test_missing_rates_do_not_overwrite():
+    state = LiveState()
+    state.on_event(polled(1, (10, 100)))
+    state.flush()
+    state.on_event(polled(1, (10, None)))
+    assert state.flush() is None
+    assert state.interfaces[10]["in_bps"] == 100
+
+
+def test_removed_device_takes_its_interfaces():
+    state = LiveState()
+    state.on_event(polled(1, (10, 100)))
+    state.on_event(polled(2, (20, 100)))
+    state.flush()
+    state.on_event({"type": "device_removed", "device_id": 1})
+    delta = state.flush()
+    assert delta["removed_devices"] == [1]
+    assert set(state.interfaces) == {20}
+    assert [d["device_id"] for d in state.snapshot()] == [2]
+
+
+# --------------------------------------------------------------------------
+# Replay
+# --------------------------------------------------------------------------
+def test_missed_deltas():
+    state = LiveState()
+    for rate in range(1, 6):
+        state.on_event(polled(1, (10, rate)))
+        state.flush()
+    assert [d["seq"] for d in state.missed(state.stream, 2)] == [3, 4, 5]
+    assert state.missed(state.stream, 5) == []
+
+
+def test_missed_cannot_be_replayed():
+    state = LiveState()
+    state.on_event(polled(1, (10, 1)))
+    state.flush()
+    assert state.missed("another-stream", 0) is None
+    assert state.missed(state.stream, None) is None
+    assert state.missed(state.stream, 7) is None  # ahead of this stream
+
+
+def test_replay_log_is_trimmed_by_entries():
+    state = LiveState()
+    state.max_replay_entries = 4
+    for rate in range(1, 6):
+        state.on_event(polled(1, (10, rate), (11, rate)))  # 2 interface entries per delta after the first
+        state.flush()
+    assert [d["seq"] for d in state.replay] == [4, 5]
+    assert state.replay_entries == 4
+    assert state.missed(state.stream, 3) is not None
+    assert state.missed(state.stream, 2) is None  # delta 3 was dropped
+
+
+def test_the_latest_delta_is_always_kept():
+    state = LiveState()
+    state.max_replay_entries = 1
+    state.on_event(polled(1, (10, 1), (11, 1), (12, 1)))
+    state.flush()
+    assert [d["seq"] for d in state.replay] == [1]
+
+
+# --------------------------------------------------------------------------
+# Followers
+# --------------------------------------------------------------------------
+def test_follower_mirrors_the_producer():
+    producer, relay = LiveState(), follower()
+    received = []
+    relay.subscribe(received.append)
+    producer.subscribe(relay.apply_delta)
+    producer.on_event(polled(1, (10, 100)))
+    producer.flush()
+    producer.on_event(polled(2, (20, 5)))
+    producer.on_event({"type": "device_status", "device_id": 1, "status": "down"})
+    producer.flush()
+    assert relay.snapshot() == producer.snapshot()
+    assert (relay.stream, relay.seq) == (producer.stream, producer.seq)
+    assert received == list(producer.replay)
+    assert relay.missed(producer.stream, 1) == list(producer.replay)[1:]
+
+
+def test_follower_ignores_its_own_poll_events():
+    relay = follower()
+    relay.on_event(polled(1, (10, 100)))
+    assert relay.devices == {}
+
+
+def test_gap_in_deltas_empties_the_replay_log():
+    producer, relay = LiveState(), follower()
+    deltas = []
+    producer.subscribe(deltas.append)
+    for rate in range(1, 4):
+        producer.on_event(polled(1, (10, rate)))
+        producer.flush()
+    relay.apply_delta(deltas[0])
+    relay.apply_delta(deltas[2])  # delta 2 was lost
+    assert relay.seq == 3
+    assert relay.missed(producer.stream, 1) is None
+    assert relay.missed(producer.stream, 2) == [deltas[2]]
+
+
+def test_new_producer_stream_is_adopted():
+    old, new, relay = LiveState(), LiveState(), follower()
+    for producer in (old, new):
+        producer.subscribe(relay.apply_delta)
+        producer.on_event(polled(1, (10, 100)))
+        producer.flush()
+    assert (relay.stream, relay.seq) == (new.stream, 1)
+    assert relay.missed(old.stream, 1) is None
+
+
+# --------------------------------------------------------------------------
+# merge_deltas
+# --------------------------------------------------------------------------
+def test_merged_delta_equals_the_deltas_in_order():
+    producer = LiveState()
+    deltas = []
+    producer.subscribe(deltas.append)
+    producer.on_event(polled(1, (10, 1)))
+    producer.on_event(polled(2, (20, 1)))
+    producer.flush()
+    producer.on_event(polled(1, (10, 2)))
+    producer.on_event({"type": "device_removed", "device_id": 2})
+    producer.flush()
+    producer.on_event(polled(2, (21, 3)))  # re-added after removal
+    producer.on_event({"type": "device_status", "device_id": 1, "status": "down"})
+    producer.flush()
+
+    stepwise, merged = follower(), follower()
+    for delta in deltas:
+        stepwise.apply_delta(copy.deepcopy(delta))
+    one = merge_deltas(copy.deepcopy(deltas))
+    assert one["seq"] == 3
+    merged.apply_delta(one)
+    assert merged.snapshot() == stepwise.snapshot() == producer.snapshot()
@@ -0,0 +1,34 @@
+# backend/tests/test_lldp.py
+import asyncio
+
+from app.utils import snmp_engine
+from app.utils.snmp_engine import LLDP_REM_MAN_ADDR, get_lldp_neighbors
+
+
+def test_neighbors_sharing_a_port_are_all_kept(monkeypatch):
+    # two neighbors on local port 5 (remIndex 1 and 2), one on port 7
+    remote = {
+        "0.5.1": {"sys_name": "sw-a", "port_desc": "Gi0/1"},
+        "0.5.2": {"sys_name": "sw-b\x00", "port_desc": "Gi0/2"},
+        "0.7.1": {"sys_name": "sw-c"},
+        "0.9.1": {"port_desc": "no name"},
+    }
+    manaddr = {
+        f"{LLDP_REM_MAN_ADDR}.0.5.1.1.4.10.0.0.1": "",
+        f"{LLDP_REM_MAN_ADDR}.0.5.2.1.4.10.0.0.2": "",
+    }
+
+    async def snmp_table(*args, **kwargs):
+        return remote
+
+    async def snmp_walk(*args, **kwargs):
+        return manaddr
+
+    monkeypatch.setattr(snmp_engine, "snmp_table", snmp_table)
+    monkeypatch.setattr(snmp_engine, "snmp_walk", snmp_walk)
+    neighbors = asyncio.run(get_lldp_neighbors("192.0.2.1"))
+    assert neighbors == {
+        ("5", "1"): {"neighbor_name": "sw-a", "neighbor_ip": "10.0.0.1", "neighbor_iface": "Gi0/1"},
+        ("5", "2"): {"neighbor_name": "sw-b", "neighbor_ip": "10.0.0.2", "neighbor_iface": "Gi0/2"},
+        ("7", "1"): {"neighbor_name": "sw-c", "neighbor_ip": "", "neighbor_iface": ""},
+    }
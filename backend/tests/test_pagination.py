@@ -0,0 +1,114 @@
+# backend/tests/test_pagination.py
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models import Alert
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER, decode_cursor, decode_series_cursor, encode_cursor, encode_series_cursor, keyset_page,
+    set_next_cursor,
+)
+
+
+class FakeSession:
+    """Returns the first `limit` ids of `ids` matching the compiled keyset condition."""
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        params = compiled.params
+        sql = str(compiled)
+        ids = sorted(self.ids, reverse=" DESC" in sql)
+        if "alerts.id < " in sql:
+            ids = [i for i in ids if i < params["id_1"]]
+        elif "alerts.id > " in sql:
+            ids = [i for i in ids if i > params["id_1"]]
+        rows = [SimpleNamespace(id=i) for i in ids[:params["param_1"]]]
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: rows))
+
+
+def page_through(session, limit, descending=False):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = asyncio.run(
+            keyset_page(session, select(Alert), Alert.id, cursor=cursor, limit=limit, descending=descending)
+        )
+        pages.append([r.id for r in rows])
+        if cursor is None:
+            return pages
+
+
+# --------------------------------------------------------------------------
+# Cursors
+# --------------------------------------------------------------------------
+def test_cursor_roundtrip_is_url_safe():
+    values = {"k": 12345, "name": "?&/+"}
+    cursor = encode_cursor(values)
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+    assert decode_cursor(cursor) == values
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor([1, 2]), "e30x"])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(cursor)
+    assert e.value.status_code == 400
+
+
+def test_series_cursor_roundtrip():
+    ts = datetime(2024, 1, 2, 3, 4, 5, 678000)
+    cursor = encode_series_cursor(300, (ts, 42))
+    assert decode_series_cursor(cursor, (0, 60, 300)) == (300, (ts, 42))
+
+
+@pytest.mark.parametrize("values", [
+    {"r": 900, "t": "2024-01-02T03:04:05", "i": 1},  # unknown resolution
+    {"r": 60, "t": "2024-01-02T03:04:05", "i": "1"},
+    {"r": 60, "t": "yesterday", "i": 1},
+    {"r": 60, "i": 1},
+])
+def test_invalid_series_cursor_is_a_400(values):
+    with pytest.raises(HTTPException) as e:
+        decode_series_cursor(encode_cursor(values), (0, 60, 300))
+    assert e.value.status_code == 400
+
+
+def test_next_cursor_header():
+    response = SimpleNamespace(headers={})
+    set_next_cursor(response, None)
+    assert response.headers == {}
+    set_next_cursor(response, "abc")
+    assert response.headers == {NEXT_CURSOR_HEADER: "abc"}
+
+
+# --------------------------------------------------------------------------
+# Keyset pages
+# --------------------------------------------------------------------------
+def test_pages_cover_every_row_once():
+    session = FakeSession([3, 1, 7, 9, 4, 12, 15])
+    assert page_through(session, 3) == [[1, 3, 4], [7, 9, 12], [15]]
+    # one extra row is fetched to know whether another page follows, never an OFFSET
+    assert all("OFFSET" not in str(s) for s in session.statements)
+
+
+def test_descending_pages():
+    assert page_through(FakeSession([3, 1, 7, 9, 4, 12]), 4, descending=True) == [[12, 9, 7, 4], [3, 1]]
+
+
+def test_exact_last_page_has_no_cursor():
+    assert page_through(FakeSession([1, 2, 3, 4]), 2) == [[1, 2], [3, 4]]
+
+
+def test_cursor_without_integer_key_is_a_400():
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(keyset_page(FakeSession([]), select(Alert), Alert.id, cursor=encode_cursor({"k": "1"})))
+    assert e.value.status_code == 400
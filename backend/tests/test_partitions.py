@@ -0,0 +1,22 @@
+# backend/tests/test_partitions.py
+from datetime import datetime, timedelta
+
+from app.utils import partitions
+from app.utils.partitions import expired, partition_name, partition_start, STATS_TABLE
+
+
+def test_partition_spans_are_aligned_on_the_epoch():
+    day = datetime(2024, 3, 14, 15, 9)
+    assert partition_start(day) == datetime(2024, 3, 14)
+    assert (partition_start(day, 7) - partitions.EPOCH).days % 7 == 0
+    assert partition_start(day, 7) <= day < partition_start(day, 7) + timedelta(days=7)
+
+
+def test_expired_partitions(monkeypatch):
+    monkeypatch.setattr(partitions, "utc_today", lambda: datetime(2024, 3, 31))
+    retention = partitions.PARTITIONED_TABLES[STATS_TABLE][2]
+    cutoff = datetime(2024, 3, 31) - timedelta(days=retention)
+    days = [cutoff - timedelta(days=2), cutoff - timedelta(days=1), cutoff, cutoff + timedelta(days=1)]
+    listed = {day: partition_name(day) for day in reversed(days)}
+    # only partitions ending on or before the cutoff, oldest first
+    assert expired(listed) == [(day, partition_name(day)) for day in days[:2]]
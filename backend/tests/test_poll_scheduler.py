@@ -0,0 +1,158 @@
+# backend/tests/test_poll_scheduler.py
+import asyncio
+
+from app.utils.counters import CounterCache
+from app.utils.device_health import HealthTracker
+from app.utils.poll_governor import PollGovernor
+from app.utils.poll_scheduler import PollScheduler, shard_for
+
+
+def device(device_id, poll_interval=None, site_id=None):
+    return {"id": device_id, "hostname": f"dev{device_id}", "site_id": site_id, "poll_interval": poll_interval}
+
+
+def make_scheduler(poll_device=None):
+    async def noop(info):
+        pass
+
+    scheduler = PollScheduler(poll_device or noop, default_interval=60, jitter=0.0,
+                              governor=PollGovernor(), health=HealthTracker(), counters=CounterCache())
+    scheduler._loop = asyncio.get_running_loop()
+    return scheduler
+
+
+# --------------------------------------------------------------------------
+# Sharding
+# --------------------------------------------------------------------------
+def test_single_shard_takes_every_device():
+    assert {shard_for(d, 1) for d in range(100)} == {0}
+
+
+def test_shards_are_stable_and_cover_every_index():
+    shards = [shard_for(d, 4) for d in range(1000)]
+    assert shards == [shard_for(d, 4) for d in range(1000)]
+    assert set(shards) == {0, 1, 2, 3}
+
+
+# --------------------------------------------------------------------------
+# Inventory
+# --------------------------------------------------------------------------
+def test_interval_defaults_and_floor():
+    async def main():
+        scheduler = make_scheduler()
+        assert scheduler.interval_for(device(1)) == 60
+        assert scheduler.interval_for(device(1, poll_interval=30)) == 30
+        assert scheduler.interval_for(device(1, poll_interval=0.2)) == 1.0
+
+    asyncio.run(main())
+
+
+def test_first_polls_spread_over_one_interval():
+    async def main():
+        scheduler = make_scheduler()
+        now = scheduler._loop.time()
+        scheduler.set_inventory([device(d) for d in range(200)])
+        deadlines = [e.deadline for e in scheduler._devices.values()]
+        assert all(now <= d <= now + 60 for d in deadlines)
+        assert max(deadlines) - min(deadlines) > 30
+
+    asyncio.run(main())
+
+
+def test_inventory_updates_and_removals():
+    async def main():
+        scheduler = make_scheduler()
+        scheduler._health.record_failure(2)
+        scheduler._counters.update(1, 1, 100, 100, timestamp=0)
+        scheduler._counters.update(2, 1, 100, 100, timestamp=0)
+        scheduler.set_inventory([device(1), device(2)])
+        deadline = scheduler._devices[1].deadline
+
+        scheduler.set_inventory([device(1, poll_interval=10)])
+        entry = scheduler._devices[1]
+        assert entry.interval == 10
+        assert entry.deadline <= min(deadline, scheduler._loop.time() + 10)
+        assert 2 not in scheduler._devices
+        assert scheduler._health.summary() == {"up": 0, "suspect": 0, "down": 0}
+        # counter baselines of the dropped device go with it
+        assert len(scheduler._counters) == 1
+
+    asyncio.run(main())
+
+
+# --------------------------------------------------------------------------
+# Dispatch
+# --------------------------------------------------------------------------
+def test_dispatch_polls_and_advances_fixed_rate():
+    polled = []
+
+    async def poll(info):
+        polled.append(info["id"])
+
+    async def main():
+        scheduler = make_scheduler(poll)
+        scheduler.set_inventory([device(1, poll_interval=10)])
+        entry = scheduler._devices[1]
+        now = entry.deadline
+        scheduler._dispatch(entry, now)
+        await entry.task
+        assert polled == [1]
+        assert entry.polls == 1
+        assert entry.deadline == now + 10
+        assert entry.late == 0
+
+    asyncio.run(main())
+
+
+def test_overrun_skips_the_cycle():
+    async def main():
+        gate = asyncio.Event()
+
+        async def slow(info):
+            await gate.wait()
+
+        scheduler = make_scheduler(slow)
+        scheduler.set_inventory([device(1, poll_interval=10)])
+        entry = scheduler._devices[1]
+        scheduler._dispatch(entry, entry.deadline)
+        await asyncio.sleep(0)
+        first = entry.task
+        scheduler._dispatch(entry, entry.deadline)
+        assert entry.task is first
+        assert entry.skipped == 1
+        assert scheduler.stats()["skipped_cycles"] == 1
+        gate.set()
+        await first
+
+    asyncio.run(main())
+
+
+def test_scheduler_behind_counts_late_cycles():
+    async def main():
+        scheduler = make_scheduler()
+        scheduler.set_inventory([device(1, poll_interval=10)])
+        entry = scheduler._devices[1]
+        start = entry.deadline
+        # dispatched 35s after its deadline: the slots at +10, +20 and +30 are gone
+        scheduler._dispatch(entry, start + 35)
+        await entry.task
+        assert entry.late == 3
+        assert entry.deadline == start + 40
+
+    asyncio.run(main())
+
+
+def test_open_breaker_defers_to_the_next_probe():
+    async def main():
+        scheduler = make_scheduler()
+        scheduler._health.failure_threshold = 1
+        scheduler.set_inventory([device(1, poll_interval=10)])
+        entry = scheduler._devices[1]
+        now = entry.deadline
+        scheduler._health.record_failure(1, now=now)
+        probe_at = scheduler._health.next_probe_at(1)
+        scheduler._dispatch(entry, now)
+        assert entry.task is None
+        assert entry.deadline == entry.due == probe_at
+
+    asyncio.run(main())
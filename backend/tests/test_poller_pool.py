@@ -0,0 +1,71 @@
+# backend/tests/test_poller_pool.py
+import asyncio
+import time
+
+from app.utils.poller_pool import PollerPool, resolve_process_count
+
+
+class FakeProcess:
+    """Exits `exits_after` seconds after terminate() (never if None)."""
+
+    def __init__(self, name, exits_after):
+        self.name = name
+        self.exits_after = exits_after
+        self.terminated_at = None
+        self.killed = False
+
+    def terminate(self):
+        self.terminated_at = time.monotonic()
+
+    def kill(self):
+        self.killed = True
+
+    def is_alive(self):
+        if self.killed:
+            return False
+        if self.terminated_at is None or self.exits_after is None:
+            return True
+        return time.monotonic() - self.terminated_at < self.exits_after
+
+
+def make_pool(*exits_after):
+    pool = PollerPool(len(exits_after))
+    pool._workers = [FakeProcess(f"snmp-poller-{i + 1}", e) for i, e in enumerate(exits_after)]
+    return pool
+
+
+def test_process_count():
+    assert resolve_process_count(3) == 3
+    assert resolve_process_count(0) >= 1
+
+
+def test_stop_waits_without_blocking_the_loop():
+    pool = make_pool(0.05, 0.1)
+    workers = list(pool._workers)
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def main():
+        task = asyncio.create_task(ticker())
+        await pool.stop(timeout=5, poll_interval=0.01)
+        task.cancel()
+
+    asyncio.run(main())
+    assert all(p.terminated_at is not None and not p.killed for p in workers)
+    assert not any(p.is_alive() for p in workers)
+    assert len(ticks) >= 5
+    assert pool._workers == [None, None]
+
+
+def test_stragglers_are_killed_after_the_timeout():
+    pool = make_pool(0.01, None)
+    exited, stuck = pool._workers
+    start = time.monotonic()
+    asyncio.run(pool.stop(timeout=0.1, poll_interval=0.01))
+    assert 0.1 <= time.monotonic() - start < 1
+    assert stuck.killed
+    assert not exited.killed
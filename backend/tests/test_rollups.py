@@ -0,0 +1,130 @@
+# backend/tests/test_rollups.py
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.utils.rollups import (
+    HIST_GAMMA, bucket_start, hist_bin, hist_from_values, hist_merge, hist_pack, hist_quantile, hist_unpack,
+    hist_value, merge_rows, percentile, pick_resolution, summarize,
+)
+
+
+# --------------------------------------------------------------------------
+# Buckets
+# --------------------------------------------------------------------------
+def test_bucket_start():
+    ts = datetime(2024, 5, 6, 13, 47, 31)
+    assert bucket_start(ts, 60) == datetime(2024, 5, 6, 13, 47)
+    assert bucket_start(ts, 300) == datetime(2024, 5, 6, 13, 45)
+    assert bucket_start(ts, 3600) == datetime(2024, 5, 6, 13, 0)
+    assert bucket_start(ts, 86400) == datetime(2024, 5, 6)
+
+
+# --------------------------------------------------------------------------
+# Log histogram
+# --------------------------------------------------------------------------
+def test_zero_has_its_own_bin():
+    assert hist_bin(0) == 0
+    assert hist_bin(-5) == 0
+    assert hist_value(0) == 0
+    assert hist_bin(1) > 0
+
+
+def test_bin_value_within_two_percent():
+    for value in (1, 7, 999, 12345, 10 ** 6, 987654321, 10 ** 10):
+        assert abs(hist_value(hist_bin(value)) - value) <= value * (HIST_GAMMA - 1) / 2 + 1
+
+
+def test_bins_are_monotonic():
+    bins = [hist_bin(v) for v in range(1, 5000, 7)]
+    assert bins == sorted(bins)
+
+
+def test_pack_roundtrip():
+    hist = hist_from_values([0, 0, 10, 10, 10, 1000])
+    packed = hist_pack(hist)
+    assert packed[0::2] == sorted(hist)
+    assert hist_unpack(packed) == hist
+    assert hist_unpack(None) == {}
+
+
+def test_quantile_close_to_exact_percentile():
+    rng = random.Random(1)
+    values = [rng.randint(1, 10 ** 9) for _ in range(5000)]
+    exact = percentile(values, 0.95)
+    assert abs(hist_quantile(hist_from_values(values), 0.95) - exact) <= exact * 0.02
+    assert hist_quantile({}, 0.95) is None
+
+
+def test_merged_histograms_match_one_histogram():
+    rng = random.Random(2)
+    values = [rng.randint(0, 10 ** 7) for _ in range(3000)]
+    merged = {}
+    for start in range(0, len(values), 500):
+        hist_merge(merged, hist_from_values(values[start:start + 500]))
+    assert merged == hist_from_values(values)
+
+
+def test_percentile_nearest_rank():
+    assert percentile(list(range(1, 101)), 0.95) == 95
+    assert percentile([5], 0.95) == 5
+    assert percentile([], 0.95) is None
+
+
+# --------------------------------------------------------------------------
+# Merging finer rows into a coarser bucket
+# --------------------------------------------------------------------------
+def row(values_in, values_out):
+    in_min, in_avg, in_max, _, in_hist = summarize(values_in)
+    out_min, out_avg, out_max, _, out_hist = summarize(values_out)
+    return SimpleNamespace(
+        samples=len(values_in), in_min=in_min, in_avg=in_avg, in_max=in_max, in_hist=in_hist,
+        out_min=out_min, out_avg=out_avg, out_max=out_max, out_hist=out_hist,
+    )
+
+
+def test_merge_rows_weights_averages_by_samples():
+    merged = merge_rows([row([10, 20, 30], [1, 1, 1]), row([100], [5])])
+    assert merged["samples"] == 4
+    assert merged["in_min"] == 10
+    assert merged["in_max"] == 100
+    assert merged["in_avg"] == 40
+    assert merged["out_avg"] == 2
+    assert hist_unpack(merged["in_hist"]) == hist_from_values([10, 20, 30, 100])
+
+
+def test_merge_rows_p95_from_merged_histogram():
+    rng = random.Random(3)
+    chunks = [[rng.randint(1, 10 ** 6) for _ in range(60)] for _ in range(60)]
+    merged = merge_rows([row(chunk, chunk) for chunk in chunks])
+    exact = percentile([v for chunk in chunks for v in chunk], 0.95)
+    assert abs(merged["in_p95"] - exact) <= exact * 0.02
+
+
+# --------------------------------------------------------------------------
+# Resolution picking
+# --------------------------------------------------------------------------
+def recent(span, ago=timedelta(0)):
+    end = datetime.utcnow() - ago
+    return end - span, end
+
+
+def test_short_ranges_use_raw_samples():
+    assert pick_resolution(*recent(timedelta(hours=1))) == 0
+
+
+def test_coarsest_rollup_with_enough_points():
+    assert pick_resolution(*recent(timedelta(hours=6))) == 60
+    assert pick_resolution(*recent(timedelta(days=2))) == 300
+    assert pick_resolution(*recent(timedelta(days=30))) == 3600
+    assert pick_resolution(*recent(timedelta(days=365 * 2))) == 86400
+
+
+def test_points_parameter():
+    assert pick_resolution(*recent(timedelta(days=30)), points=10) == 86400
+    assert pick_resolution(*recent(timedelta(days=30)), points=10 ** 6) == 0
+
+
+def test_rollup_past_its_retention_is_skipped():
+    # 1m buckets are kept 3 days, less than raw samples: a range 10 days back falls through to raw
+    assert pick_resolution(*recent(timedelta(hours=6), ago=timedelta(days=10))) == 0
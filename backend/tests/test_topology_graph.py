@@ -0,0 +1,214 @@
+# backend/tests/test_topology_graph.py
+import asyncio
+import random
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import topology
+from app.utils.topology_graph import TopologyGraph
+
+#       1 (core)           8 (isolated)
+#      / \
+#     2   6
+#   / | \ |
+#  3  4   5
+#  |
+#  7
+LINKS = [(1, 2), (1, 6), (2, 3), (2, 4), (2, 5), (6, 5), (3, 7)]
+
+
+def make_graph(links=LINKS, nodes=range(1, 9), core=(1,), site_of=None):
+    graph = TopologyGraph(max_age=3600)
+    for node in nodes:
+        site_id = site_of(node) if site_of else None
+        graph.add_node(node, f"dev{node}", site_id, "router" if node in core else "switch")
+    for a, b in links:
+        graph.add_link(a, b)
+    graph._loaded_at = time.monotonic()  # as if ensure_loaded() had read the DB
+    return graph
+
+
+def impact(graph, failed, roots=None):
+    """graph.impact() once any dominator tree rebuild it started has finished."""
+    async def settled():
+        await graph.impact(failed, roots)
+        await asyncio.gather(*graph._builds.values())
+        return await graph.impact(failed, roots)
+
+    return asyncio.run(settled())
+
+
+def brute_impact(graph, failed, roots):
+    alive = [r for r in roots if r not in failed]
+    return sorted(graph._reach(roots) - graph._reach(alive, set(failed)) - set(failed))
+
+
+# --------------------------------------------------------------------------
+# Shortest path
+# --------------------------------------------------------------------------
+def assert_is_path(graph, path, src, dst):
+    assert path[0] == src and path[-1] == dst
+    for a, b in zip(path, path[1:]):
+        assert b in graph.adjacency[a]
+
+
+def test_shortest_path():
+    graph = make_graph()
+    path = graph.shortest_path(7, 6)
+    assert len(path) == 5
+    assert_is_path(graph, path, 7, 6)
+    assert graph.shortest_path(4, 5) == [4, 2, 5]
+    assert graph.shortest_path(3, 3) == [3]
+
+
+def test_no_path():
+    graph = make_graph()
+    assert graph.shortest_path(7, 8) is None
+    assert graph.shortest_path(7, 99) is None
+
+
+def test_shortest_path_matches_bfs_distance():
+    rng = random.Random(4)
+    nodes = range(200)
+    graph = make_graph([(rng.randrange(200), rng.randrange(200)) for _ in range(300)], nodes)
+    for _ in range(50):
+        src, dst = rng.randrange(200), rng.randrange(200)
+        distances, frontier = {src: 0}, [src]
+        while frontier:
+            next_frontier = []
+            for node in frontier:
+                for neighbor in graph.adjacency[node]:
+                    if neighbor not in distances:
+                        distances[neighbor] = distances[node] + 1
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        path = graph.shortest_path(src, dst)
+        if dst not in distances:
+            assert path is None
+        else:
+            assert len(path) - 1 == distances[dst]
+            assert_is_path(graph, path, src, dst)
+
+
+# --------------------------------------------------------------------------
+# Impact
+# --------------------------------------------------------------------------
+def test_single_device_impact():
+    graph = make_graph()
+    assert impact(graph, [2]) == ([3, 4, 7], [1])
+    assert impact(graph, [6]) == ([], [1])
+    assert impact(graph, [3]) == ([7], [1])
+
+
+def test_several_devices_impact():
+    graph = make_graph()
+    assert impact(graph, [2, 6]) == ([3, 4, 5, 7], [1])
+
+
+def test_root_failure_takes_down_everything_behind_it():
+    graph = make_graph()
+    assert impact(graph, [1]) == ([2, 3, 4, 5, 6, 7], [1])
+
+
+def test_without_root_types_the_largest_component_is_the_network():
+    graph = make_graph(core=())
+    impacted, roots = impact(graph, [2])
+    assert roots == [1]
+    assert impacted == [3, 4, 7]
+
+
+def test_explicit_roots():
+    graph = make_graph()
+    assert impact(graph, [2], roots=[4]) == ([1, 3, 5, 6, 7], [4])
+
+
+def test_dominator_tree_matches_brute_force():
+    rng = random.Random(5)
+    graph = make_graph([(rng.randrange(120), rng.randrange(120)) for _ in range(160)], range(120), core=(0, 1))
+    for node in range(120):
+        impacted, roots = impact(graph, [node])
+        assert impacted == brute_impact(graph, [node], roots), node
+
+
+def test_cached_results_follow_graph_changes():
+    graph = make_graph()
+    assert impact(graph, [2]) == ([3, 4, 7], [1])
+    graph.add_link(4, 6)
+    assert impact(graph, [2]) == ([3, 7], [1])
+    graph.remove_node(3)
+    assert impact(graph, [2]) == ([], [1])
+
+
+def test_last_tree_answers_while_the_new_one_is_built():
+    graph = make_graph()
+
+    async def main():
+        assert await graph.impact([2]) == ([3, 4, 7], [1])
+        graph.add_link(4, 6)
+        graph.remove_node(7)
+        # rebuild started in a thread; the previous tree answers, minus the removed device
+        assert await graph.impact([2]) == ([3, 4], [1])
+        await asyncio.gather(*graph._builds.values())
+        assert await graph.impact([2]) == ([3], [1])
+
+    asyncio.run(main())
+
+
+# --------------------------------------------------------------------------
+# Live events
+# --------------------------------------------------------------------------
+def test_device_events():
+    graph = make_graph()
+    graph.on_event({"type": "device_added", "device_id": 9, "hostname": "dev9", "site_id": 3, "device_type": "switch"})
+    graph.on_event({"type": "topology_changed", "links": [[7, 9]]})
+    assert impact(graph, [3]) == ([7, 9], [1])
+    assert 9 in graph.sites[3] and graph.attrs[9]["hostname"] == "dev9"
+    graph.on_event({"type": "device_removed", "device_id": 9})
+    assert 9 not in graph.adjacency and 9 not in graph.adjacency[7]
+    assert 9 not in graph.sites[3]
+
+
+def test_events_before_first_load_are_ignored():
+    graph = TopologyGraph()
+    graph.on_event({"type": "device_added", "device_id": 1, "hostname": "dev1"})
+    assert graph.adjacency == {}
+
+
+# --------------------------------------------------------------------------
+# Endpoints
+# --------------------------------------------------------------------------
+@pytest.fixture
+def client(monkeypatch):
+    graph = make_graph(site_of=lambda node: 10 if node in (2, 6) else 20)
+    monkeypatch.setattr(topology, "topology_graph", graph)
+    api = FastAPI()
+    api.include_router(topology.router, prefix="/topology")
+    return TestClient(api)
+
+
+def test_path_endpoint(client):
+    r = client.get("/topology/path", params={"src": 4, "dst": 5})
+    assert r.status_code == 200
+    assert r.json() == {
+        "hops": 2,
+        "path": [{"id": 4, "hostname": "dev4"}, {"id": 2, "hostname": "dev2"}, {"id": 5, "hostname": "dev5"}],
+    }
+
+
+def test_path_endpoint_without_path(client):
+    assert client.get("/topology/path", params={"src": 7, "dst": 8}).status_code == 404
+
+
+def test_impact_endpoint_by_site(client):
+    r = client.get("/topology/impact", params={"site_id": 10})
+    assert r.status_code == 200
+    assert r.json() == {"failed": [2, 6], "roots": [1], "count": 4, "impacted": [3, 4, 5, 7]}
+    assert client.get("/topology/impact").status_code == 400
+
+
+def test_components_endpoint(client):
+    r = client.get("/topology/components", params={"min_size": 2})
+    assert r.json() == {"count": 1, "components": [{"size": 7, "devices": [1, 2, 3, 4, 5, 6, 7]}]}